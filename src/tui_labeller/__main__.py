@@ -41,6 +41,8 @@ if __name__ == "__main__":
                 )
             ],
             accounts_without_csv=categories,
+            history_path=args.history_path,
+            history_db_path=args.history_db,
         )
     else:
         print(f"Please select a CLI/TUI. You choose:{args.tui.lower()}")
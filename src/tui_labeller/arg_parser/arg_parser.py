@@ -14,6 +14,9 @@ from hledger_receipt_processing.receipt_transaction_matching.get_bank_data_from_
 from typeguard import typechecked
 
 from tui_labeller.interface_enum import InterfaceMode
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    DEFAULT_HISTORY_PATH,
+)
 
 
 @typechecked
@@ -67,6 +70,22 @@ def create_arg_parser() -> argparse.ArgumentParser:
         ),
     )
 
+    parser.add_argument(
+        "--history-path",
+        type=str,
+        default=DEFAULT_HISTORY_PATH,
+        help="Where the answer history is kept between sessions.",
+    )
+    parser.add_argument(
+        "--history-db",
+        type=str,
+        default=None,
+        help=(
+            "Keep the answer history in this SQLite database instead, for"
+            " large histories."
+        ),
+    )
+
     return parser
 
 
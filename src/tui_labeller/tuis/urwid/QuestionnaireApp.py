@@ -1,6 +1,6 @@
 import logging
 import os
-from typing import Any, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import urwid
 from hledger_core.TransactionObjects.Receipt import (  # For image handling
@@ -10,6 +10,16 @@ from typeguard import typechecked
 from urwid import AttrMap
 
 from tui_labeller.file_read_write_helper import write_to_file
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    HistoryStore,
+    get_history_store,
+)
+from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
+    InputValidationQuestion,
+)
+from tui_labeller.tuis.urwid.input_validation.paste_coalescing import (
+    coalesce_pasted_keys,
+)
 from tui_labeller.tuis.urwid.multiple_choice_question.HorizontalMultipleChoiceWidget import (  # noqa: E501
     HorizontalMultipleChoiceWidget,
 )
@@ -27,6 +37,7 @@ from tui_labeller.tuis.urwid.question_data_classes import (
     InputValidationQuestionData,
     VerticalMultipleChoiceQuestionData,
 )
+from tui_labeller.tuis.urwid.SidebarRenderer import get_sidebar_renderer
 
 log_file = os.path.join(os.path.dirname(__file__), "../../../../../log.txt")
 logging.basicConfig(
@@ -69,10 +80,24 @@ class QuestionnaireApp:
         ] = []
         self.labelled_receipts: List[Receipt] = labelled_receipts
         self.pile = urwid.Pile([])
-        self.history_store = (
-            {}
-            # New: Dictionary to store history suggestions {question_id:
-            # [suggestions]}
+        # Past answers per question_id, shared by the questionnaire
+        # rebuilds of the session.
+        self.history_store: HistoryStore = get_history_store(labelled_receipts)
+        # Ranked CSV candidates listed in the sidebar for the match choice,
+        # and the candidate the user picked per account string.
+        self.ranked_candidates: List[Any] = []
+        self.pinned_matches: Dict[str, Any] = {}
+        # The amount answered per account string when its pin was applied.
+        self.pinned_amounts: Dict[str, float] = {}
+        # Answers filled in by the CSV matching per question, which a later
+        # (better) match may overwrite as long as the user kept them.
+        self.prefilled_answers: Dict[str, Any] = {}
+        # Shortlist filtered while the amount is typed, see LiveMatcher.
+        self.live_matcher: Optional[Any] = None
+        # Called on "reconfigurer" before leaving the main loop; returns
+        # True if it handled the key in place (e.g. by opening an overlay).
+        self.on_reconfigurer: Optional[Callable[["QuestionnaireApp"], bool]] = (
+            None
         )
 
         # Setup UI elements
@@ -182,6 +207,14 @@ class QuestionnaireApp:
             ]
         )
 
+        # Cap the suggestions to what fits in their sections, one line is
+        # left for the words wrapped to the next line.
+        sidebar_width = term_width * 3 // 10
+        for box in (self.ai_suggestion_box, self.history_suggestion_box):
+            get_sidebar_renderer().set_capacity(
+                box, sidebar_width * (section_height * 2 - 1)
+            )
+
         # Create columns: main content (80%) and sidebar (20%)
         self.fill = urwid.Filler(self.pile, valign="top")
         self.columns = urwid.Columns(
@@ -197,7 +230,10 @@ class QuestionnaireApp:
 
         # Setup main loop
         self.loop = urwid.MainLoop(
-            self.columns, self.palette, unhandled_input=self._handle_input
+            self.columns,
+            self.palette,
+            unhandled_input=self._handle_input,
+            input_filter=self._coalesce_input,
         )
 
     def _move_focus(self, current_pos: int, key: str) -> None:
@@ -228,6 +264,17 @@ class QuestionnaireApp:
             )
         self._update_navigation_screen()
 
+    def _coalesce_input(self, keys: List[Any], raw: List[int]) -> List[Any]:
+        """Deliver pasted text to a focused text question as one key, see
+        coalesce_pasted_keys."""
+        if (
+            not self.inputs
+            or self.loop.widget is not self.columns
+            or not isinstance(self.get_focus_widget(), InputValidationQuestion)
+        ):
+            return keys
+        return coalesce_pasted_keys(keys)
+
     def _handle_input(self, key: str):
         """Handle user keyboard input."""
         current_pos: int = self.get_focus()
@@ -243,6 +290,8 @@ class QuestionnaireApp:
                 self._move_focus(current_pos, key)
 
         elif key == "reconfigurer":
+            if self.on_reconfigurer is not None and self.on_reconfigurer(self):
+                return
             raise urwid.ExitMainLoop()
         elif key == "terminator":
             raise urwid.ExitMainLoop()
@@ -279,6 +328,21 @@ class QuestionnaireApp:
             ):
                 focused_widget.update_autocomplete()
 
+    def open_overlay(self, widget: urwid.Widget) -> None:
+        """Show *widget* on top of the questionnaire inside the main loop."""
+        self.loop.widget = urwid.Overlay(
+            widget,
+            self.columns,
+            align="center",
+            width=("relative", 80),
+            valign="middle",
+            height=("relative", 70),
+        )
+
+    def close_overlay(self) -> None:
+        """Return to the questionnaire."""
+        self.loop.widget = self.columns
+
     def _save_results(self):
         """Save questionnaire results before exit."""
         results = {}
@@ -305,7 +369,12 @@ class QuestionnaireApp:
                 (VerticalMultipleChoiceWidget, HorizontalMultipleChoiceWidget),
             ):
                 self.inputs[0].base_widget.initalise_autocomplete_suggestions()
-        self.loop.run()
+        # Render the suggestion boxes once per input batch while running.
+        get_sidebar_renderer().attach(self.loop)
+        try:
+            self.loop.run()
+        finally:
+            get_sidebar_renderer().detach()
 
     @typechecked
     def set_focus(self, target_position: int) -> None:
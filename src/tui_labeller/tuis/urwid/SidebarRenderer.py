@@ -0,0 +1,93 @@
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import urwid
+
+SEPARATOR = ", "
+
+
+def get_capped_text(suggestions: List[str], max_chars: Optional[int]) -> str:
+    """The suggestions joined into one text, cut off with a ``+N more``
+    count if they do not fit in *max_chars* characters."""
+    text = SEPARATOR.join(suggestions)
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    shown: List[str] = []
+    length = 0
+    for nr_shown, suggestion in enumerate(suggestions):
+        more = f"+{len(suggestions) - nr_shown} more"
+        added = len(suggestion) + len(SEPARATOR)
+        if length + added + len(more) > max_chars:
+            return SEPARATOR.join(shown + [more])
+        shown.append(suggestion)
+        length += added
+    return text
+
+
+class SidebarRenderer:
+    """Renders the suggestion boxes of the sidebar once per input batch.
+
+    Questions hand over the suggestions for a box on every keypress, which
+    only marks the box dirty. While a main loop is attached, the dirty
+    boxes are rendered in a zero second alarm, which the event loop runs
+    after the keys of one input read were handled and before the screen
+    is drawn. Fast typing and pasted text thus render a box once, with
+    the last suggestions. Without a main loop (e.g. while a questionnaire
+    is built, or in tests) boxes are rendered right away.
+
+    Boxes with a capacity only show the suggestions that fit in it, and
+    the number of suggestions left out.
+    """
+
+    def __init__(self):
+        self.loop: Optional[urwid.MainLoop] = None
+        # id(box) -> box, suggestions not rendered yet.
+        self._dirty: Dict[int, Tuple[urwid.Widget, List[str]]] = {}
+        self._capacities: weakref.WeakKeyDictionary = (
+            weakref.WeakKeyDictionary()
+        )
+        self._scheduled: bool = False
+
+    def attach(self, loop: urwid.MainLoop) -> None:
+        self.loop = loop
+
+    def detach(self) -> None:
+        self.render()
+        self.loop = None
+        self._scheduled = False
+
+    def set_capacity(self, box: urwid.Widget, max_chars: int) -> None:
+        """Cap the text of *box* to *max_chars* characters."""
+        self._capacities[box] = max_chars
+
+    def set_suggestions(self, box: urwid.Widget, suggestions: List[str]):
+        """Mark *box* dirty, to show *suggestions* on the next render."""
+        self._dirty[id(box)] = (box, suggestions)
+        if self.loop is None:
+            self.render()
+        elif not self._scheduled:
+            self._scheduled = True
+            self.loop.set_alarm_in(0, self._on_alarm)
+
+    def _on_alarm(self, loop: Any, user_data: Any = None) -> None:
+        self._scheduled = False
+        self.render()
+
+    def render(self) -> None:
+        """Render the dirty boxes whose text changed."""
+        dirty = self._dirty
+        self._dirty = {}
+        for box, suggestions in dirty.values():
+            text = get_capped_text(suggestions, self._capacities.get(box))
+            if box.base_widget.text == text:
+                continue
+            box.base_widget.set_text(text)
+            box.base_widget._invalidate()
+
+
+# Session-wide renderer, attached to the main loop that is running.
+SIDEBAR_RENDERER = SidebarRenderer()
+
+
+def get_sidebar_renderer() -> SidebarRenderer:
+    return SIDEBAR_RENDERER
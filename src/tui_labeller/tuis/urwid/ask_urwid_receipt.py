@@ -1,24 +1,17 @@
 from __future__ import annotations
 
+import functools
 import logging
+from collections import Counter
 from copy import deepcopy
+from dataclasses import dataclass
 from datetime import datetime
-from typing import TYPE_CHECKING
-
-if TYPE_CHECKING:
-    from hledger_receipt_processing.matching.ask_user_action import (
-        ActionDataset,
-    )
+from typing import Iterator, Mapping
 
 import urwid
 from hledger_config.config.AccountConfig import AccountConfig
 from hledger_config.config.load_config import Config
-from hledger_core.Currency import Currency
 from hledger_core.generics.Transaction import Transaction
-from hledger_core.TransactionObjects.Account import Account
-from hledger_core.TransactionObjects.AccountTransaction import (
-    AccountTransaction,
-)
 from hledger_core.TransactionObjects.Receipt import Receipt
 from hledger_receipt_processing.receipt_transaction_matching.get_bank_data_from_transactions import (  # noqa: E501
     HledgerFlowAccountInfo,
@@ -29,9 +22,36 @@ from urwid import AttrMap
 from tui_labeller.tuis.urwid.date_question.DateTimeQuestion import (
     DateTimeQuestion,
 )
+from tui_labeller.tuis.urwid.input_validation.CategoryTrie import (
+    get_category_trie,
+)
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    get_history_store,
+    open_history_store,
+)
 from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
     InputValidationQuestion,
 )
+from tui_labeller.tuis.urwid.matching.candidate_ranking import get_claim_key
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    get_matching_margins,
+)
+from tui_labeller.tuis.urwid.matching.ClaimedIndex import (
+    get_claimed_index,
+)
+from tui_labeller.tuis.urwid.matching.ExchangeRateIndex import (
+    get_exchange_rate_index,
+)
+from tui_labeller.tuis.urwid.matching.match_query import MatchQuery
+from tui_labeller.tuis.urwid.matching.TransactionIndex import (
+    TransactionIndex,
+)
+from tui_labeller.tuis.urwid.matching.unlabelled_queue import (
+    get_unlabelled_queue,
+)
+from tui_labeller.tuis.urwid.matching_assistant.MatchingAssistant import (
+    MatchingAssistant,
+)
 from tui_labeller.tuis.urwid.multiple_choice_question.HorizontalMultipleChoiceWidget import (  # noqa: E501
     HorizontalMultipleChoiceWidget,
 )
@@ -41,6 +61,9 @@ from tui_labeller.tuis.urwid.multiple_choice_question.VerticalMultipleChoiceWidg
 from tui_labeller.tuis.urwid.prefill_receipt.pre_fill_receipt import (
     apply_prefilled_receipt,
 )
+from tui_labeller.tuis.urwid.question_app.addresses.ShopIndex import (
+    get_shop_index,
+)
 from tui_labeller.tuis.urwid.question_app.generator import create_questionnaire
 from tui_labeller.tuis.urwid.question_app.get_answers import (
     get_answers,
@@ -50,8 +73,12 @@ from tui_labeller.tuis.urwid.question_app.reconfiguration.reconfiguration import
     AMOUNT_PAID_QUESTION,
     BELONGS_TO_QUESTION,
     CHANGE_RETURNED_QUESTION,
+    CURRENCY_QUESTION,
+    MATCH_ASSISTANT_CHOICE,
     MATCH_CHOICE_QUESTION,
     get_configuration,
+    pin_match,
+    refresh_csv_match,
 )
 from tui_labeller.tuis.urwid.question_data_classes import AISuggestion
 from tui_labeller.tuis.urwid.QuestionnaireApp import QuestionnaireApp
@@ -70,8 +97,8 @@ from tui_labeller.tuis.urwid.receipts.WithdrawalQuestions import (
 logger = logging.getLogger(__name__)
 
 
-def _wants_matching_cli(tui: QuestionnaireApp) -> bool:
-    """Check if the user selected 'Enter matching CLI'."""
+def _wants_matching_assistant(tui: QuestionnaireApp) -> bool:
+    """Check if the user selected the matching assistant choice."""
     for inp in tui.inputs:
         w = inp if not isinstance(inp, AttrMap) else inp.base_widget
         if (
@@ -79,28 +106,40 @@ def _wants_matching_cli(tui: QuestionnaireApp) -> bool:
             and w.question_data.question == MATCH_CHOICE_QUESTION
             and hasattr(w, "has_answer")
             and w.has_answer()
-            and str(w.get_answer()) == "Enter matching CLI"
+            and str(w.get_answer()) == MATCH_ASSISTANT_CHOICE
         ):
             return True
     return False
 
 
-def _build_action_dataset(
+def _clear_matching_assistant_answer(tui: QuestionnaireApp) -> None:
+    """Reset the match choice widget answer so it doesn't re-trigger."""
+    for inp in tui.inputs:
+        w = inp if not isinstance(inp, AttrMap) else inp.base_widget
+        if (
+            hasattr(w, "question_data")
+            and w.question_data.question == MATCH_CHOICE_QUESTION
+            and hasattr(w, "clear_answer")
+        ):
+            w.clear_answer()
+
+
+def _build_match_query(
     *,
     tui: QuestionnaireApp,
     config: Config,
-    csv_transactions_per_account: dict[
-        AccountConfig, dict[int, list[Transaction]]
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, list[Transaction]]
     ],
-    labelled_receipts: list[Receipt],
-) -> ActionDataset:
-    """Build an ActionDataset from the current TUI answers."""
-    from hledger_receipt_processing.matching.ask_user_action import (
-        ActionDataset,
-    )
+) -> MatchQuery | None:
+    """Build the matching assistant's query from the current TUI answers.
 
+    Returns None for receipts the assistant cannot search, e.g. without
+    date or with an account that has no CSV.
+    """
     receipt_date: datetime | None = None
     account_str: str | None = None
+    currency: str | None = None
     amount_paid: float = 0.0
     change_returned: float = 0.0
 
@@ -113,6 +152,8 @@ def _build_action_dataset(
             receipt_date = w.get_answer()
         elif q == BELONGS_TO_QUESTION and w.has_answer():
             account_str = str(w.get_answer())
+        elif q == CURRENCY_QUESTION and w.has_answer():
+            currency = str(w.get_answer())
         elif q == AMOUNT_PAID_QUESTION and w.has_answer():
             try:
                 amount_paid = float(w.get_answer())
@@ -124,189 +165,124 @@ def _build_action_dataset(
             except (ValueError, TypeError):
                 pass
 
-    if receipt_date is None:
-        receipt_date = datetime.now()
-
-    # Find matching Account from csv_transactions_per_account.
-    account: Account | None = None
+    if receipt_date is None or account_str is None:
+        return None
+    account_config: AccountConfig | None = None
     for ac in csv_transactions_per_account:
-        if ac.account.to_string() == account_str:
-            account = ac.account
+        if ac.account.to_string() == account_str and ac.has_input_csv():
+            account_config = ac
             break
-
-    if account is None:
-        # Fallback: build a minimal account.
-        account = Account(
-            base_currency=Currency.EUR,
-            account_holder="unknown",
-            bank="unknown",
-            account_type="unknown",
-        )
-
-    search_txn = AccountTransaction(
-        account=account,
-        the_date=receipt_date,
-        tendered_amount_out=amount_paid,
-        change_returned=change_returned,
+    if account_config is None:
+        return None
+
+    day_margin, amount_margin = get_matching_margins(config)
+    return MatchQuery(
+        account_config=account_config,
+        receipt_date=receipt_date,
+        net_amount=amount_paid - change_returned,
+        day_margin=day_margin,
+        amount_margin=amount_margin,
+        currency=currency,
     )
 
-    from hledger_core.TransactionObjects.ExchangedItem import ExchangedItem
 
-    exchanged_item = ExchangedItem(
-        quantity=1.0,
-        description="stub",
-        the_date=receipt_date,
-        account_transactions=[search_txn],
-    )
+@dataclass
+class _MatchingSession:
+    """State the matching assistant needs across main loop runs."""
 
-    stub_receipt = Receipt.__new__(Receipt)
-    stub_receipt.the_date = receipt_date
-    stub_receipt.net_bought_items = [exchanged_item]
-    stub_receipt.net_returned_items = []
-    return ActionDataset(
-        receipt=stub_receipt,
-        account=account,
-        labelled_receipts=labelled_receipts,
-        search_receipt_account_transaction=search_txn,
-        config=deepcopy(config),
-        csv_transactions_per_account=csv_transactions_per_account,
-        ai_models_tnx_classification=[],
-        rule_based_models_tnx_classification=[],
-    )
+    config: Config
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, list[Transaction]]
+    ]
+    index: TransactionIndex
+    labelled_receipts: list[Receipt]
 
 
-def _run_matching_cli_loop(
-    action_dataset: ActionDataset,
-) -> Config | None:
-    """Run the matching CLI loop. Returns the (potentially widened) config, or
-    None if the user chose to return to the TUI.
+def _apply_assistant_match(
+    tui: QuestionnaireApp,
+    *,
+    session: _MatchingSession,
+    query: MatchQuery,
+    transaction: Transaction,
+) -> None:
+    """Copy an accepted assistant query and match back into the TUI."""
+    for inp in tui.inputs:
+        w = inp.base_widget if isinstance(inp, AttrMap) else inp
+        if (
+            isinstance(w, DateTimeQuestion)
+            and w.question_data.question == "Receipt date and time:\n"
+            and w.has_answer()
+            and w.get_answer() != query.receipt_date
+        ):
+            w.set_answer(query.receipt_date)
+
+    # Keep the widened margins for this receipt, such that the pinned
+    # transaction stays in the matching window.
+    day_margin, amount_margin = get_matching_margins(session.config)
+    if query.day_margin > day_margin or query.amount_margin > amount_margin:
+        session.config = deepcopy(session.config)
+        session.config.matching_algo.days = max(query.day_margin, day_margin)
+        session.config.matching_algo.amount_range = max(
+            query.amount_margin, amount_margin
+        )
 
-    This function uses input() and print() — the urwid screen must be
-    stopped before calling it.
-    """
-    from hledger_receipt_processing.matching.ask_user_action import (
-        ActionValuePair,
-        AlternateCurrencyWithdrawl,
-        ReceiptMatchingAction,
-        apply_action,
-        get_receipt_action,
-    )
-    from hledger_receipt_processing.matching.manual_actions.alternate_currency_withdrawl import (  # noqa: E501
-        add_estimated_conversion_ratio,
-    )
-    from hledger_receipt_processing.matching.manual_actions.widen_amount_range import (  # noqa: E501
-        asked_widen_amount_range,
-    )
-    from hledger_receipt_processing.matching.manual_actions.widen_date_range import (  # noqa: E501
-        asked_widen_date_range,
+    pin_match(
+        tui=tui,
+        account_str=query.account_config.account.to_string(),
+        transaction=transaction,
     )
-    from hledger_receipt_processing.matching.searching.helper import (
-        get_receipt_transaction_matches_in_csv_accounts,
+    tui.close_overlay()
+    refresh_csv_match(
+        tui=tui,
+        config=session.config,
+        csv_transactions_per_account=session.csv_transactions_per_account,
     )
 
-    while True:
-        action: ReceiptMatchingAction = get_receipt_action(
-            account=action_dataset.account,
-            search_receipt_account_transaction=(
-                action_dataset.search_receipt_account_transaction
-            ),
-            receipt=action_dataset.receipt,
-        )
 
-        if action == ReceiptMatchingAction.CHECK_RECEIPT:
-            print(
-                "\nReturning to receipt editor. Fix the receipt"
-                " and try again.\n"
-            )
-            return None
-
-        if action == ReceiptMatchingAction.CHECK_TRANSACTIONS:
-            print("\nNot yet implemented. Returning to TUI.\n")
-            return None
-
-        # Build the action value.
-        action_values: AlternateCurrencyWithdrawl | float | bool
-        if action == ReceiptMatchingAction.ALTERNATE_CURRENCY_WITHDRAWL:
-            from_currency, _, ratio = add_estimated_conversion_ratio(
-                search_receipt_account_transaction=(
-                    action_dataset.search_receipt_account_transaction
-                ),
-            )
-            action_values = AlternateCurrencyWithdrawl(
-                from_currency=from_currency,
-                conversion_ratio_1_from_to=ratio,
-            )
-        elif action == ReceiptMatchingAction.WIDEN_DATE:
-            action_values = asked_widen_date_range(
-                config=action_dataset.config,
-            )
-        elif action == ReceiptMatchingAction.WIDEN_AMOUNT:
-            action_values = asked_widen_amount_range()
-        elif action == ReceiptMatchingAction.SWAP_DAY_AND_MONTH:
-            from hledger_core.date_extractor import (  # noqa: E501
-                can_swap_day_and_month,
-                swap_month_day,
-            )
+def _open_matching_assistant(
+    tui: QuestionnaireApp, *, session: _MatchingSession
+) -> bool:
+    """Open the matching assistant overlay if the user asked for it.
 
-            if can_swap_day_and_month(
-                some_date=action_dataset.receipt.the_date
-            ):
-                action_values = swap_month_day(
-                    some_date=action_dataset.receipt.the_date,
-                )
-            else:
-                print("\nCannot swap day and month for this date.\n")
-                continue
-        else:
-            print(f"\nUnsupported action: {action}\n")
-            continue
-
-        action_value_pair = ActionValuePair(
-            action=action,
-            values=action_values,
-        )
-        action_dataset = apply_action(
-            action_dataset=action_dataset,
-            action_value=action_value_pair,
+    Returns True if the assistant was opened, such that the main loop
+    keeps running instead of reconfiguring the questionnaire.
+    """
+    if not _wants_matching_assistant(tui):
+        return False
+    _clear_matching_assistant_answer(tui)
+    query = _build_match_query(
+        tui=tui,
+        config=session.config,
+        csv_transactions_per_account=session.csv_transactions_per_account,
+    )
+    if query is None:
+        return False
+
+    # Offer the alternate currency at the rate of the labelled withdrawal
+    # between the receipt and the account currency nearest to the receipt.
+    conversion_ratio = None
+    account_currency = query.account_config.account.base_currency.value
+    if query.currency is not None and query.currency != account_currency:
+        conversion_ratio = get_exchange_rate_index(
+            session.labelled_receipts
+        ).get_rate(
+            from_currency=query.currency,
+            to_currency=account_currency,
+            the_date=query.receipt_date,
         )
 
-        # Re-check if we now have a match.
-        try:
-            matches = get_receipt_transaction_matches_in_csv_accounts(
-                csv_transactions_per_account=(
-                    action_dataset.csv_transactions_per_account
-                ),
-                action_dataset=action_dataset,
-            )
-        except Exception as exc:
-            logger.warning("Re-match failed: %s", exc)
-            matches = []
-
-        if len(matches) == 1:
-            print("\nFound unique match! Returning to TUI.\n")
-            return action_dataset.config
-        elif len(matches) == 0:
-            print(
-                f"\nStill no matches ({len(matches)} candidates)."
-                " Try another action.\n"
-            )
-        else:
-            print(
-                f"\nFound {len(matches)} candidates"
-                " (ambiguous). Try narrowing.\n"
-            )
-
-
-def _clear_matching_cli_answer(tui: QuestionnaireApp) -> None:
-    """Reset the match choice widget answer so it doesn't re-trigger."""
-    for inp in tui.inputs:
-        w = inp if not isinstance(inp, AttrMap) else inp.base_widget
-        if (
-            hasattr(w, "question_data")
-            and w.question_data.question == MATCH_CHOICE_QUESTION
-            and hasattr(w, "clear_answer")
-        ):
-            w.clear_answer()
+    assistant = MatchingAssistant(
+        index=session.index,
+        query=query,
+        on_accept=lambda q, txn: _apply_assistant_match(
+            tui, session=session, query=q, transaction=txn
+        ),
+        on_cancel=tui.close_overlay,
+        claimed_keys=get_claimed_index(session.labelled_receipts).keys,
+        conversion_ratio=conversion_ratio,
+    )
+    tui.open_overlay(assistant)
+    return True
 
 
 def _log_ai_corrections(
@@ -364,6 +340,16 @@ def _flatten_category_hierarchy(d: dict, prefix: str = "") -> list[str]:
     return paths
 
 
+def _get_category_paths(config: Config) -> list[str]:
+    """Every category of ``config.category_namespace``, as a colon path."""
+    ns = getattr(config, "category_namespace", None)
+    if ns is not None:
+        hierarchy = getattr(ns, "_hierarchy", None)
+        if isinstance(hierarchy, dict):
+            return _flatten_category_hierarchy(hierarchy)
+    return []
+
+
 def _get_ai_suggestions(
     config: Config,
     image_path: str,
@@ -385,12 +371,7 @@ def _get_ai_suggestions(
         ai = config.ai
 
         # Extract flat category list from config for the LLM classifier.
-        category_tree: list[str] = []
-        ns = getattr(config, "category_namespace", None)
-        if ns is not None:
-            hierarchy = getattr(ns, "_hierarchy", None)
-            if isinstance(hierarchy, dict):
-                category_tree = _flatten_category_hierarchy(hierarchy)
+        category_tree: list[str] = _get_category_paths(config)
 
         pipeline = build_extraction_pipeline(
             ollama_url=ai.ollama_url if ai else "http://localhost:11434",
@@ -409,6 +390,34 @@ def _get_ai_suggestions(
 
 
 @typechecked
+def _seed_match_target(
+    tui: QuestionnaireApp, *, transaction: Transaction
+) -> None:
+    """Answer the date, account, currency and amount of the receipt from
+    the CSV transaction it is labelled for, and pin that transaction as
+    its match."""
+    account_str = transaction.account.to_string()
+    answers = {
+        "Receipt date and time:\n": transaction.the_date,
+        BELONGS_TO_QUESTION: account_str,
+        CURRENCY_QUESTION: transaction.account.base_currency.value,
+        AMOUNT_PAID_QUESTION: abs(
+            transaction.tendered_amount_out - transaction.change_returned
+        ),
+    }
+    for inp in tui.inputs:
+        w = inp if not isinstance(inp, AttrMap) else inp.base_widget
+        question = getattr(getattr(w, "question_data", None), "question", None)
+        if question not in answers:
+            continue
+        try:
+            w.set_answer(answers.pop(question))
+        except ValueError:
+            # E.g. the account is not among the choices.
+            logger.warning("Could not pre-seed %r", question)
+    pin_match(tui=tui, account_str=account_str, transaction=transaction)
+
+
 def build_receipt_from_urwid(
     *,
     config: Config,
@@ -418,9 +427,19 @@ def build_receipt_from_urwid(
     labelled_receipts: list[Receipt],
     prefilled_receipt: Receipt | None,
     csv_transactions_per_account: None | (
-        dict[AccountConfig, dict[int, list[Transaction]]]
+        Mapping[AccountConfig, Mapping[int, list[Transaction]]]
     ) = None,
+    match_target: Transaction | None = None,
+    history_path: str | None = None,
+    history_db_path: str | None = None,
 ) -> Receipt:
+    """Label one receipt in the TUI.
+
+    A *match_target* CSV transaction pre-seeds the receipt's date,
+    account and amount, see ``label_unlabelled_transactions``. The
+    answer history is kept at *history_path*, or in the SQLite database
+    at *history_db_path*; only for the session without either.
+    """
     import time as _time
 
     _t0 = _time.monotonic()
@@ -447,12 +466,20 @@ def build_receipt_from_urwid(
         account_infos_str=account_infos_str,
         accounts_without_csv=accounts_without_csv,
     )
+    # The category question completes and validates against the namespace.
+    get_category_trie(_get_category_paths(config))
+    open_history_store(path=history_path, db_path=history_db_path)
     base_questions = BaseQuestions(ai_suggestions=ai_suggestions)
     optional_questions = OptionalQuestions(
         labelled_receipts=labelled_receipts,
         ai_suggestions=ai_suggestions,
     )
 
+    # A relabelled receipt may match its own transactions again, instead
+    # of another transaction of the same amount.
+    if prefilled_receipt is not None and prefilled_receipt in labelled_receipts:
+        get_claimed_index(labelled_receipts).remove_receipt(prefilled_receipt)
+
     tui: QuestionnaireApp = create_questionnaire(
         questions=base_questions.base_questions
         + account_questions.account_questions
@@ -469,6 +496,9 @@ def build_receipt_from_urwid(
         accounts_without_csv=accounts_without_csv,
     )
 
+    if match_target is not None:
+        _seed_match_target(tui, transaction=match_target)
+
     _t2 = _time.monotonic()
     print(f"  [timing] question setup: {_t2 - _t1:.1f}s")
 
@@ -489,8 +519,23 @@ def build_receipt_from_urwid(
     print(f"  [timing] get_configuration: {_t3 - _t2:.1f}s")
     print(f"  [timing] total before tui.run(): {_t3 - _t0:.1f}s")
 
+    # The matching assistant runs as an overlay inside the main loop.
+    matching_session: _MatchingSession | None = None
+    if csv_transactions_per_account is not None:
+        matching_session = _MatchingSession(
+            config=config,
+            csv_transactions_per_account=csv_transactions_per_account,
+            index=TransactionIndex(csv_transactions_per_account),
+            labelled_receipts=labelled_receipts,
+        )
+        tui.on_reconfigurer = functools.partial(
+            _open_matching_assistant, session=matching_session
+        )
+
     tui.run()  # Start the first run.
     while True:
+        if matching_session is not None:
+            config = matching_session.config
         if is_terminated(inputs=tui.inputs):
             final_answers: list[
                 tuple[
@@ -516,7 +561,7 @@ def build_receipt_from_urwid(
                 ),
             )
 
-            return build_receipt_from_answers(
+            receipt = build_receipt_from_answers(
                 config=config,
                 raw_receipt_img_filepaths=raw_receipt_img_filepaths,
                 final_answers=final_answers,
@@ -524,53 +569,17 @@ def build_receipt_from_urwid(
                 hledger_account_infos=hledger_account_infos,
                 accounts_without_csv=accounts_without_csv,
             )
-
-        elif csv_transactions_per_account is not None and _wants_matching_cli(
-            tui
-        ):
-            # Suspend urwid to run the matching CLI via input().
-            tui.loop.screen.stop()
-
-            try:
-                action_dataset = _build_action_dataset(
-                    tui=tui,
-                    config=config,
-                    csv_transactions_per_account=(csv_transactions_per_account),
-                    labelled_receipts=labelled_receipts,
-                )
-                updated_config = _run_matching_cli_loop(action_dataset)
-                if updated_config is not None:
-                    config = updated_config
-            except KeyboardInterrupt:
-                print("\nMatching CLI interrupted. Returning to TUI.")
-            finally:
-                # Resume urwid.
-                tui.loop.screen.start()
-
-            # Clear the choice answer so it does not re-trigger.
-            _clear_matching_cli_answer(tui)
-
-            current_position: int = tui.get_focus()
-            tui = get_configuration(
-                tui=tui,
-                account_questions=account_questions,
-                optional_questions=optional_questions,
-                labelled_receipts=labelled_receipts,
-                withdrawal_questions=withdrawal_questions,
-                config=config,
-                csv_transactions_per_account=csv_transactions_per_account,
-                prefilled_receipt=prefilled_receipt,
-            )
-
-            # Update the pile based on the reconfiguration.
-            pile_contents = [(urwid.Text(tui.header), ("pack", None))]
-            for some_widget in tui.inputs:
-                pile_contents.append((some_widget, ("pack", None)))
-            tui.pile.contents = pile_contents
-
-            tui.run(
-                alternative_start_pos=(current_position + tui.nr_of_headers)
-            )
+            # Its CSV transactions are no candidates for the next receipts,
+            # and its exchange rate estimates the next withdrawals.
+            get_claimed_index(labelled_receipts).add_receipt(receipt)
+            get_exchange_rate_index(labelled_receipts).add_receipt(receipt)
+            # Its shop is an address choice of the next receipts.
+            get_shop_index(labelled_receipts).add_receipt(receipt)
+            # Its answers rank first in the history of the next receipts.
+            history_store = get_history_store(labelled_receipts)
+            history_store.add_receipt(receipt)
+            history_store.save()
+            return receipt
 
         else:
             current_position: int = tui.get_focus()
@@ -592,3 +601,59 @@ def build_receipt_from_urwid(
             tui.pile.contents = pile_contents
 
             tui.run(alternative_start_pos=current_position + tui.nr_of_headers)
+
+
+def label_unlabelled_transactions(
+    *,
+    config: Config,
+    hledger_account_infos: set[HledgerFlowAccountInfo],
+    accounts_without_csv: set[str],
+    labelled_receipts: list[Receipt],
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, list[Transaction]]
+    ],
+    accounts: list[str] | None = None,
+    history_path: str | None = None,
+    history_db_path: str | None = None,
+) -> Iterator[Receipt]:
+    """Label the CSV transactions without receipt, highest priority first.
+
+    Each receipt is started from its transaction's date and amount and
+    yielded once finished, such that the caller stores it. Finished
+    receipts are appended to *labelled_receipts*, which drops the
+    transactions they claim from the rest of the queue.
+    """
+    queue = get_unlabelled_queue(
+        csv_transactions_per_account=csv_transactions_per_account,
+        labelled_receipts=labelled_receipts,
+        accounts=accounts,
+    )
+    logger.info("%d CSV transactions without receipt", len(queue))
+    # Claims per key the queue was built with, and the queued
+    # transactions per key handled since.
+    initial_claims = Counter(get_claimed_index(labelled_receipts).claims)
+    handled: Counter = Counter()
+    for entry in queue:
+        key = get_claim_key(entry.transaction)
+        handled[key] += 1
+        # Skip the transactions claimed by the receipts finished since.
+        new_claims = (
+            get_claimed_index(labelled_receipts).claims[key]
+            - initial_claims[key]
+        )
+        if new_claims >= handled[key]:
+            continue
+        receipt = build_receipt_from_urwid(
+            config=config,
+            raw_receipt_img_filepaths=[],
+            hledger_account_infos=hledger_account_infos,
+            accounts_without_csv=accounts_without_csv,
+            labelled_receipts=labelled_receipts,
+            prefilled_receipt=None,
+            csv_transactions_per_account=csv_transactions_per_account,
+            match_target=entry.transaction,
+            history_path=history_path,
+            history_db_path=history_db_path,
+        )
+        labelled_receipts.append(receipt)
+        yield receipt
@@ -16,6 +16,7 @@ from tui_labeller.tuis.urwid.question_data_classes import (
     AISuggestion,
     DateQuestionData,
 )
+from tui_labeller.tuis.urwid.SidebarRenderer import get_sidebar_renderer
 
 
 @typechecked
@@ -264,12 +265,11 @@ class DateTimeQuestion(urwid.Edit):
             current_text=self.get_edit_text(),
             cursor_pos=self.edit_pos,
         )
-        suggestions_text = ", ".join(matching_suggestions)
-
         self._in_autocomplete = True  # Set flag
 
-        self.ai_suggestion_box.base_widget.set_text(suggestions_text)
-        self.ai_suggestion_box.base_widget._invalidate()
+        get_sidebar_renderer().set_suggestions(
+            self.ai_suggestion_box, matching_suggestions
+        )
 
         if "*" in self.edit_text and len(matching_suggestions) == 1:
             new_text = matching_suggestions[0]
@@ -289,12 +289,11 @@ class DateTimeQuestion(urwid.Edit):
         return None
 
     def initalise_autocomplete_suggestions(self):
-        self.ai_suggestion_box.base_widget.set_text(
-            ",".join(
-                map(lambda x: x.question, self.ai_suggestions)
-            )  # TODO: determine if question should become question_data
+        get_sidebar_renderer().set_suggestions(
+            self.ai_suggestion_box,
+            # TODO: determine if question should become question_data
+            list(map(lambda x: x.question, self.ai_suggestions)),
         )
-        self.ai_suggestion_box.base_widget._invalidate()
 
     @typechecked
     def get_answer(self) -> Union[str, datetime]:
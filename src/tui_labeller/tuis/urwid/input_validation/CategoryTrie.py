@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+SEPARATOR = ":"
+
+
+@dataclass
+class CategoryNode:
+    """One colon-separated segment of the category namespace."""
+
+    path: str
+    children: Dict[str, "CategoryNode"] = field(default_factory=dict)
+
+
+class CategoryTrie:
+    """The configured category namespace, by colon-separated segment.
+
+    Built once from the flattened ``config.category_namespace`` (every
+    path, including the intermediate ones, is a category). Segments are
+    looked up and completed case-insensitively and reported with the
+    configured case, but a category is only valid in the configured
+    case, as hledger account names are case-sensitive. Checking or
+    completing a category walks one node per segment, so it costs
+    O(len) however large the namespace is.
+    """
+
+    def __init__(self, paths: Optional[List[str]] = None):
+        self.root = CategoryNode(path="")
+        self._paths: Tuple[str, ...] = ()
+        if paths:
+            self.sync(paths)
+
+    def add(self, path: str) -> None:
+        node = self.root
+        for segment in path.split(SEPARATOR):
+            prefix = f"{node.path}{SEPARATOR}" if node.path else ""
+            node = node.children.setdefault(
+                segment.lower(), CategoryNode(path=f"{prefix}{segment}")
+            )
+
+    def sync(self, paths: List[str]) -> "CategoryTrie":
+        """Rebuild the trie if the namespace *paths* changed."""
+        if tuple(paths) != self._paths:
+            self.root = CategoryNode(path="")
+            for path in paths:
+                self.add(path)
+            self._paths = tuple(paths)
+        return self
+
+    def is_empty(self) -> bool:
+        return not self.root.children
+
+    def find(self, path: str) -> Optional[CategoryNode]:
+        """Node of a complete category *path* in any case, or None if
+        unknown. Its ``path`` is the category in the configured case."""
+        node = self.root
+        for segment in path.split(SEPARATOR):
+            node = node.children.get(segment.lower())
+            if node is None:
+                return None
+        return node
+
+    def validate(self, value: str) -> Optional[str]:
+        """Error message for a category outside the namespace, None if it
+        is known (or no namespace is configured)."""
+        if self.is_empty():
+            return None
+        node = self.root
+        for segment in value.strip().split(SEPARATOR):
+            child = node.children.get(segment.lower())
+            parent = node.path or "the category namespace"
+            if child is None:
+                return f"Unknown category: {parent} has no '{segment}'."
+            configured = child.path.split(SEPARATOR)[-1]
+            if segment != configured:
+                return (
+                    f"Unknown category: {parent} has no '{segment}', did"
+                    f" you mean '{configured}'?"
+                )
+            node = child
+        return None
+
+    def get_completions(self, text: str) -> List[str]:
+        """Categories one segment deeper than the complete segments of
+        *text* whose last segment starts with its partial one.
+
+        ``groc`` gives ``groceries:`` (a trailing colon marks a category
+        with children), ``groceries:`` lists the children of groceries.
+        """
+        if "*" in text:
+            return []
+        *parents, partial = text.strip().split(SEPARATOR)
+        node = self.root
+        for segment in parents:
+            node = node.children.get(segment.lower())
+            if node is None:
+                return []
+        partial = partial.lower()
+        return [
+            f"{child.path}{SEPARATOR}" if child.children else child.path
+            for key, child in sorted(node.children.items())
+            if key.startswith(partial)
+        ]
+
+    def complete(self, text: str) -> Optional[str]:
+        """The completion of the partial segment of *text*, if there is
+        exactly one."""
+        completions = self.get_completions(text)
+        if len(completions) == 1 and completions[0] != text.strip():
+            return completions[0]
+        return None
+
+
+# Session-wide namespace, synced with the config of each receipt.
+CATEGORY_TRIE = CategoryTrie()
+
+
+def get_category_trie(paths: Optional[List[str]] = None) -> CategoryTrie:
+    """Return the session's category trie, synced with *paths* if
+    given."""
+    if paths is not None:
+        CATEGORY_TRIE.sync(paths)
+    return CATEGORY_TRIE
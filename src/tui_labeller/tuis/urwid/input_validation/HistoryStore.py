@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from hledger_core.TransactionObjects.Receipt import Receipt
+
+from tui_labeller.tuis.urwid.input_validation.SuggestionIndex import (
+    SuggestionIndex,
+)
+from tui_labeller.tuis.urwid.matching.candidate_ranking import (
+    get_receipt_transactions,
+)
+
+logger = logging.getLogger(__name__)
+
+# Where the command line keeps the answer history between sessions.
+DEFAULT_HISTORY_PATH = "~/.tui-labeller/answer_history.json"
+HISTORY_VERSION = 2
+# Days after which an answer's weight has halved.
+HALF_LIFE_DAYS = 90
+CATEGORY_QUESTION = "\nBookkeeping expense category:"
+_ADDRESS_FIELDS = ("street", "house_nr", "zipcode", "city", "country")
+
+
+def _get_field(obj, name: str):
+    """Field of a ShopId/Address object, or of its dict form."""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def get_receipt_answers(receipt: Receipt) -> Dict[str, str]:
+    """Answers to the text questions of a labelled receipt, per
+    question_id."""
+    answers: Dict[str, str] = {}
+    if receipt.receipt_category:
+        answers[CATEGORY_QUESTION] = receipt.receipt_category
+    shop = receipt.shop_identifier
+    if shop is None:
+        return answers
+    if _get_field(shop, "name"):
+        answers["shop_name"] = str(_get_field(shop, "name"))
+    address = _get_field(shop, "address")
+    for field in _ADDRESS_FIELDS:
+        value = _get_field(address, field) if address is not None else None
+        if value:
+            answers[f"shop_{field}"] = str(value)
+    return answers
+
+
+def get_frecency(count: int, last_used: datetime, now: datetime) -> float:
+    """The use count + 1, halved every ``HALF_LIFE_DAYS`` since the last
+    use."""
+    age_days = max((now - last_used).days, 0)
+    return (count + 1) * 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def get_receipt_key(receipt: Receipt) -> str:
+    """Identifies a receipt whose answers were counted already.
+
+    Besides the date, category and shop, the key holds the paid amount
+    and the image paths, such that two visits to one shop on a day are
+    two receipts.
+    """
+    the_date = receipt.the_date.isoformat() if receipt.the_date else ""
+    shop = receipt.shop_identifier
+    shop_name = _get_field(shop, "name") if shop is not None else None
+    paid = sum(
+        txn.tendered_amount_out - txn.change_returned
+        for txn in get_receipt_transactions(receipt)
+    )
+    images = ",".join(getattr(receipt, "raw_img_filepaths", None) or [])
+    return (
+        f"{the_date}|{receipt.receipt_category or ''}|{shop_name or ''}"
+        f"|{paid:.2f}|{images}"
+    )
+
+
+class HistoryStore:
+    """Past answers per question_id, ranked by frecency.
+
+    Each answer keeps a use count and the time it was last used. The
+    count grows once per finished receipt; answers that are only set
+    in the questionnaire (e.g. re-set on a reconfiguration) refresh the
+    last use. Answers are ranked by ``get_frecency``.
+
+    The store outlives the questionnaire rebuilds of a session, and is
+    written to *path* to carry over to the next session. Receipts of
+    ``labelled_receipts`` that were not counted yet (e.g. on the first
+    run) are added on ``sync``.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path: Optional[str] = path
+        # question_id -> answer -> [count, last used].
+        self.answers: Dict[str, Dict[str, list]] = {}
+        self.counted_receipts: Set[str] = set()
+        self._ranked: Dict[str, List[str]] = {}
+        self._indices: Dict[str, SuggestionIndex] = {}
+        self._loaded: bool = False
+        self._source: Optional[List[Receipt]] = None
+        self._indexed_count: int = 0
+
+    def _use(
+        self, question_id: str, answer: str, *, count: int, when: datetime
+    ) -> None:
+        entry = self.answers.setdefault(question_id, {}).setdefault(
+            answer, [0, when]
+        )
+        entry[0] += count
+        entry[1] = max(entry[1], when)
+        self._ranked.pop(question_id, None)
+
+    def touch(
+        self, question_id: str, answer: str, when: Optional[datetime] = None
+    ) -> None:
+        """Mark *answer* as just used, without counting it."""
+        if answer:
+            self._use(question_id, answer, count=0, when=when or datetime.now())
+
+    def add_receipt(self, receipt: Receipt) -> None:
+        """Count the answers of a (just finished) receipt once."""
+        key = get_receipt_key(receipt)
+        if key in self.counted_receipts:
+            return
+        self.counted_receipts.add(key)
+        when = receipt.the_date or datetime.now()
+        for question_id, answer in get_receipt_answers(receipt).items():
+            self._use(question_id, answer, count=1, when=when)
+
+    def sync(self, labelled_receipts: List[Receipt]) -> "HistoryStore":
+        """Load the store once, then count the receipts of
+        *labelled_receipts* not counted yet."""
+        if not self._loaded:
+            self.load()
+        if labelled_receipts is not self._source:
+            self._source = labelled_receipts
+            self._indexed_count = 0
+        start = self._indexed_count
+        for receipt in labelled_receipts[start:]:
+            self.add_receipt(receipt)
+        self._indexed_count = len(labelled_receipts)
+        return self
+
+    def get_score(
+        self, question_id: str, answer: str, now: Optional[datetime] = None
+    ) -> float:
+        count, last_used = self.answers[question_id][answer]
+        return get_frecency(count, last_used, now or datetime.now())
+
+    def get_top(self, question_id: str, k: Optional[int] = None) -> List[str]:
+        """Answers to *question_id*, highest frecency first.
+
+        Without *k* the ranking itself is returned, the same list until
+        an answer of the question changes.
+        """
+        ranked = self._ranked.get(question_id)
+        if ranked is None:
+            now = datetime.now()
+            answers = self.answers.get(question_id, {})
+            ranked = sorted(
+                answers,
+                key=lambda answer: (
+                    -self.get_score(question_id, answer, now),
+                    answer,
+                ),
+            )
+            self._ranked[question_id] = ranked
+        return ranked if k is None else ranked[:k]
+
+    def get_index(self, question_id: str) -> SuggestionIndex:
+        """Autocomplete index over the ranked answers to *question_id*,
+        shared by the questionnaire rebuilds until an answer changes."""
+        ranked = self.get_top(question_id)
+        index = self._indices.get(question_id)
+        if index is None or not index.is_current(ranked):
+            index = SuggestionIndex(
+                ranked, frequencies=self.get_frequencies(question_id)
+            )
+            self._indices[question_id] = index
+        return index
+
+    def get_frequencies(self, question_id: str) -> Dict[str, float]:
+        return {
+            answer: float(count)
+            for answer, (count, _) in self.answers.get(question_id, {}).items()
+        }
+
+    def load(self) -> None:
+        """Read the store from *path*, if there is a readable one."""
+        self._loaded = True
+        if self.path is None:
+            return
+        try:
+            with open(os.path.expanduser(self.path), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != HISTORY_VERSION:
+            return
+        for question_id, answers in data["answers"].items():
+            for answer, (count, last_used) in answers.items():
+                self._use(
+                    question_id,
+                    answer,
+                    count=count,
+                    when=datetime.fromisoformat(last_used),
+                )
+        self.counted_receipts.update(data["counted_receipts"])
+
+    def save(self) -> None:
+        """Write the store to *path*, replacing the previous file."""
+        if self.path is None:
+            return
+        path = os.path.expanduser(self.path)
+        data = {
+            "version": HISTORY_VERSION,
+            "answers": {
+                question_id: {
+                    answer: [count, last_used.isoformat()]
+                    for answer, (count, last_used) in answers.items()
+                }
+                for question_id, answers in self.answers.items()
+            },
+            "counted_receipts": sorted(self.counted_receipts),
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("Could not write the answer history to %s", path)
+
+
+# Session-wide store shared by all questionnaire rebuilds, see
+# open_history_store.
+_HISTORY_STORE: Optional[HistoryStore] = None
+
+
+def open_history_store(
+    *, path: Optional[str] = None, db_path: Optional[str] = None
+) -> HistoryStore:
+    """Use the store written to *path* for the session, or the SQLite
+    database at *db_path* (see ``SqliteHistoryStore``). Without either,
+    the store is kept in memory.
+
+    The store in use is kept if it was opened with the same path, such
+    that each receipt of a session can open it.
+    """
+    global _HISTORY_STORE
+    store_type, store_path = HistoryStore, path
+    if db_path:
+        from tui_labeller.tuis.urwid.input_validation.SqliteHistoryStore import (  # noqa: E501
+            SqliteHistoryStore,
+        )
+
+        store_type, store_path = SqliteHistoryStore, db_path
+    if (
+        type(_HISTORY_STORE) is not store_type
+        or _HISTORY_STORE.path != store_path
+    ):
+        _HISTORY_STORE = store_type(path=store_path)
+    return _HISTORY_STORE
+
+
+def reset_history_store() -> None:
+    """Drop the session's store, the next one starts empty."""
+    global _HISTORY_STORE
+    _HISTORY_STORE = None
+
+
+def get_history_store(labelled_receipts: List[Receipt]) -> HistoryStore:
+    """Return the session's history store, synced with the receipts."""
+    store = _HISTORY_STORE
+    if store is None:
+        store = open_history_store()
+    return store.sync(labelled_receipts)
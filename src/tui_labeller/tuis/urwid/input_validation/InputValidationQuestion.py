@@ -1,17 +1,22 @@
 import re
-from typing import Dict, List, Optional, Union
+from typing import List, Optional, Union
 
 import urwid
 from typeguard import typechecked
 
 from tui_labeller.tuis.urwid.helper import get_matching_unique_suggestions
-from tui_labeller.tuis.urwid.input_validation.autocomplete_filtering import (
-    get_filtered_suggestions,
-)
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import HistoryStore
 from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.input_validation.paste_coalescing import (
+    PastedText,
+)
+from tui_labeller.tuis.urwid.input_validation.SuggestionIndex import (
+    SuggestionIndex,
+)
 from tui_labeller.tuis.urwid.question_data_classes import (
     InputValidationQuestionData,
 )
+from tui_labeller.tuis.urwid.SidebarRenderer import get_sidebar_renderer
 
 
 class InputValidationQuestion(urwid.Edit):
@@ -22,7 +27,7 @@ class InputValidationQuestion(urwid.Edit):
         # ans_required: bool,
         # ai_suggestions=None,
         # history_suggestions=None,
-        history_store: Dict,
+        history_store: HistoryStore,
         ai_suggestion_box=None,
         history_suggestion_box=None,
         pile=None,
@@ -41,6 +46,9 @@ class InputValidationQuestion(urwid.Edit):
             question_id or question_data.question
         )  # TODO: improve naming.
         self.history_store = history_store
+        # Built once per suggestion list, narrowed per keystroke.
+        self._ai_index: Optional[SuggestionIndex] = None
+        self._ai_index_source: Optional[List] = None
 
     # def valid_char(self, ch):
     #     return len(ch) == 1 and (ch.isalpha() or ch in [":", "*"])
@@ -138,6 +146,8 @@ class InputValidationQuestion(urwid.Edit):
     def keypress(self, size, key):
         """Overrides the internal/urwid pip package method "keypress" to map
         incoming keys into separate behaviour."""
+        if isinstance(key, PastedText):
+            return self.insert_pasted_text(key)
         if key == "meta u":
             matching_suggestions: List[str] = get_matching_unique_suggestions(
                 suggestions=self.ai_suggestions,
@@ -167,6 +177,15 @@ class InputValidationQuestion(urwid.Edit):
 
                 self.apply_suggestion(matching_suggestions=matching_suggestions)
                 return self.safely_go_to_next_question()
+            if self.question_data.category_trie is not None:
+                # Complete the typed segment, e.g. groc -> groceries:.
+                completion = self.question_data.category_trie.complete(
+                    self.get_edit_text()
+                )
+                if completion is not None:
+                    self._apply_autocomplete(completion)
+                    self.update_autocomplete()
+                    return None
         if key == "home":
             if self.edit_pos == 0:
                 # Home at start of question moves to previous question.
@@ -199,6 +218,15 @@ class InputValidationQuestion(urwid.Edit):
             return result
         return None
 
+    def insert_pasted_text(self, text: str) -> None:
+        """Insert the valid characters of *text* at the cursor as one edit,
+        then update the autocompletion once."""
+        valid_text = "".join(ch for ch in text if self.valid_char(ch=ch))
+        if valid_text:
+            self.insert_text(valid_text)
+            self.update_autocomplete()
+        return None
+
     def _match_pattern(self, suggestion):
         pattern = self.edit_text.lower().replace("*", ".*")
         return bool(re.match(f"^{pattern}$", suggestion.lower()))
@@ -209,31 +237,76 @@ class InputValidationQuestion(urwid.Edit):
 
         # See if flag can be deleted.
         self._in_autocomplete = True  # Set flag
-        self._update_ai_suggestions()
-        self._update_history_suggestions()
+        ai_suggestions = self._update_ai_suggestions() or []
+        history_suggestions = self._update_history_suggestions() or []
 
-        self._handle_autocomplete()
+        self._handle_autocomplete(
+            ai_suggestions=ai_suggestions,
+            history_suggestions=history_suggestions,
+        )
         self._in_autocomplete = False  # Reset flag
 
+    def _get_ai_index(self) -> SuggestionIndex:
+        """Index of the AI suggestion texts, rebuilt if they are
+        replaced."""
+        if self._ai_index is None or (
+            self._ai_index_source is not self.ai_suggestions
+        ):
+            self._ai_index = SuggestionIndex(
+                [suggestion.question for suggestion in self.ai_suggestions],
+                frequencies={
+                    suggestion.question: suggestion.probability
+                    for suggestion in self.ai_suggestions
+                },
+            )
+            self._ai_index_source = self.ai_suggestions
+        return self._ai_index
+
+    @property
+    def history_id(self) -> str:
+        """Key of this question's answers in the history store."""
+        return self.question_data.question_id or self.question_id
+
+    def _filter(self, index) -> List[str]:
+        """Suggestions of a SuggestionIndex (or a history store's index) for
+        the current text, falling back to the closest ones on a typo if the
+        question allows fuzzy autocompletion."""
+        remaining = index.filter(self.edit_text)
+        if remaining == ["-"] and self.question_data.fuzzy_autocomplete:
+            return index.fuzzy_filter(self.edit_text) or remaining
+        return remaining
+
     def _update_ai_suggestions(self):
-        """Update the AI suggestion box with filtered suggestions."""
-        if not self.ai_suggestion_box or not self.ai_suggestions:
+        """Update the AI suggestion box with filtered suggestions, followed
+        by the category namespace's completions of the current segment."""
+        category_trie = self.question_data.category_trie
+        if category_trie is not None and category_trie.is_empty():
+            category_trie = None
+        if not self.ai_suggestion_box or not (
+            self.ai_suggestions or category_trie
+        ):
             return
 
-        ai_remaining_suggestions = get_filtered_suggestions(
-            input_text=self.edit_text,
-            available_suggestions=list(
-                map(lambda x: x.question, self.ai_suggestions)
-            ),
+        ai_remaining_suggestions = (
+            self._filter(self._get_ai_index()) if self.ai_suggestions else []
         )
-        ai_suggestions_text = ", ".join(ai_remaining_suggestions)
-        self._set_suggestion_text(self.ai_suggestion_box, ai_suggestions_text)
+        shown = [
+            suggestion
+            for suggestion in ai_remaining_suggestions
+            if suggestion != "-"
+        ]
+        if category_trie is not None:
+            shown += [
+                completion
+                for completion in category_trie.get_completions(self.edit_text)
+                if completion not in shown
+            ]
+        self._set_suggestions(self.ai_suggestion_box, shown or ["-"])
         return ai_remaining_suggestions
 
     def _update_history_suggestions(self):
         """Update the history suggestion box with filtered suggestions."""
         if not self.history_suggestion_box:
-            self._set_suggestion_text(self.history_suggestion_box, "")
             return []
 
         # history_remaining_suggestions = get_filtered_suggestions(
@@ -250,30 +323,27 @@ class InputValidationQuestion(urwid.Edit):
         # return history_remaining_suggestions
 
         # Fetch suggestions from global history_store
-        history_remaining_suggestions = get_filtered_suggestions(
-            input_text=self.edit_text,
-            available_suggestions=self.history_store.get(
-                self.question_data.question_id, []
-            ),
+        history_remaining_suggestions = self._filter(
+            self.history_store.get_index(self.history_id)
         )
-        history_suggestions_text = ", ".join(history_remaining_suggestions)
-        self._set_suggestion_text(
-            self.history_suggestion_box, history_suggestions_text
+        self._set_suggestions(
+            self.history_suggestion_box, history_remaining_suggestions
         )
         return history_remaining_suggestions
 
-    def _set_suggestion_text(self, suggestion_box, text):
-        """Set text in a suggestion box and invalidate it."""
-        suggestion_box.base_widget.set_text(text)
-        suggestion_box.base_widget._invalidate()
+    def _set_suggestions(self, suggestion_box, suggestions: List[str]):
+        """Show the suggestions in a suggestion box, on the next render of
+        the sidebar."""
+        get_sidebar_renderer().set_suggestions(suggestion_box, suggestions)
 
-    def _handle_autocomplete(self):
-        """Handle wildcard-based autocompletion."""
+    def _handle_autocomplete(
+        self, *, ai_suggestions: List[str], history_suggestions: List[str]
+    ):
+        """Handle wildcard-based autocompletion on the suggestions that
+        remain for the current text."""
         if "*" not in self.edit_text:
             self.owner.set_attr_map({None: "normal"})
             return
-        ai_suggestions = self._update_ai_suggestions() or []
-        history_suggestions = self._update_history_suggestions() or []
 
         if len(ai_suggestions) == 1:
             self._apply_autocomplete(ai_suggestions[0])
@@ -412,24 +482,16 @@ class InputValidationQuestion(urwid.Edit):
         self.update_autocomplete()
 
         # Store answer in history_store
-        question_id = self.question_id
-        if question_id not in self.history_store:
-            self.history_store[question_id] = []
-        if str(value) not in self.history_store[question_id]:
-            self.history_store[question_id].append(str(value))
+        self.history_store.touch(self.history_id, str(value))
 
         # Update address history if this is the categories question
         cat_id = "\nbookkeeping expense category:"
-        if cat_id in question_id.lower():
+        if cat_id in self.question_id.lower():
             address_question_id = None
             if hasattr(self, "questions"):
                 for q in self.questions:
                     if "address" in q.question_id.lower():
                         address_question_id = q.question_id
                         break
-            if address_question_id and str(value) not in self.history_store.get(
-                address_question_id, []
-            ):
-                self.history_store.setdefault(address_question_id, []).append(
-                    str(value)
-                )
+            if address_question_id:
+                self.history_store.touch(address_question_id, str(value))
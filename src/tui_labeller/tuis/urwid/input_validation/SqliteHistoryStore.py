@@ -0,0 +1,247 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from hledger_core.TransactionObjects.Receipt import Receipt
+
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    HISTORY_VERSION,
+    HistoryStore,
+    get_frecency,
+    get_receipt_answers,
+    get_receipt_key,
+)
+
+# Suggestions returned per lookup.
+HISTORY_LIMIT = 50
+# Sorts after every character, closes the range of keys with a prefix.
+_MAX_CHAR = "\U0010ffff"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    question_id TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    answer_key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    last_used TEXT NOT NULL,
+    PRIMARY KEY (question_id, answer)
+);
+CREATE INDEX IF NOT EXISTS answers_by_key ON answers (question_id, answer_key);
+CREATE TABLE IF NOT EXISTS counted_receipts (receipt_key TEXT PRIMARY KEY);
+"""
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS answers_fts USING fts5(
+    answer_key, content='answers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS answers_fts_insert AFTER INSERT ON answers
+BEGIN
+    INSERT INTO answers_fts (rowid, answer_key)
+    VALUES (new.rowid, new.answer_key);
+END;
+"""
+_UPSERT = """
+INSERT INTO answers (question_id, answer, answer_key, count, last_used)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (question_id, answer) DO UPDATE SET
+    count = count + excluded.count,
+    last_used = max(last_used, excluded.last_used)
+"""
+_RANKING = "ORDER BY frecency(count, last_used) DESC, answer LIMIT ?"
+
+
+def _frecency(count: int, last_used: str) -> float:
+    return get_frecency(
+        count, datetime.fromisoformat(last_used), datetime.now()
+    )
+
+
+def _get_token_query(text: str) -> Optional[str]:
+    """FTS5 query matching answers with a word starting with each typed
+    word, e.g. ``"eko"*`` for ``eko``."""
+    words = "".join(
+        char if char.isalnum() else " " for char in text.lower()
+    ).split()
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class SqliteQuestionIndex:
+    """Autocomplete lookups for one question, run as indexed queries.
+
+    Same results as a ``SuggestionIndex`` over the ranked answers, but at
+    most ``limit`` of them: the prefix is a range of the
+    (question_id, answer_key) index, wildcard parts are checked with
+    ``instr`` inside that range. Memory and latency do not grow with the
+    answers that do not match.
+    """
+
+    def __init__(
+        self, store: "SqliteHistoryStore", question_id: str, limit: int
+    ):
+        self.store = store
+        self.question_id: str = question_id
+        self.limit: int = limit
+
+    def filter(self, input_text: str) -> List[str]:
+        """Best ranked answers for the typed text; ``['-']`` if none
+        match."""
+        parts = input_text.strip().lower().split("*")
+        prefix = parts[0]
+        infixes = [part for part in parts[1:] if part]
+        query = (
+            "SELECT answer FROM answers WHERE question_id = ?"
+            " AND answer_key >= ? AND answer_key < ?"
+            + " AND instr(answer_key, ?) > 0" * len(infixes)
+            + f" {_RANKING}"
+        )
+        rows = self.store.connection.execute(
+            query,
+            (
+                self.question_id,
+                prefix,
+                prefix + _MAX_CHAR,
+                *infixes,
+                self.limit,
+            ),
+        ).fetchall()
+        return [answer for (answer,) in rows] or ["-"]
+
+    def fuzzy_filter(self, input_text: str) -> List[str]:
+        """Answers with a word starting with each typed word, e.g. the
+        shop ``groceries:ekoplaza`` for ``eko``.
+
+        Stands in for the edit distance fallback of ``SuggestionIndex``,
+        through the full-text index. Empty without FTS5 support.
+        """
+        token_query = _get_token_query(input_text)
+        if token_query is None or "*" in input_text or not self.store.has_fts:
+            return []
+        rows = self.store.connection.execute(
+            "SELECT answer FROM answers JOIN answers_fts"
+            " ON answers.rowid = answers_fts.rowid"
+            " WHERE answers_fts MATCH ? AND question_id = ?"
+            f" {_RANKING}",
+            (token_query, self.question_id, self.limit),
+        ).fetchall()
+        return [answer for (answer,) in rows]
+
+
+class SqliteHistoryStore(HistoryStore):
+    """``HistoryStore`` kept in a local SQLite database at *path*.
+
+    For multi-year corpora: answers are not loaded into memory, every
+    lookup is an indexed query with a LIMIT. The answers are also in an
+    FTS5 table (if SQLite was built with it) to find them by any word.
+    Counted receipts are stored too, so ``sync`` only counts the
+    receipts that are new since the previous session. Opened by passing
+    its path as ``db_path`` to ``open_history_store``.
+    """
+
+    def __init__(self, path: str, limit: int = HISTORY_LIMIT):
+        super().__init__(path=path)
+        self.limit: int = limit
+        self._connection: Optional[sqlite3.Connection] = None
+        self.has_fts: bool = False
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.load()
+        return self._connection
+
+    def load(self) -> None:
+        """Open (and if needed create) the database."""
+        self._loaded = True
+        path = self.path
+        if path != ":memory:":
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        connection = sqlite3.connect(path)
+        connection.create_function("frecency", 2, _frecency)
+        connection.executescript(_SCHEMA)
+        try:
+            connection.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5: only the prefix lookups.
+            self.has_fts = False
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        if version != HISTORY_VERSION:
+            # The receipt keys of another version do not match, start over
+            # and count the labelled receipts again.
+            connection.execute("DELETE FROM counted_receipts")
+            connection.execute("DELETE FROM answers")
+            if self.has_fts:
+                connection.execute(
+                    "INSERT INTO answers_fts (answers_fts) VALUES"
+                    " ('delete-all')"
+                )
+            connection.execute(f"PRAGMA user_version = {HISTORY_VERSION}")
+            connection.commit()
+        self._connection = connection
+
+    def save(self) -> None:
+        self.connection.commit()
+
+    def _use(
+        self, question_id: str, answer: str, *, count: int, when: datetime
+    ) -> None:
+        self.connection.execute(
+            _UPSERT,
+            (
+                question_id,
+                answer,
+                answer.lower(),
+                count,
+                when.isoformat(timespec="seconds"),
+            ),
+        )
+
+    def add_receipt(self, receipt: Receipt) -> None:
+        """Count the answers of a (just finished) receipt once."""
+        inserted = self.connection.execute(
+            "INSERT OR IGNORE INTO counted_receipts VALUES (?)",
+            (get_receipt_key(receipt),),
+        ).rowcount
+        if not inserted:
+            return
+        when = receipt.the_date or datetime.now()
+        for question_id, answer in get_receipt_answers(receipt).items():
+            self._use(question_id, answer, count=1, when=when)
+
+    def sync(self, labelled_receipts: List[Receipt]) -> "SqliteHistoryStore":
+        super().sync(labelled_receipts)
+        self.connection.commit()
+        return self
+
+    def get_score(
+        self, question_id: str, answer: str, now: Optional[datetime] = None
+    ) -> float:
+        count, last_used = self.connection.execute(
+            "SELECT count, last_used FROM answers"
+            " WHERE question_id = ? AND answer = ?",
+            (question_id, answer),
+        ).fetchone()
+        return get_frecency(
+            count, datetime.fromisoformat(last_used), now or datetime.now()
+        )
+
+    def get_top(self, question_id: str, k: Optional[int] = None) -> List[str]:
+        """At most *k* (or ``limit``) answers, highest frecency first."""
+        rows = self.connection.execute(
+            f"SELECT answer FROM answers WHERE question_id = ? {_RANKING}",
+            (question_id, self.limit if k is None else k),
+        ).fetchall()
+        return [answer for (answer,) in rows]
+
+    def get_index(self, question_id: str) -> SqliteQuestionIndex:
+        return SqliteQuestionIndex(self, question_id, self.limit)
+
+    def get_frequencies(self, question_id: str) -> Dict[str, float]:
+        rows = self.connection.execute(
+            "SELECT answer, count FROM answers WHERE question_id = ?",
+            (question_id,),
+        ).fetchall()
+        return {answer: float(count) for answer, count in rows}
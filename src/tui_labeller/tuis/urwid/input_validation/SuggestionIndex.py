@@ -0,0 +1,188 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# Sorts after every character, closes the range of keys with a prefix.
+_MAX_CHAR = "\U0010ffff"
+# Typos tolerated by the fuzzy filter, and the suggestions it returns.
+MAX_EDIT_DISTANCE = 2
+FUZZY_LIMIT = 10
+# Typed characters per tolerated typo, short texts would match anything.
+CHARS_PER_TYPO = 3
+
+
+def _common_prefix_length(first: str, second: str, limit: int) -> int:
+    length = 0
+    while (
+        length < limit
+        and length < len(first)
+        and length < len(second)
+        and first[length] == second[length]
+    ):
+        length += 1
+    return length
+
+
+def _next_row(previous: List[int], query: str, char: str) -> List[int]:
+    """Levenshtein row of *query* after appending *char* to the key."""
+    row = [previous[0] + 1]
+    for col, query_char in enumerate(query, start=1):
+        row.append(
+            min(
+                row[col - 1] + 1,
+                previous[col] + 1,
+                previous[col - 1] + (query_char != char),
+            )
+        )
+    return row
+
+
+class SuggestionIndex:
+    """Prefix index over the suggestions of one question.
+
+    Gives the same result as ``get_filtered_suggestions``, including the
+    ``a*d`` wildcard semantics: the text before the first ``*`` is a
+    prefix, every later part must occur anywhere in the suggestion.
+    Suggestions are lowercased and sorted once, such that a prefix is a
+    binary search. While the user appends characters, each keystroke
+    only filters the previous keystroke's result, as every constraint
+    of the longer text implies those of the shorter one.
+
+    The sorted keys double as an implicit trie for ``fuzzy_filter``,
+    which tolerates typos in the typed prefix.
+    """
+
+    def __init__(
+        self,
+        suggestions: List[str],
+        frequencies: Optional[Dict[str, float]] = None,
+    ):
+        self.suggestions: List[str] = suggestions
+        self.frequencies: Dict[str, float] = frequencies or {}
+        self._keys: List[str] = [s.lower() for s in suggestions]
+        order = sorted(range(len(suggestions)), key=self._keys.__getitem__)
+        self._sorted_keys: List[str] = [self._keys[i] for i in order]
+        self._sorted_indices: List[int] = order
+        self._last_key: Optional[str] = None
+        self._last_indices: List[int] = []
+
+    def is_current(self, suggestions: List[str]) -> bool:
+        """Whether the index still covers *suggestions*, which grow by
+        append (e.g. the history store)."""
+        return suggestions is self.suggestions and len(suggestions) == len(
+            self._keys
+        )
+
+    def _with_prefix(self, prefix: str) -> List[int]:
+        """Indices of the suggestions starting with *prefix*, in the
+        original order."""
+        lo = bisect_left(self._sorted_keys, prefix)
+        hi = bisect_right(self._sorted_keys, prefix + _MAX_CHAR)
+        return sorted(self._sorted_indices[lo:hi])
+
+    def _match(self, key: str) -> List[int]:
+        """Indices of the suggestions matching the lowercased *key*."""
+        parts = key.split("*")
+        last = self._last_key
+        if last and key.startswith(last) and key.count("*") == last.count("*"):
+            # Only the last part grew, the other parts were checked.
+            if len(parts) == 1:
+                return [
+                    i
+                    for i in self._last_indices
+                    if self._keys[i].startswith(key)
+                ]
+            return [i for i in self._last_indices if parts[-1] in self._keys[i]]
+
+        prefix = parts[0]
+        infixes = [part for part in parts[1:] if part]
+        if last and key.startswith(last):
+            # E.g. pasted text, narrow the previous result on all parts.
+            pool = [
+                i
+                for i in self._last_indices
+                if self._keys[i].startswith(prefix)
+            ]
+        else:
+            pool = self._with_prefix(prefix)
+        return [
+            i for i in pool if all(infix in self._keys[i] for infix in infixes)
+        ]
+
+    def filter(self, input_text: str) -> List[str]:
+        """Filter the suggestions on the typed text; ``['-']`` if none
+        match."""
+        key = input_text.strip().lower()
+        # Empty input or a lone '*' shows all suggestions.
+        if not key or key == "*":
+            return self.suggestions
+
+        if key != self._last_key:
+            self._last_indices = self._match(key)
+            self._last_key = key
+
+        filtered = [self.suggestions[i] for i in self._last_indices]
+        return filtered if filtered else ["-"]
+
+    def fuzzy_filter(
+        self,
+        input_text: str,
+        *,
+        max_distance: int = MAX_EDIT_DISTANCE,
+        limit: int = FUZZY_LIMIT,
+    ) -> List[str]:
+        """Suggestions that start within *max_distance* edits of the typed
+        text, closest first, then most frequent. Empty if there are none.
+
+        One typo is tolerated per ``CHARS_PER_TYPO`` typed characters, up
+        to *max_distance*.
+
+        Walks the sorted keys like a trie: the Levenshtein rows of a
+        shared prefix are reused by the next key, and once every cell of
+        a row exceeds *max_distance*, all keys below that prefix are
+        skipped with a binary search.
+        """
+        query = input_text.strip().lower()
+        max_distance = min(max_distance, (len(query) - 1) // CHARS_PER_TYPO)
+        if max_distance < 1 or "*" in query:
+            return []
+        keys = self._sorted_keys
+        rows = [list(range(len(query) + 1))]
+        # Distance of the query to the closest prefix of the path so far.
+        best = [len(query)]
+        found: List[Tuple[int, int]] = []
+        previous = ""
+        pos = 0
+        while pos < len(keys):
+            key = keys[pos]
+            depth = _common_prefix_length(previous, key, len(rows) - 1)
+            while len(rows) > depth + 1:
+                rows.pop()
+                best.pop()
+            end = pos + 1
+            while depth < len(key):
+                row = _next_row(rows[-1], query, key[depth])
+                depth += 1
+                rows.append(row)
+                best.append(min(best[-1], row[-1]))
+                if min(row) > max_distance:
+                    # No longer key with this prefix gets any closer.
+                    end = bisect_right(keys, key[:depth] + _MAX_CHAR, pos)
+                    break
+            if best[-1] <= max_distance:
+                found.extend(
+                    (best[-1], i) for i in self._sorted_indices[pos:end]
+                )
+            previous = key[:depth]
+            pos = end
+
+        closest = heapq.nsmallest(
+            limit,
+            found,
+            key=lambda match: (
+                match[0],
+                -self.frequencies.get(self.suggestions[match[1]], 0),
+                match[1],
+            ),
+        )
+        return [self.suggestions[i] for _, i in closest]
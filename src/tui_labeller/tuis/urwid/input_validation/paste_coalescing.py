@@ -0,0 +1,37 @@
+from typing import List, Union
+
+# Printable keys in a row of one input batch that are taken as a paste.
+MIN_PASTE_LENGTH = 3
+
+
+class PastedText(str):
+    """Printable keys of one input batch, delivered as a single key.
+
+    A subclass of str, so the widgets between the main loop and the
+    focused question pass it on like any other key.
+    """
+
+
+def _is_printable_key(key: Union[str, tuple]) -> bool:
+    return isinstance(key, str) and len(key) == 1 and key.isprintable()
+
+
+def coalesce_pasted_keys(
+    keys: List[Union[str, tuple]], min_length: int = MIN_PASTE_LENGTH
+) -> List[Union[str, tuple]]:
+    """Replace each run of at least *min_length* printable keys in *keys*
+    by one PastedText, keeping the order of the other keys."""
+    coalesced: List[Union[str, tuple]] = []
+    run: List[str] = []
+    for key in keys + [None]:
+        if key is not None and _is_printable_key(key):
+            run.append(key)
+            continue
+        if len(run) >= min_length:
+            coalesced.append(PastedText("".join(run)))
+        else:
+            coalesced.extend(run)
+        run = []
+        if key is not None:
+            coalesced.append(key)
+    return coalesced
@@ -0,0 +1,126 @@
+from collections import Counter
+from typing import AbstractSet, List, Optional, Set
+
+from hledger_core.generics.Transaction import Transaction
+from hledger_core.TransactionObjects.Receipt import Receipt
+
+from tui_labeller.tuis.urwid.matching.candidate_ranking import (
+    ClaimKey,
+    get_claim_key,
+    get_receipt_transactions,
+)
+
+
+def _get_claim_keys(receipt: Receipt) -> List[ClaimKey]:
+    return [
+        get_claim_key(txn)
+        for txn in get_receipt_transactions(receipt)
+        if txn.account is not None and txn.the_date is not None
+    ]
+
+
+class ClaimedIndex:
+    """Counts of the CSV transactions claimed by labelled receipts.
+
+    Built once per session from ``labelled_receipts`` and extended as
+    receipts are finished, instead of walking every labelled receipt on
+    each match. Transactions are identified by account, day and net
+    amount, see ``get_claim_key``. Claims are counted per key, such that
+    two payments of the same amount on one day are two claims.
+    """
+
+    def __init__(self):
+        self.claims: Counter = Counter()
+        self._counted: Set[int] = set()
+        self._source: Optional[List[Receipt]] = None
+        self._indexed_count: int = 0
+
+    @property
+    def keys(self) -> AbstractSet[ClaimKey]:
+        """The claim keys with at least one claim."""
+        return self.claims.keys()
+
+    def add_receipt(self, receipt: Receipt) -> None:
+        """Claim the transactions of a (just finished) receipt once."""
+        if id(receipt) in self._counted:
+            return
+        self._counted.add(id(receipt))
+        self.claims.update(_get_claim_keys(receipt))
+
+    def remove_receipt(self, receipt: Receipt) -> None:
+        """Drop the claims of a labelled receipt that is being relabelled.
+
+        Its own transactions are then candidates for it again, instead of
+        it being matched to another transaction of the same amount. The
+        receipt is not counted again by a later ``sync``.
+        """
+        self._counted.add(id(receipt))
+        for key in _get_claim_keys(receipt):
+            if self.claims[key] > 1:
+                self.claims[key] -= 1
+            else:
+                self.claims.pop(key, None)
+
+    def sync(self, labelled_receipts: List[Receipt]) -> "ClaimedIndex":
+        """Index the receipts of *labelled_receipts* not indexed yet.
+
+        Receipts appended to the same list since the last call are added
+        incrementally; another list rebuilds the index.
+        """
+        if (
+            labelled_receipts is not self._source
+            or len(labelled_receipts) < self._indexed_count
+        ):
+            self.claims = Counter()
+            self._counted = set()
+            self._source = labelled_receipts
+            self._indexed_count = 0
+        start = self._indexed_count
+        for receipt in labelled_receipts[start:]:
+            self.add_receipt(receipt)
+        self._indexed_count = len(labelled_receipts)
+        return self
+
+    def get_claim_count(self, txn: Transaction) -> int:
+        return self.claims[get_claim_key(txn)]
+
+    def is_claimed(self, txn: Transaction) -> bool:
+        """Check if a labelled receipt claims a transaction like *txn*."""
+        return get_claim_key(txn) in self.claims
+
+    def get_unclaimed(
+        self, transactions: List[Transaction]
+    ) -> List[Transaction]:
+        """Drop as many transactions per claim key as there are claims,
+        the first ones in the order of *transactions*."""
+        skipped: Counter = Counter()
+        unclaimed: List[Transaction] = []
+        for txn in transactions:
+            key = get_claim_key(txn)
+            if skipped[key] < self.claims[key]:
+                skipped[key] += 1
+            else:
+                unclaimed.append(txn)
+        return unclaimed
+
+    def prefer_unclaimed(
+        self, transactions: List[Transaction]
+    ) -> List[Transaction]:
+        """Drop the claimed transactions, unless that would drop all.
+
+        Keeping them when all are claimed still lets a receipt that was
+        labelled before be matched again, e.g. when it is relabelled.
+        """
+        return self.get_unclaimed(transactions) or transactions
+
+    def __len__(self) -> int:
+        return sum(self.claims.values())
+
+
+# Session-wide index shared by all reconfiguration passes.
+CLAIMED_INDEX = ClaimedIndex()
+
+
+def get_claimed_index(labelled_receipts: List[Receipt]) -> ClaimedIndex:
+    """Return the session's claimed index, synced with the receipts."""
+    return CLAIMED_INDEX.sync(labelled_receipts)
@@ -0,0 +1,140 @@
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from hledger_core.TransactionObjects.Receipt import Receipt
+
+CurrencyPair = Tuple[str, str]
+
+
+def get_currency_code(currency) -> Optional[str]:
+    """Currency enum or code as a plain code string."""
+    if currency is None:
+        return None
+    return str(getattr(currency, "value", currency))
+
+
+def get_withdrawn_currency(receipt: Receipt) -> Optional[str]:
+    """Currency of the cash account a withdrawal receipt paid into."""
+    items = receipt.net_bought_items
+    if items is None:
+        return None
+    if not isinstance(items, list):
+        items = [items]
+    for item in items:
+        for txn in getattr(item, "account_transactions", None) or []:
+            if txn.account is not None:
+                return get_currency_code(txn.account.base_currency)
+    return None
+
+
+class ExchangeRateIndex:
+    """Exchange rates of the labelled withdrawals, per currency pair.
+
+    Each pair keeps its (date, rate) entries sorted by date, such that
+    the rate nearest to a date is a binary search. Rates are stored as
+    1 source = X withdrawn currency, the opposite direction is 1 / X.
+    Synced with ``labelled_receipts`` like the ``ClaimedIndex``.
+    """
+
+    def __init__(self):
+        self.rates: Dict[CurrencyPair, List[Tuple[datetime, float]]] = {}
+        self._source: Optional[List[Receipt]] = None
+        self._indexed_count: int = 0
+
+    def add_receipt(self, receipt: Receipt) -> None:
+        """Index the exchange rate of a (just finished) withdrawal."""
+        metadata = getattr(receipt, "withdrawal_metadata", None)
+        if (
+            metadata is None
+            or not metadata.exchange_rate
+            or metadata.source_account_transaction is None
+        ):
+            return
+        source = get_currency_code(
+            metadata.source_account_transaction.account.base_currency
+        )
+        withdrawn = get_withdrawn_currency(receipt)
+        if source is None or withdrawn is None or source == withdrawn:
+            return
+        entries = self.rates.setdefault((source, withdrawn), [])
+        entry = (
+            receipt.the_date or datetime.min,
+            float(metadata.exchange_rate),
+        )
+        pos = bisect_left(entries, entry)
+        if pos < len(entries) and entries[pos] == entry:
+            # Added when finished, and again when synced.
+            return
+        entries.insert(pos, entry)
+
+    def sync(self, labelled_receipts: List[Receipt]) -> "ExchangeRateIndex":
+        """Index the receipts of *labelled_receipts* not indexed yet."""
+        if (
+            labelled_receipts is not self._source
+            or len(labelled_receipts) < self._indexed_count
+        ):
+            self.rates = {}
+            self._source = labelled_receipts
+            self._indexed_count = 0
+        start = self._indexed_count
+        for receipt in labelled_receipts[start:]:
+            self.add_receipt(receipt)
+        self._indexed_count = len(labelled_receipts)
+        return self
+
+    @staticmethod
+    def _nearest(
+        entries: List[Tuple[datetime, float]], the_date: Optional[datetime]
+    ) -> Optional[Tuple[datetime, float]]:
+        """Entry closest to *the_date*, or the latest one without date."""
+        if not entries:
+            return None
+        if the_date is None:
+            return entries[-1]
+        pos = bisect_left(entries, (the_date,))
+        nearby = [entries[i] for i in (pos - 1, pos) if 0 <= i < len(entries)]
+        return min(nearby, key=lambda entry: abs(entry[0] - the_date))
+
+    def get_rate(
+        self,
+        *,
+        from_currency: Optional[str],
+        to_currency: Optional[str],
+        the_date: Optional[datetime] = None,
+    ) -> Optional[float]:
+        """Return 1 *from_currency* in *to_currency* at the labelled
+        withdrawal nearest to *the_date* (the latest if None), or None if
+        there is none between the two currencies."""
+        if from_currency is None or to_currency is None:
+            return None
+        if from_currency == to_currency:
+            return 1.0
+        forward = self._nearest(
+            self.rates.get((from_currency, to_currency), []), the_date
+        )
+        backward = self._nearest(
+            self.rates.get((to_currency, from_currency), []), the_date
+        )
+        candidates = []
+        if forward is not None:
+            candidates.append((forward[0], forward[1]))
+        if backward is not None:
+            candidates.append((backward[0], 1 / backward[1]))
+        if not candidates:
+            return None
+        if the_date is None:
+            return max(candidates)[1]
+        return min(candidates, key=lambda entry: abs(entry[0] - the_date))[1]
+
+
+# Session-wide index shared by all reconfiguration passes.
+EXCHANGE_RATE_INDEX = ExchangeRateIndex()
+
+
+def get_exchange_rate_index(
+    labelled_receipts: List[Receipt],
+) -> ExchangeRateIndex:
+    """Return the session's exchange rate index, synced with the
+    receipts."""
+    return EXCHANGE_RATE_INDEX.sync(labelled_receipts)
@@ -0,0 +1,140 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    CandidateSearchResult,
+    get_net_amount,
+    is_amount_within_margin,
+)
+from tui_labeller.tuis.urwid.matching.TransactionIndex import (
+    TransactionIndex,
+)
+
+
+class IncrementalSearch:
+    """Candidate search for one receipt that grows with its margins.
+
+    Widening the date margin only reads the date slices added on both
+    sides of the previous window; widening the amount margin only takes
+    the newly covered amount band from the window's non-matching
+    transactions, which are kept sorted by amount. Narrowing a margin
+    falls back to a full search.
+    """
+
+    def __init__(
+        self,
+        *,
+        index: TransactionIndex,
+        account_config: AccountConfig,
+        receipt_date: datetime,
+        net_amount: Optional[float],
+    ):
+        self.index: TransactionIndex = index
+        self.account_config: AccountConfig = account_config
+        self.receipt_date: datetime = receipt_date
+        self.net_amount: Optional[float] = net_amount
+        self.day_margin: Optional[int] = None
+        self.amount_margin: Optional[float] = None
+        # Number of transactions whose amount the last search checked.
+        self.scanned: int = 0
+
+        self._in_window: List[Transaction] = []
+        self._matching: List[Transaction] = []
+        # Non-matching transactions of the window, sorted by net amount.
+        self._rest: List[Tuple[float, int, Transaction]] = []
+
+    def search(
+        self, *, day_margin: int, amount_margin: float
+    ) -> CandidateSearchResult:
+        """Return the candidates for the given margins."""
+        if (
+            self.day_margin is None
+            or day_margin < self.day_margin
+            or amount_margin < self.amount_margin
+        ):
+            self._full_search(day_margin=day_margin)
+        else:
+            self.scanned = 0
+            if day_margin > self.day_margin:
+                self._widen_date(day_margin=day_margin)
+        if amount_margin > (self.amount_margin or 0.0):
+            self._widen_amount(amount_margin=amount_margin)
+        self.day_margin = day_margin
+        self.amount_margin = amount_margin
+        return CandidateSearchResult(
+            in_window=list(self._in_window), matching=list(self._matching)
+        )
+
+    def _full_search(self, *, day_margin: int) -> None:
+        self._in_window = self.index.in_date_range(
+            account_config=self.account_config,
+            start=self.receipt_date - timedelta(days=day_margin),
+            end=self.receipt_date + timedelta(days=day_margin),
+        )
+        self._matching = []
+        self._rest = []
+        self.amount_margin = 0.0
+        self.scanned = 0
+        self._classify(self._in_window)
+
+    def _widen_date(self, *, day_margin: int) -> None:
+        old = timedelta(days=self.day_margin)
+        new = timedelta(days=day_margin)
+        before = self.index.in_date_range(
+            account_config=self.account_config,
+            start=self.receipt_date - new,
+            end=self.receipt_date - old,
+            include_end=False,
+        )
+        after = self.index.in_date_range(
+            account_config=self.account_config,
+            start=self.receipt_date + old,
+            end=self.receipt_date + new,
+            include_start=False,
+        )
+        self._in_window = before + self._in_window + after
+        self._classify(before + after)
+
+    def _widen_amount(self, *, amount_margin: float) -> None:
+        """Move the transactions of the added amount band to matching."""
+        self.amount_margin = amount_margin
+        if self.net_amount is None:
+            return
+        # Slightly wider than the margin; the exact check is done below.
+        tolerance = amount_margin * max(self.net_amount, 0.01) + 1e-9
+        lo = bisect_left(self._rest, (self.net_amount - tolerance,))
+        hi = bisect_right(
+            self._rest, (self.net_amount + tolerance, float("inf"))
+        )
+        band = self._rest[lo:hi]
+        self.scanned += len(band)
+        kept = []
+        for entry in band:
+            if is_amount_within_margin(
+                txn_net=entry[0],
+                net_amount=self.net_amount,
+                amount_margin=amount_margin,
+            ):
+                self._matching.append(entry[2])
+            else:
+                kept.append(entry)
+        self._rest[lo:hi] = kept
+
+    def _classify(self, transactions: List[Transaction]) -> None:
+        """Sort new window transactions into matching and the rest."""
+        self.scanned += len(transactions)
+        for txn in transactions:
+            txn_net = get_net_amount(txn)
+            if self.net_amount is not None and is_amount_within_margin(
+                txn_net=txn_net,
+                net_amount=self.net_amount,
+                amount_margin=self.amount_margin,
+            ):
+                self._matching.append(txn)
+            else:
+                # id() breaks ties, transactions are not comparable.
+                insort(self._rest, (txn_net, id(txn), txn))
@@ -0,0 +1,148 @@
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Hashable, List, Optional
+
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    get_net_amount,
+    is_amount_within_margin,
+)
+
+# Time one keystroke may spend filtering the shortlist, in seconds.
+KEYSTROKE_BUDGET = 0.005
+# Transactions filtered between two budget checks.
+_BUDGET_CHECK_INTERVAL = 64
+
+
+@dataclass
+class LiveMatchStatus:
+    """Match state of the amount typed so far."""
+
+    # Shortlisted transactions the typed amount can still turn into.
+    candidate_count: int = 0
+    # Shortlisted transactions within the margin of the typed amount.
+    matching: List[Transaction] = field(default_factory=list)
+    # Shortlisted transaction closest to the typed amount.
+    best: Optional[Transaction] = None
+    # False if the keystroke budget ran out before all were filtered.
+    complete: bool = True
+
+
+class LiveMatcher:
+    """Shortlist of one account's date window, filtered per keystroke.
+
+    The shortlist is sorted by amount once, after which the transactions
+    within the margin of a typed amount are a binary search. While the
+    amount is typed left to right, the transactions whose amount starts
+    with the typed text are narrowed from the previous keystroke's set.
+    """
+
+    def __init__(
+        self,
+        *,
+        key: Hashable,
+        receipt_date: datetime,
+        candidates: List[Transaction],
+        amount_margin: float,
+        budget: float = KEYSTROKE_BUDGET,
+    ):
+        # Identifies the account and date the shortlist was built for.
+        self.key: Hashable = key
+        self.receipt_date: datetime = receipt_date
+        self.amount_margin: float = amount_margin
+        self.budget: float = budget
+
+        entries = sorted(
+            (get_net_amount(txn), txn.the_date, i, txn)
+            for i, txn in enumerate(candidates)
+        )
+        self._amounts: List[float] = [e[0] for e in entries]
+        self._labels: List[str] = [f"{e[0]:.2f}" for e in entries]
+        self._transactions: List[Transaction] = [e[3] for e in entries]
+        self._prefix: str = ""
+        self._prefix_indices: List[int] = list(range(len(entries)))
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def _narrow(self, prefix: str) -> bool:
+        """Keep the shortlist entries whose amount starts with *prefix*.
+
+        Returns False if the budget ran out; the entries not looked at
+        are then kept, such that the set stays a superset.
+        """
+        if prefix.startswith(self._prefix):
+            indices = self._prefix_indices
+        else:
+            indices = range(len(self._labels))
+        deadline = time.perf_counter() + self.budget
+        kept: List[int] = []
+        complete = True
+        for nr, i in enumerate(indices):
+            if (
+                nr % _BUDGET_CHECK_INTERVAL == 0
+                and nr
+                and time.perf_counter() > deadline
+            ):
+                kept.extend(indices[nr:])
+                complete = False
+                break
+            if self._labels[i].startswith(prefix):
+                kept.append(i)
+        self._prefix = prefix
+        self._prefix_indices = kept
+        return complete
+
+    def _closest(self, net_amount: float) -> Optional[Transaction]:
+        if not self._amounts:
+            return None
+        pos = bisect_left(self._amounts, net_amount)
+        nearby = [i for i in (pos - 1, pos) if 0 <= i < len(self._amounts)]
+        best = min(nearby, key=lambda i: abs(self._amounts[i] - net_amount))
+        return self._transactions[best]
+
+    def update(
+        self, *, amount_text: str, change_returned: float = 0.0
+    ) -> LiveMatchStatus:
+        """Match the amount typed so far minus the change returned."""
+        amount_text = amount_text.strip()
+        try:
+            net_amount: Optional[float] = float(amount_text) - change_returned
+        except ValueError:
+            net_amount = None
+
+        complete = True
+        if change_returned:
+            # The typed text is no prefix of the net amount, only the
+            # matching transactions count.
+            candidate_count = 0
+        else:
+            complete = self._narrow(amount_text)
+            candidate_count = len(self._prefix_indices)
+        if net_amount is None:
+            return LiveMatchStatus(
+                candidate_count=candidate_count, complete=complete
+            )
+
+        # Slightly wider than the margin; the exact check is done below.
+        tolerance = self.amount_margin * max(net_amount, 0.01) + 1e-9
+        lo = bisect_left(self._amounts, net_amount - tolerance)
+        hi = bisect_right(self._amounts, net_amount + tolerance)
+        matching = [
+            self._transactions[i]
+            for i in range(lo, hi)
+            if is_amount_within_margin(
+                txn_net=self._amounts[i],
+                net_amount=net_amount,
+                amount_margin=self.amount_margin,
+            )
+        ]
+        return LiveMatchStatus(
+            candidate_count=max(candidate_count, len(matching)),
+            matching=matching,
+            best=self._closest(net_amount),
+            complete=complete,
+        )
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+MATCHING_ALGO_FIELDS = (
+    "days",
+    "amount_range",
+    "days_month_swap",
+    "multiple_receipts_per_transaction",
+)
+
+
+def _data_fingerprint(csv_transactions_per_account: Any) -> Hashable:
+    """Cheap fingerprint of the CSV data that detects added/removed rows.
+
+    Stores that track their own changes expose a ``data_version``;
+    plain dicts are summarised by their per-year list lengths.
+    """
+    data_version = getattr(csv_transactions_per_account, "data_version", None)
+    if data_version is not None:
+        return data_version
+    return tuple(
+        tuple((year, len(txns)) for year, txns in txns_per_year.items())
+        for txns_per_year in csv_transactions_per_account.values()
+    )
+
+
+def _matching_algo_fingerprint(matching_algo: Any) -> Hashable:
+    """Summarise the matching_algo settings that influence a search."""
+    if matching_algo is None:
+        return None
+    return tuple(
+        getattr(matching_algo, field_name, None)
+        for field_name in MATCHING_ALGO_FIELDS
+    )
+
+
+class MatchMemo:
+    """Bounded LRU memo for CSV candidate searches.
+
+    Entries are only valid for one CSV dataset and one ``matching_algo``
+    configuration, so ``sync`` drops them whenever either changes. The
+    memo keeps a reference to the CSV mapping it was synced with, such
+    that a new mapping can never be mistaken for the old one.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._source: Optional[Any] = None
+        self._fingerprint: Optional[Tuple[Hashable, Hashable]] = None
+
+    def sync(
+        self,
+        *,
+        csv_transactions_per_account: Any,
+        matching_algo: Any,
+    ) -> None:
+        """Invalidate the memo if the CSV data or matching config changed."""
+        fingerprint = (
+            _data_fingerprint(csv_transactions_per_account),
+            _matching_algo_fingerprint(matching_algo),
+        )
+        if (
+            csv_transactions_per_account is not self._source
+            or fingerprint != self._fingerprint
+        ):
+            self.invalidate()
+            self._source = csv_transactions_per_account
+            self._fingerprint = fingerprint
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the memoized value for *key*, computing it on a miss."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute()
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop all memoized entries (the hit/miss counters are kept)."""
+        self._entries.clear()
+        self._source = None
+        self._fingerprint = None
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and the current number of entries."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
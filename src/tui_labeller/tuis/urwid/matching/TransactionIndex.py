@@ -0,0 +1,113 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Mapping, Optional, Tuple
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    CandidateSearchResult,
+    get_net_amount,
+    is_amount_within_margin,
+)
+
+# Sorted year partitions kept by the index, across all accounts.
+MAX_INDEXED_YEARS = 8
+
+
+class TransactionIndex:
+    """Date-sorted view on ``csv_transactions_per_account``.
+
+    Each (account, year) partition is sorted once, on first use, after
+    which a date window is two binary searches. Only a bounded number of
+    partitions is kept, such that lazily loaded stores stay small.
+    """
+
+    def __init__(
+        self,
+        csv_transactions_per_account: Mapping[
+            AccountConfig, Mapping[int, List[Transaction]]
+        ],
+        max_years: int = MAX_INDEXED_YEARS,
+    ):
+        self.csv_transactions_per_account = csv_transactions_per_account
+        self.max_years: int = max_years
+        self._partitions: OrderedDict = OrderedDict()
+
+    def _get_partition(
+        self, account_config: AccountConfig, year: int
+    ) -> Tuple[List[datetime], List[Transaction]]:
+        key = (account_config, year)
+        if key in self._partitions:
+            self._partitions.move_to_end(key)
+            return self._partitions[key]
+
+        transactions = sorted(
+            self.csv_transactions_per_account.get(account_config, {}).get(
+                year, []
+            ),
+            key=lambda t: t.the_date,
+        )
+        partition = ([t.the_date for t in transactions], transactions)
+        self._partitions[key] = partition
+        if len(self._partitions) > self.max_years:
+            self._partitions.popitem(last=False)
+        return partition
+
+    def in_date_range(
+        self,
+        *,
+        account_config: AccountConfig,
+        start: datetime,
+        end: datetime,
+        include_start: bool = True,
+        include_end: bool = True,
+    ) -> List[Transaction]:
+        """Transactions of one account dated within [start, end], in date
+        order.
+
+        Either bound can be excluded, such that the slices added by a
+        widened window do not overlap the previous window.
+        """
+        found: List[Transaction] = []
+        for year in range(start.year, end.year + 1):
+            dates, transactions = self._get_partition(account_config, year)
+            if include_start:
+                lo = bisect_left(dates, start)
+            else:
+                lo = bisect_right(dates, start)
+            if include_end:
+                hi = bisect_right(dates, end)
+            else:
+                hi = bisect_left(dates, end)
+            found.extend(transactions[lo:hi])
+        return found
+
+    def search(
+        self,
+        *,
+        account_config: AccountConfig,
+        receipt_date: datetime,
+        net_amount: Optional[float],
+        day_margin: int,
+        amount_margin: float,
+    ) -> CandidateSearchResult:
+        """Same result as ``search_candidates``, from the sorted index."""
+        in_window = self.in_date_range(
+            account_config=account_config,
+            start=receipt_date - timedelta(days=day_margin),
+            end=receipt_date + timedelta(days=day_margin),
+        )
+        if net_amount is None:
+            return CandidateSearchResult(in_window=in_window, matching=[])
+        matching = [
+            txn
+            for txn in in_window
+            if is_amount_within_margin(
+                txn_net=get_net_amount(txn),
+                net_amount=net_amount,
+                amount_margin=amount_margin,
+            )
+        ]
+        return CandidateSearchResult(in_window=in_window, matching=matching)
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    find_candidates,
+    get_net_amount,
+)
+from tui_labeller.tuis.urwid.matching.ClaimedIndex import ClaimedIndex
+
+
+@dataclass
+class AccountMatch:
+    """A CSV-backed account with transactions matching a receipt."""
+
+    account_str: str
+    matching: List[Transaction]
+    # Matching transaction closest to the receipt's amount and date.
+    best: Transaction
+
+
+def find_matching_accounts(
+    *,
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, List[Transaction]]
+    ],
+    config,
+    receipt_date: datetime,
+    net_amount: float,
+    claimed_index: Optional[ClaimedIndex] = None,
+) -> List[AccountMatch]:
+    """Find the CSV-backed accounts with a transaction within the
+    matching margins of the receipt date and amount.
+
+    Accounts with a unique match come first, then the accounts whose
+    best transaction is closest in amount and date.
+    """
+    matches: List[AccountMatch] = []
+    for account_config in csv_transactions_per_account:
+        if not account_config.has_input_csv():
+            continue
+        matching = find_candidates(
+            csv_transactions_per_account=csv_transactions_per_account,
+            account_config=account_config,
+            config=config,
+            receipt_date=receipt_date,
+            net_amount=net_amount,
+        ).matching
+        if claimed_index is not None:
+            matching = claimed_index.prefer_unclaimed(matching)
+        if not matching:
+            continue
+        best = min(
+            matching,
+            key=lambda txn: (
+                abs(get_net_amount(txn) - net_amount),
+                abs(txn.the_date - receipt_date),
+            ),
+        )
+        matches.append(
+            AccountMatch(
+                account_str=account_config.account.to_string(),
+                matching=matching,
+                best=best,
+            )
+        )
+    matches.sort(
+        key=lambda match: (
+            len(match.matching) != 1,
+            abs(get_net_amount(match.best) - net_amount),
+            abs(match.best.the_date - receipt_date),
+            match.account_str,
+        )
+    )
+    return matches
+
+
+def order_account_choices(
+    *, choices: List[str], matches: List[AccountMatch]
+) -> List[str]:
+    """Move the matching accounts to the top, in match order, and keep the
+    order of the other choices."""
+    matched = [m.account_str for m in matches if m.account_str in choices]
+    return matched + [choice for choice in choices if choice not in matched]
+
+
+def get_account_annotations(
+    matches: List[AccountMatch],
+) -> Dict[str, str]:
+    """Short match note per account, shown next to its choice."""
+    annotations: Dict[str, str] = {}
+    for match in matches:
+        if len(match.matching) == 1:
+            annotations[match.account_str] = (
+                f"[match {match.best.the_date:%Y-%m-%d}"
+                f" {get_net_amount(match.best):.2f}]"
+            )
+        else:
+            annotations[match.account_str] = f"[{len(match.matching)} matches]"
+    return annotations
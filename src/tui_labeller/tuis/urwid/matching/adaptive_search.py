@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.candidate_search import get_net_amount
+
+# Days the window grows per step after the receipt date. Banks post
+# after the purchase, so the window grows slower into the past.
+DAYS_AFTER_STEP = 1
+DAYS_BEFORE_RATIO = 0.5
+# Amount tolerances tried per date step, as fractions of the maximum.
+AMOUNT_STEPS = (0.0, 0.25, 0.5, 1.0)
+
+
+@dataclass
+class AdaptiveMatch:
+    """First unique candidate of a progressive search, and the margins
+    that were needed to find it."""
+
+    transaction: Transaction
+    days_before: int
+    days_after: int
+    amount_margin: float
+    steps: int
+
+
+def is_adaptive_matching(config) -> bool:
+    """Check if ``matching_algo.adaptive`` is switched on."""
+    matching_algo = getattr(config, "matching_algo", None)
+    return bool(getattr(matching_algo, "adaptive", False))
+
+
+def adaptive_search(
+    *,
+    candidates: List[Transaction],
+    receipt_date: datetime,
+    net_amount: float,
+    max_days: int,
+    max_amount_margin: float,
+    days_before_ratio: float = DAYS_BEFORE_RATIO,
+) -> Optional[AdaptiveMatch]:
+    """Widen the date window and amount tolerance step by step until
+    exactly one candidate is left inside.
+
+    *candidates* are the transactions within *max_days* of the receipt,
+    so the search never looks beyond the configured maxima. The window
+    reaches *max_days* after the receipt date, and *days_before_ratio*
+    of that before it. Returns None if no step is unique.
+    """
+    # (calendar day offset, relative amount error) per candidate,
+    # computed once.
+    scale = max(net_amount, 0.01)
+    measured = [
+        (
+            (txn.the_date.date() - receipt_date.date()).days,
+            abs(get_net_amount(txn) - net_amount) / scale,
+            txn,
+        )
+        for txn in candidates
+    ]
+
+    steps = 0
+    for days_after in range(0, max_days + 1, DAYS_AFTER_STEP):
+        days_before = min(int(days_after * days_before_ratio), max_days)
+        in_window = [m for m in measured if -days_before <= m[0] <= days_after]
+        for fraction in AMOUNT_STEPS:
+            steps += 1
+            amount_margin = max_amount_margin * fraction
+            # Slack for the float rounding of the amounts.
+            inside = [m for m in in_window if m[1] <= amount_margin + 1e-9]
+            if len(inside) == 1:
+                return AdaptiveMatch(
+                    transaction=inside[0][2],
+                    days_before=days_before,
+                    days_after=days_after,
+                    amount_margin=amount_margin,
+                    steps=steps,
+                )
+            if len(inside) > 1:
+                # A wider tolerance only adds candidates.
+                break
+    return None
@@ -0,0 +1,191 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Set, Tuple
+
+# (left node, right node, cost) of one candidate pair.
+Edge = Tuple[int, int, float]
+
+# Costs closer than this count as equal.
+COST_EPSILON = 1e-9
+
+
+@dataclass
+class AssignmentSolution:
+    """Minimum cost assignment among the maximum cardinality ones."""
+
+    # Right node per assigned left node.
+    pairs: Dict[int, int] = field(default_factory=dict)
+    cost: float = 0.0
+    # Assigned left nodes that another assignment of equal size and cost
+    # gives another (or no) right node.
+    interchangeable: Set[int] = field(default_factory=set)
+
+
+def _get_strong_components(adjacency: List[List[int]]) -> List[int]:
+    """Strongly connected component number per node (iterative Tarjan)."""
+    index = [-1] * len(adjacency)
+    low = [0] * len(adjacency)
+    on_stack = [False] * len(adjacency)
+    component = [-1] * len(adjacency)
+    stack: List[int] = []
+    counter = 0
+    nr = 0
+    for start in range(len(adjacency)):
+        if index[start] != -1:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack[start] = True
+        work = [(start, 0)]
+        while work:
+            node, i = work[-1]
+            if i < len(adjacency[node]):
+                work[-1] = (node, i + 1)
+                to = adjacency[node][i]
+                if index[to] == -1:
+                    index[to] = low[to] = counter
+                    counter += 1
+                    stack.append(to)
+                    on_stack[to] = True
+                    work.append((to, 0))
+                elif on_stack[to]:
+                    low[node] = min(low[node], index[to])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = nr
+                    if member == node:
+                        break
+                nr += 1
+    return component
+
+
+def solve_min_cost_assignment(edges: Sequence[Edge]) -> AssignmentSolution:
+    """Assign each left node at most one right node and vice versa.
+
+    As many nodes as possible are assigned, at the lowest total cost.
+    Successive shortest augmenting paths over the sparse candidate
+    edges, with Dijkstra on reduced costs, so one augmentation costs
+    O(E log V) instead of the O(V^2) of a dense cost matrix. Costs must
+    not be negative.
+
+    The final residual graph also tells which assigned left nodes are
+    interchangeable: another optimum exists that moves a left node iff
+    its assigned edge lies on a cycle of zero reduced cost edges, so one
+    strongly connected components pass over those edges finds them all.
+    """
+    lefts = sorted({u for u, _, _ in edges})
+    rights = sorted({v for _, v, _ in edges})
+    left_nr = {u: i for i, u in enumerate(lefts)}
+    right_nr = {v: i for i, v in enumerate(rights)}
+    # Nodes: source, lefts, rights, sink.
+    source = 0
+    sink = 1 + len(lefts) + len(rights)
+    # Per node: [target, capacity, cost, index of the reverse edge].
+    graph: List[List[List]] = [[] for _ in range(sink + 1)]
+
+    def add_edge(frm: int, to: int, cost: float) -> None:
+        graph[frm].append([to, 1, cost, len(graph[to])])
+        graph[to].append([frm, 0, -cost, len(graph[frm]) - 1])
+
+    for u in lefts:
+        add_edge(source, 1 + left_nr[u], 0.0)
+    for v in rights:
+        add_edge(1 + len(lefts) + right_nr[v], sink, 0.0)
+    for u, v, cost in edges:
+        add_edge(1 + left_nr[u], 1 + len(lefts) + right_nr[v], cost)
+
+    potential = [0.0] * (sink + 1)
+    total_cost = 0.0
+    while True:
+        dist = [float("inf")] * (sink + 1)
+        previous: List[Tuple[int, int]] = [(-1, -1)] * (sink + 1)
+        dist[source] = 0.0
+        queue = [(0.0, source)]
+        while queue:
+            d, node = heapq.heappop(queue)
+            if d > dist[node]:
+                continue
+            for i, (to, capacity, cost, _) in enumerate(graph[node]):
+                if capacity <= 0:
+                    continue
+                # Reduced costs are non-negative; clamp float noise.
+                nd = d + max(cost + potential[node] - potential[to], 0.0)
+                if nd < dist[to]:
+                    dist[to] = nd
+                    previous[to] = (node, i)
+                    heapq.heappush(queue, (nd, to))
+        if dist[sink] == float("inf"):
+            break
+        for node in range(sink + 1):
+            if dist[node] < float("inf"):
+                potential[node] += dist[node]
+        node = sink
+        while node != source:
+            frm, i = previous[node]
+            edge = graph[frm][i]
+            edge[1] -= 1
+            graph[node][edge[3]][1] += 1
+            total_cost += edge[2]
+            node = frm
+
+    # Optimality leaves no residual edge with a negative reduced cost, so
+    # the zero cost cycles consist of zero reduced cost edges only.
+    tight = [
+        [
+            to
+            for to, capacity, cost, _ in graph[node]
+            if capacity > 0
+            and cost + potential[node] - potential[to] <= COST_EPSILON
+        ]
+        for node in range(sink + 1)
+    ]
+    component = _get_strong_components(tight)
+
+    solution = AssignmentSolution(cost=total_cost)
+    for u in lefts:
+        node = 1 + left_nr[u]
+        for to, capacity, _, _ in graph[node]:
+            if capacity == 0 and to > len(lefts) and to != sink:
+                solution.pairs[u] = rights[to - 1 - len(lefts)]
+                # The residual edge back to u closes a zero cost cycle.
+                if node in tight[to] and component[to] == component[node]:
+                    solution.interchangeable.add(u)
+    return solution
+
+
+def get_components(edges: Sequence[Edge]) -> List[List[Edge]]:
+    """Split the candidate graph into its connected components.
+
+    Components share no node, so each is solved on its own.
+    """
+    parent: Dict[Tuple[str, int], Tuple[str, int]] = {}
+
+    def find(node: Tuple[str, int]) -> Tuple[str, int]:
+        root = node
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for u, v, _ in edges:
+        parent[find(("left", u))] = find(("right", v))
+
+    components: Dict[Tuple[str, int], List[Edge]] = {}
+    for edge in edges:
+        components.setdefault(find(("left", edge[0])), []).append(edge)
+    return list(components.values())
+
+
+def has_alternative_optimum(*, solution: AssignmentSolution, left: int) -> bool:
+    """Check if another assignment of equal size and cost exists that
+    does not give *left* the same right node."""
+    return left in solution.interchangeable
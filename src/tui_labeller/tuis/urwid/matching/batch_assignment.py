@@ -0,0 +1,198 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.generics.Transaction import Transaction
+from hledger_core.TransactionObjects.Receipt import Receipt
+
+from tui_labeller.tuis.urwid.matching.assignment_solver import (
+    Edge,
+    get_components,
+    has_alternative_optimum,
+    solve_min_cost_assignment,
+)
+from tui_labeller.tuis.urwid.matching.candidate_ranking import (
+    get_claim_key,
+    get_receipt_transactions,
+    score_candidate,
+)
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    get_matching_margins,
+    get_net_amount,
+)
+from tui_labeller.tuis.urwid.matching.TransactionIndex import (
+    TransactionIndex,
+)
+
+
+@dataclass
+class ReceiptItem:
+    """One account transaction recorded on a labelled receipt."""
+
+    receipt: Receipt
+    transaction: Transaction
+
+
+@dataclass
+class Assignment:
+    """The CSV transaction assigned to a receipt item, if any."""
+
+    item: ReceiptItem
+    transaction: Optional[Transaction]
+    # CSV transactions within the matching margins of the item.
+    candidates: List[Transaction]
+
+
+@dataclass
+class BatchAssignmentResult:
+    """Outcome of assigning all labelled receipts at once."""
+
+    # Assigned, and no other assignment is as good.
+    resolved: List[Assignment] = field(default_factory=list)
+    # Assigned (or left out) where an equally good assignment differs.
+    ambiguous: List[Assignment] = field(default_factory=list)
+    # Receipt items without any candidate.
+    orphaned_items: List[ReceiptItem] = field(default_factory=list)
+    # CSV transactions in the receipts' date range left unassigned.
+    orphaned_transactions: List[Transaction] = field(default_factory=list)
+
+
+def _get_receipt_items(
+    *,
+    labelled_receipts: List[Receipt],
+    csv_accounts: Mapping[str, AccountConfig],
+) -> List[ReceiptItem]:
+    """Receipt items paid from a CSV-backed account, by account and date
+    such that the index reads each year partition once."""
+    items = [
+        ReceiptItem(receipt=receipt, transaction=txn)
+        for receipt in labelled_receipts
+        for txn in get_receipt_transactions(receipt)
+        if txn.account is not None
+        and txn.the_date is not None
+        and txn.account.to_string() in csv_accounts
+    ]
+    items.sort(
+        key=lambda item: (
+            item.transaction.account.to_string(),
+            item.transaction.the_date,
+        )
+    )
+    return items
+
+
+def assign_receipts(
+    *,
+    labelled_receipts: List[Receipt],
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, List[Transaction]]
+    ],
+    config,
+    index: Optional[TransactionIndex] = None,
+) -> BatchAssignmentResult:
+    """Assign the labelled receipts to CSV transactions all at once.
+
+    Every receipt item is linked to the CSV transactions of its account
+    within the configured matching margins, with the candidate score
+    (date distance plus amount error) as cost. The minimum cost
+    assignment of this sparse graph is solved per connected component,
+    which resolves receipts that each see the same few candidates. One
+    CSV transaction is assigned to at most one receipt item.
+    """
+    if index is None:
+        index = TransactionIndex(csv_transactions_per_account)
+    day_margin, amount_margin = get_matching_margins(config)
+    csv_accounts = {
+        ac.account.to_string(): ac
+        for ac in csv_transactions_per_account
+        if ac.has_input_csv()
+    }
+    items = _get_receipt_items(
+        labelled_receipts=labelled_receipts, csv_accounts=csv_accounts
+    )
+
+    # Candidate edges; CSV transactions are numbered on first sight.
+    transactions: List[Transaction] = []
+    transaction_nrs: Dict[int, int] = {}
+    candidates: List[List[Transaction]] = []
+    edges: List[Edge] = []
+    # Per account: the date range the receipts cover.
+    covered: Dict[str, Tuple[datetime, datetime]] = {}
+    for item_nr, item in enumerate(items):
+        account_str = item.transaction.account.to_string()
+        receipt_date = item.transaction.the_date
+        net_amount = get_net_amount(item.transaction)
+        search = index.search(
+            account_config=csv_accounts[account_str],
+            receipt_date=receipt_date,
+            net_amount=net_amount,
+            day_margin=day_margin,
+            amount_margin=amount_margin,
+        )
+        candidates.append(search.matching)
+        for txn in search.matching:
+            txn_nr = transaction_nrs.setdefault(id(txn), len(transactions))
+            if txn_nr == len(transactions):
+                transactions.append(txn)
+            cost = score_candidate(
+                txn=txn,
+                receipt_date=receipt_date,
+                net_amount=net_amount,
+                currency=None,
+                claimed=False,
+                day_margin=day_margin,
+                amount_margin=amount_margin,
+            ).score
+            edges.append((item_nr, txn_nr, cost))
+        start, end = covered.get(account_str, (receipt_date, receipt_date))
+        covered[account_str] = (
+            min(start, receipt_date),
+            max(end, receipt_date),
+        )
+
+    result = BatchAssignmentResult()
+    assigned: Dict[int, int] = {}
+    for component in get_components(edges):
+        solution = solve_min_cost_assignment(component)
+        assigned.update(solution.pairs)
+        item_nrs = sorted({edge[0] for edge in component})
+        # One item with one candidate: nothing to choose between.
+        contested = len(component) > 1
+        for item_nr in item_nrs:
+            txn_nr = solution.pairs.get(item_nr)
+            assignment = Assignment(
+                item=items[item_nr],
+                transaction=None if txn_nr is None else transactions[txn_nr],
+                candidates=candidates[item_nr],
+            )
+            if txn_nr is not None and (
+                not contested
+                or not has_alternative_optimum(solution=solution, left=item_nr)
+            ):
+                result.resolved.append(assignment)
+            else:
+                result.ambiguous.append(assignment)
+
+    result.orphaned_items = [
+        item for item_nr, item in enumerate(items) if not candidates[item_nr]
+    ]
+    # Counted by claim key: lazily loaded years may be decoded again, and
+    # identical payments on one day are distinct transactions.
+    assigned_keys = Counter(
+        get_claim_key(transactions[txn_nr]) for txn_nr in assigned.values()
+    )
+    margin = timedelta(days=day_margin)
+    for account_str, (start, end) in sorted(covered.items()):
+        for txn in index.in_date_range(
+            account_config=csv_accounts[account_str],
+            start=start - margin,
+            end=end + margin,
+        ):
+            key = get_claim_key(txn)
+            if assigned_keys[key]:
+                assigned_keys[key] -= 1
+            else:
+                result.orphaned_transactions.append(txn)
+    return result
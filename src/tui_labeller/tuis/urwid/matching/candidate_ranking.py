@@ -0,0 +1,153 @@
+import heapq
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import AbstractSet, Iterable, List, Optional, Tuple
+
+from hledger_core.generics.Transaction import Transaction
+from hledger_core.TransactionObjects.Receipt import Receipt
+
+from tui_labeller.tuis.urwid.matching.candidate_search import get_net_amount
+
+# Number of ranked candidates shown in the sidebar.
+DEFAULT_TOP_K = 5
+
+# Score penalties (lower scores rank higher). The date and amount terms
+# are normalised by their configured margins, so one margin costs 1.0.
+CURRENCY_MISMATCH_PENALTY = 1.0
+CLAIMED_PENALTY = 2.0
+
+ClaimKey = Tuple[str, date, float]
+
+
+@dataclass
+class RankedCandidate:
+    """A CSV transaction with its match score against a receipt."""
+
+    score: float
+    transaction: Transaction
+    day_distance: float
+    amount_error: float
+    currency_match: bool
+    claimed: bool
+
+
+def get_claim_key(txn: Transaction) -> ClaimKey:
+    """Key identifying a transaction by account, day and net amount."""
+    return (
+        txn.account.to_string(),
+        txn.the_date.date(),
+        round(get_net_amount(txn), 2),
+    )
+
+
+def get_receipt_transactions(receipt: Receipt) -> Iterable[Transaction]:
+    """Yield the account transactions recorded on a labelled receipt."""
+    for attr in ("net_bought_items", "net_returned_items"):
+        items = getattr(receipt, attr, None)
+        if items is None:
+            continue
+        if not isinstance(items, list):
+            items = [items]
+        for item in items:
+            yield from getattr(item, "account_transactions", None) or []
+    metadata = getattr(receipt, "withdrawal_metadata", None)
+    if metadata is not None and metadata.source_account_transaction:
+        yield metadata.source_account_transaction
+
+
+def is_claimed(
+    *, txn: Transaction, claimed_keys: AbstractSet[ClaimKey]
+) -> bool:
+    """Check if a labelled receipt already claims *txn*."""
+    return get_claim_key(txn) in claimed_keys
+
+
+def score_candidate(
+    *,
+    txn: Transaction,
+    receipt_date: datetime,
+    net_amount: Optional[float],
+    currency: Optional[str],
+    claimed: bool,
+    day_margin: int,
+    amount_margin: float,
+) -> RankedCandidate:
+    """Score *txn* against the receipt; lower is better."""
+    day_distance = abs((txn.the_date - receipt_date).total_seconds()) / 86400
+    score = day_distance / (day_margin + 1)
+
+    amount_error = 0.0
+    if net_amount is not None:
+        amount_error = abs(get_net_amount(txn) - net_amount) / max(
+            net_amount, 0.01
+        )
+        score += amount_error / max(amount_margin, 0.01)
+
+    currency_match = (
+        currency is None or txn.account.base_currency.value == currency
+    )
+    if not currency_match:
+        score += CURRENCY_MISMATCH_PENALTY
+    if claimed:
+        score += CLAIMED_PENALTY
+
+    return RankedCandidate(
+        score=score,
+        transaction=txn,
+        day_distance=day_distance,
+        amount_error=amount_error,
+        currency_match=currency_match,
+        claimed=claimed,
+    )
+
+
+def rank_candidates(
+    *,
+    candidates: List[Transaction],
+    receipt_date: datetime,
+    net_amount: Optional[float],
+    currency: Optional[str],
+    claimed_keys: AbstractSet[ClaimKey],
+    day_margin: int,
+    amount_margin: float,
+    k: int = DEFAULT_TOP_K,
+) -> List[RankedCandidate]:
+    """Return the *k* best scoring candidates, best first.
+
+    Ties keep the CSV order.
+    """
+    scored = (
+        (
+            score_candidate(
+                txn=txn,
+                receipt_date=receipt_date,
+                net_amount=net_amount,
+                currency=currency,
+                claimed=is_claimed(txn=txn, claimed_keys=claimed_keys),
+                day_margin=day_margin,
+                amount_margin=amount_margin,
+            ),
+            i,
+        )
+        for i, txn in enumerate(candidates)
+    )
+    best = heapq.nsmallest(k, scored, key=lambda pair: (pair[0].score, pair[1]))
+    return [ranked for ranked, _ in best]
+
+
+def format_ranked_candidates(
+    *, ranked: List[RankedCandidate], indent: str
+) -> str:
+    """Render ranked candidates as numbered sidebar lines."""
+    lines = []
+    for i, candidate in enumerate(ranked, start=1):
+        txn = candidate.transaction
+        description = getattr(txn, "description", None) or ""
+        line = (
+            f"{indent}[{i}] {txn.the_date:%Y-%m-%d}"
+            f" {get_net_amount(txn):.2f} {description}".rstrip()
+        )
+        if candidate.claimed:
+            line += " (claimed)"
+        lines.append(line)
+    return "\n".join(lines)
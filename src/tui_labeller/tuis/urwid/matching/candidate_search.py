@@ -0,0 +1,171 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Mapping, Optional, Tuple
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.MatchMemo import MatchMemo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DAY_MARGIN = 7
+DEFAULT_AMOUNT_MARGIN = 0.05
+
+# Session-wide memo shared by all reconfiguration passes.
+MATCH_MEMO = MatchMemo(maxsize=256)
+
+
+@dataclass
+class CandidateSearchResult:
+    """CSV transactions near the receipt date, and those matching the
+    amount."""
+
+    in_window: List[Transaction] = field(default_factory=list)
+    matching: List[Transaction] = field(default_factory=list)
+
+
+def get_matching_margins(config) -> Tuple[int, float]:
+    """Return the (day margin, relative amount margin) from the config."""
+    if config is not None and hasattr(config, "matching_algo"):
+        return (
+            config.matching_algo.days,
+            config.matching_algo.amount_range,
+        )
+    return DEFAULT_DAY_MARGIN, DEFAULT_AMOUNT_MARGIN
+
+
+def get_net_amount(txn: Transaction) -> float:
+    """Absolute amount that left (or entered) the account."""
+    return abs(txn.tendered_amount_out - txn.change_returned)
+
+
+def is_amount_within_margin(
+    *, txn_net: float, net_amount: float, amount_margin: float
+) -> bool:
+    """Check if *txn_net* lies within the relative margin of
+    *net_amount*."""
+    return abs(txn_net - net_amount) <= amount_margin * max(net_amount, 0.01)
+
+
+def get_transactions_in_date_range(
+    transactions_per_year: Mapping[int, List[Transaction]],
+    target_date: datetime,
+    date_margin: timedelta,
+) -> List[Transaction]:
+    """Filter transactions to those within *date_margin* of *target_date*.
+
+    Only the year partitions the window touches are read, which includes
+    the adjacent year when the window crosses new year.
+    """
+    start = target_date - date_margin
+    end = target_date + date_margin
+    return [
+        t
+        for year in range(start.year, end.year + 1)
+        for t in transactions_per_year.get(year, [])
+        if start <= t.the_date <= end
+    ]
+
+
+def get_date_bounds(
+    transactions_per_year: Mapping[int, List[Transaction]],
+) -> Optional[Tuple[datetime, datetime]]:
+    """Return the earliest and latest transaction date of one account.
+
+    Lazy stores answer from their index via ``date_bounds`` instead of
+    loading every year.
+    """
+    date_bounds = getattr(transactions_per_year, "date_bounds", None)
+    if date_bounds is not None:
+        return date_bounds()
+    all_dates = [
+        t.the_date
+        for year_list in transactions_per_year.values()
+        for t in year_list
+    ]
+    if not all_dates:
+        return None
+    return min(all_dates), max(all_dates)
+
+
+def search_candidates(
+    *,
+    transactions_per_year: Mapping[int, List[Transaction]],
+    receipt_date: datetime,
+    net_amount: Optional[float],
+    day_margin: int,
+    amount_margin: float,
+) -> CandidateSearchResult:
+    """Search one account's transactions for receipt candidates.
+
+    Without a (positive) *net_amount* only the date window is applied.
+    """
+    in_window = get_transactions_in_date_range(
+        transactions_per_year=transactions_per_year,
+        target_date=receipt_date,
+        date_margin=timedelta(days=day_margin),
+    )
+    if net_amount is None or not in_window:
+        return CandidateSearchResult(in_window=in_window, matching=[])
+
+    matching = [
+        txn
+        for txn in in_window
+        if is_amount_within_margin(
+            txn_net=get_net_amount(txn),
+            net_amount=net_amount,
+            amount_margin=amount_margin,
+        )
+    ]
+    return CandidateSearchResult(in_window=in_window, matching=matching)
+
+
+def find_candidates(
+    *,
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, List[Transaction]]
+    ],
+    account_config: AccountConfig,
+    config,
+    receipt_date: datetime,
+    net_amount: Optional[float],
+) -> CandidateSearchResult:
+    """Memoized ``search_candidates`` for one account of the CSV data.
+
+    The memo is keyed on the normalized query: the account, the receipt
+    date, the net amount (rounded to cents, so a paid/change split with
+    the same net shares an entry) and both margins. It is invalidated
+    when the CSV data or ``config.matching_algo`` changes.
+    """
+    day_margin, amount_margin = get_matching_margins(config)
+    MATCH_MEMO.sync(
+        csv_transactions_per_account=csv_transactions_per_account,
+        matching_algo=getattr(config, "matching_algo", None),
+    )
+    key = (
+        account_config.account.to_string(),
+        receipt_date,
+        None if net_amount is None else round(net_amount, 2),
+        day_margin,
+        amount_margin,
+    )
+
+    def compute() -> Tuple[Tuple[Transaction, ...], Tuple[Transaction, ...]]:
+        result = search_candidates(
+            transactions_per_year=csv_transactions_per_account.get(
+                account_config, {}
+            ),
+            receipt_date=receipt_date,
+            net_amount=net_amount,
+            day_margin=day_margin,
+            amount_margin=amount_margin,
+        )
+        return tuple(result.in_window), tuple(result.matching)
+
+    in_window, matching = MATCH_MEMO.get_or_compute(key, compute)
+    logger.debug("Candidate search memo: %s", MATCH_MEMO.stats())
+    return CandidateSearchResult(
+        in_window=list(in_window), matching=list(matching)
+    )
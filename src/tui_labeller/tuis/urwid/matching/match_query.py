@@ -0,0 +1,66 @@
+from dataclasses import dataclass, replace
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.date_extractor import can_swap_day_and_month, swap_month_day
+
+# Default step sizes of the widening actions.
+DATE_WIDEN_STEP = 3
+AMOUNT_WIDEN_STEP = 0.05
+
+
+class MatchAction(Enum):
+    """Repair actions for a receipt without unique CSV match."""
+
+    WIDEN_DATE = "Widen date range"
+    WIDEN_AMOUNT = "Widen amount range"
+    SWAP_DAY_AND_MONTH = "Swap day and month"
+    ALTERNATE_CURRENCY = "Alternate currency"
+
+
+@dataclass(frozen=True)
+class MatchQuery:
+    """What the matching assistant searches for in one account's CSV."""
+
+    account_config: AccountConfig
+    receipt_date: datetime
+    net_amount: float
+    day_margin: int
+    amount_margin: float
+    # 1 receipt currency = conversion_ratio account currency.
+    conversion_ratio: float = 1.0
+    # Currency code of the receipt, if known.
+    currency: Optional[str] = None
+
+    @property
+    def search_amount(self) -> float:
+        """Net amount in the currency of the account."""
+        return self.net_amount * self.conversion_ratio
+
+
+def widen_date(query: MatchQuery, days: int = DATE_WIDEN_STEP) -> MatchQuery:
+    return replace(query, day_margin=query.day_margin + days)
+
+
+def widen_amount(
+    query: MatchQuery, margin: float = AMOUNT_WIDEN_STEP
+) -> MatchQuery:
+    return replace(query, amount_margin=round(query.amount_margin + margin, 6))
+
+
+def swap_day_and_month(query: MatchQuery) -> Optional[MatchQuery]:
+    """Swap the receipt's day and month, None if that is no valid date."""
+    if not can_swap_day_and_month(some_date=query.receipt_date):
+        return None
+    return replace(
+        query, receipt_date=swap_month_day(some_date=query.receipt_date)
+    )
+
+
+def alternate_currency(
+    query: MatchQuery, conversion_ratio: float
+) -> MatchQuery:
+    """Search the amount converted from the receipt's currency."""
+    return replace(query, conversion_ratio=conversion_ratio)
@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.match_query import (
+    AMOUNT_WIDEN_STEP,
+    DATE_WIDEN_STEP,
+    MatchAction,
+    MatchQuery,
+    alternate_currency,
+    swap_day_and_month,
+    widen_amount,
+    widen_date,
+)
+from tui_labeller.tuis.urwid.matching.TransactionIndex import (
+    TransactionIndex,
+)
+
+
+@dataclass
+class HypothesisResult:
+    """Outcome of applying one repair action to a match query."""
+
+    action: MatchAction
+    query: MatchQuery
+    candidate_count: int
+    # The matching transaction, if it is the only one.
+    transaction: Optional[Transaction] = None
+
+    @property
+    def is_unique(self) -> bool:
+        return self.candidate_count == 1
+
+
+def get_hypotheses(
+    query: MatchQuery,
+    *,
+    conversion_ratio: Optional[float] = None,
+    days: int = DATE_WIDEN_STEP,
+    amount_margin: float = AMOUNT_WIDEN_STEP,
+) -> List[Tuple[MatchAction, MatchQuery]]:
+    """The queries the repair actions would produce from *query*.
+
+    Swapping is skipped when the date has no valid swap, the alternate
+    currency when no (historical) conversion ratio is known.
+    """
+    hypotheses = [
+        (MatchAction.WIDEN_DATE, widen_date(query, days)),
+        (MatchAction.WIDEN_AMOUNT, widen_amount(query, amount_margin)),
+    ]
+    swapped = swap_day_and_month(query)
+    if swapped is not None:
+        hypotheses.append((MatchAction.SWAP_DAY_AND_MONTH, swapped))
+    if conversion_ratio is not None and conversion_ratio > 0:
+        hypotheses.append(
+            (
+                MatchAction.ALTERNATE_CURRENCY,
+                alternate_currency(query, conversion_ratio),
+            )
+        )
+    return hypotheses
+
+
+def _evaluate(
+    index: TransactionIndex, action: MatchAction, query: MatchQuery
+) -> HypothesisResult:
+    matching = index.search(
+        account_config=query.account_config,
+        receipt_date=query.receipt_date,
+        net_amount=query.search_amount,
+        day_margin=query.day_margin,
+        amount_margin=query.amount_margin,
+    ).matching
+    return HypothesisResult(
+        action=action,
+        query=query,
+        candidate_count=len(matching),
+        transaction=matching[0] if len(matching) == 1 else None,
+    )
+
+
+def evaluate_hypotheses(
+    *,
+    index: TransactionIndex,
+    hypotheses: List[Tuple[MatchAction, MatchQuery]],
+) -> List[HypothesisResult]:
+    """Search all hypotheses, results in hypothesis order.
+
+    Each search is a few binary searches on the sorted index, so the
+    hypotheses are evaluated in turn on the UI thread; a thread pool
+    would only add start-up overhead for this pure-Python work.
+    """
+    return [_evaluate(index, *hypothesis) for hypothesis in hypotheses]
@@ -0,0 +1,112 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import product
+from typing import FrozenSet, List, Sequence, Set, Tuple
+
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.candidate_search import get_net_amount
+
+# Candidates kept per account before the combination search.
+MAX_SHORTLIST = 40
+# Upper bound on the partial sums enumerated for one half of the accounts.
+MAX_HALF_COMBINATIONS = 20_000
+
+
+@dataclass
+class SplitMatchResult:
+    """Outcome of matching a receipt that was paid from several accounts."""
+
+    # Per account portion: the CSV transactions matching that portion.
+    portion_candidates: List[List[Transaction]] = field(default_factory=list)
+    # One transaction per portion whose nets sum to the receipt total.
+    combinations: List[Tuple[Transaction, ...]] = field(default_factory=list)
+
+
+def get_shortlist(
+    *, candidates: Sequence[Transaction], net_amount: float, size: int
+) -> List[Transaction]:
+    """Keep the *size* candidates closest in amount to *net_amount*."""
+    return sorted(
+        candidates, key=lambda txn: abs(get_net_amount(txn) - net_amount)
+    )[:size]
+
+
+def _enumerate_half(
+    shortlists: Sequence[Sequence[Transaction]],
+) -> List[Tuple[float, Tuple[Transaction, ...]]]:
+    """All (net sum, choice) pairs picking one transaction per shortlist."""
+    sums: List[Tuple[float, Tuple[Transaction, ...]]] = []
+    for choice in product(*shortlists):
+        sums.append((sum(get_net_amount(txn) for txn in choice), choice))
+        if len(sums) >= MAX_HALF_COMBINATIONS:
+            break
+    return sums
+
+
+def _trim_to_budget(
+    shortlists: List[List[Transaction]],
+) -> List[List[Transaction]]:
+    """Shrink the longest shortlists until each half fits the budget.
+
+    The shortlists are sorted by amount closeness, so trimming drops
+    the least likely candidates first.
+    """
+    trimmed = [list(s) for s in shortlists]
+    half = (len(trimmed) + 1) // 2
+
+    def half_size(part: List[List[Transaction]]) -> int:
+        size = 1
+        for s in part:
+            size *= max(len(s), 1)
+        return size
+
+    for part in (trimmed[:half], trimmed[half:]):
+        while half_size(part) > MAX_HALF_COMBINATIONS:
+            longest = max(part, key=len)
+            longest.pop()
+    return trimmed
+
+
+def find_split_combinations(
+    *,
+    shortlists: List[List[Transaction]],
+    total: float,
+    amount_margin: float,
+    max_combinations: int = 2,
+) -> List[Tuple[Transaction, ...]]:
+    """Find one transaction per shortlist whose net amounts sum to *total*.
+
+    Meet-in-the-middle: the accounts are split into two halves, the
+    partial sums of one half are sorted and each partial sum of the
+    other half is completed with a binary search. Stops after
+    *max_combinations* hits, which is enough to tell a unique match
+    from an ambiguous one. Combinations of the same transactions in
+    another order (e.g. two portions paid from one account) count once.
+    """
+    if not shortlists or any(not s for s in shortlists):
+        return []
+
+    shortlists = _trim_to_budget(shortlists)
+    tolerance = amount_margin * max(total, 0.01)
+    half = (len(shortlists) + 1) // 2
+    left = _enumerate_half(shortlists[:half])
+    right = sorted(_enumerate_half(shortlists[half:]), key=lambda pair: pair[0])
+    right_sums = [pair[0] for pair in right]
+
+    combinations: List[Tuple[Transaction, ...]] = []
+    seen: Set[FrozenSet[int]] = set()
+    for left_sum, left_choice in left:
+        lo = bisect_left(right_sums, total - tolerance - left_sum - 1e-9)
+        hi = bisect_right(right_sums, total + tolerance - left_sum + 1e-9)
+        for _, right_choice in right[lo:hi]:
+            combination = left_choice + right_choice
+            # The same CSV row cannot pay two portions.
+            identity = frozenset(id(txn) for txn in combination)
+            if len(identity) != len(combination) or identity in seen:
+                continue
+            seen.add(identity)
+            combinations.append(combination)
+            if len(combinations) >= max_combinations:
+                return combinations
+    return combinations
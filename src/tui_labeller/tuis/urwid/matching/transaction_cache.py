@@ -0,0 +1,375 @@
+"""Persistent columnar cache of parsed CSV transactions.
+
+Parsing every bank CSV on each run is a fixed cost per receipt. The parsed
+transactions of one account are therefore written next to its CSV as
+``<csv>.txncache``, a binary file with one column block per year::
+
+    header     magic, version, source size, source mtime, source hash,
+               number of years
+    directory  per year: year, row count, min/max date, block offset
+    blocks     per year: dates (int64 us), tendered amounts (float64),
+               change (float64), description offsets (uint64), and the
+               utf-8 description blob
+
+The file is memory mapped and a year is only decoded into Transaction
+objects when a query touches it. At most ``max_resident_years`` decoded
+years are kept per account (least recently used first out), so memory
+stays flat however long the account history is.
+
+A cache is reused when the CSV size and mtime are unchanged, or when only
+the mtime changed but the content hash is the same. Only the fields used
+for matching are cached.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.generics.Transaction import Transaction
+from hledger_core.TransactionObjects.Account import Account
+from hledger_core.TransactionObjects.AccountTransaction import (
+    AccountTransaction,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".txncache"
+CACHE_MAGIC = b"TXNC"
+CACHE_VERSION = 1
+# Decoded years kept in memory per account. A matching window spans at
+# most two years, the third keeps the previous query's year warm.
+MAX_RESIDENT_YEARS = 3
+
+_HEADER = struct.Struct("<4sIQq32sI")
+_YEAR_ENTRY = struct.Struct("<iIqqQ")
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(the_date: datetime) -> int:
+    if the_date.tzinfo is not None:
+        raise ValueError("Timezone-aware dates are not cached.")
+    return (the_date - _EPOCH) // _ONE_MICROSECOND
+
+
+def _from_micros(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _pad(size: int) -> int:
+    """Bytes needed to align *size* on 8 bytes."""
+    return -size % 8
+
+
+def hash_file(path: str) -> bytes:
+    """Return the 32 byte BLAKE2b digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _encode_year(transactions: List[Transaction]) -> bytes:
+    """Encode one year of transactions as column arrays."""
+    dates = array("q", (_to_micros(t.the_date) for t in transactions))
+    tendered = array("d", (t.tendered_amount_out for t in transactions))
+    change = array("d", (t.change_returned for t in transactions))
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for txn in transactions:
+        blob += (getattr(txn, "description", None) or "").encode("utf-8")
+        offsets.append(len(blob))
+    return b"".join(
+        (
+            dates.tobytes(),
+            tendered.tobytes(),
+            change.tobytes(),
+            offsets.tobytes(),
+            bytes(blob),
+            bytes(_pad(len(blob))),
+        )
+    )
+
+
+def write_cache(
+    *,
+    cache_path: str,
+    size: int,
+    mtime_ns: int,
+    digest: bytes,
+    transactions_per_year: Dict[int, List[Transaction]],
+) -> None:
+    """Write the transactions of one account to *cache_path*.
+
+    The file is written next to its final location and then moved into
+    place, so a reader never sees a partially written cache.
+    """
+    years = sorted(y for y, txns in transactions_per_year.items() if txns)
+    blocks = [_encode_year(transactions_per_year[y]) for y in years]
+
+    offset = _HEADER.size + _YEAR_ENTRY.size * len(years)
+    offset += _pad(offset)
+    directory = bytearray()
+    for year, block in zip(years, blocks):
+        dates = [t.the_date for t in transactions_per_year[year]]
+        directory += _YEAR_ENTRY.pack(
+            year,
+            len(dates),
+            _to_micros(min(dates)),
+            _to_micros(max(dates)),
+            offset,
+        )
+        offset += len(block)
+
+    header = _HEADER.pack(
+        CACHE_MAGIC, CACHE_VERSION, size, mtime_ns, digest, len(years)
+    )
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(directory)
+        f.write(bytes(_pad(len(header) + len(directory))))
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp_path, cache_path)
+
+
+def _read_header(cache_path: str) -> Optional[Tuple[int, int, bytes]]:
+    """Return the (size, mtime_ns, digest) stamp of a valid cache file."""
+    try:
+        with open(cache_path, "rb") as f:
+            raw = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) != _HEADER.size:
+        return None
+    magic, version, size, mtime_ns, digest, _ = _HEADER.unpack(raw)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+    return size, mtime_ns, digest
+
+
+def _update_header_mtime(
+    *, cache_path: str, size: int, mtime_ns: int, digest: bytes
+) -> None:
+    """Record a new source mtime for a cache whose content is unchanged."""
+    with open(cache_path, "r+b") as f:
+        raw = f.read(_HEADER.size)
+        nr_of_years = _HEADER.unpack(raw)[-1]
+        f.seek(0)
+        f.write(
+            _HEADER.pack(
+                CACHE_MAGIC, CACHE_VERSION, size, mtime_ns, digest, nr_of_years
+            )
+        )
+
+
+class CachedAccountYears(Mapping):
+    """Year -> transactions mapping backed by a memory mapped cache file.
+
+    Years are decoded on access; the least recently used one is dropped
+    once more than *max_resident_years* are decoded.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_path: str,
+        account: Account,
+        max_resident_years: int = MAX_RESIDENT_YEARS,
+    ):
+        self.cache_path: str = cache_path
+        self.account: Account = account
+        self.max_resident_years: int = max_resident_years
+        self.decode_count: int = 0
+        with open(cache_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        nr_of_years = _HEADER.unpack_from(self._mmap, 0)[-1]
+        self._directory: Dict[int, Tuple[int, int, int, int]] = {}
+        for i in range(nr_of_years):
+            year, count, min_us, max_us, offset = _YEAR_ENTRY.unpack_from(
+                self._mmap, _HEADER.size + i * _YEAR_ENTRY.size
+            )
+            self._directory[year] = (count, min_us, max_us, offset)
+        self._years: OrderedDict = OrderedDict()
+
+    def _column(self, offset: int, count: int, typecode: str) -> memoryview:
+        """Zero-copy view on one column of the mapped file."""
+        end = offset + 8 * count
+        return memoryview(self._mmap)[offset:end].cast(typecode)
+
+    def _decode_year(self, year: int) -> List[Transaction]:
+        count, _, _, offset = self._directory[year]
+        column_size = 8 * count
+        dates = self._column(offset, count, "q")
+        tendered = self._column(offset + column_size, count, "d")
+        change = self._column(offset + 2 * column_size, count, "d")
+        desc_offsets = self._column(offset + 3 * column_size, count + 1, "Q")
+        blob_start = offset + 3 * column_size + 8 * (count + 1)
+
+        transactions: List[Transaction] = []
+        for i in range(count):
+            txn = AccountTransaction(
+                account=self.account,
+                the_date=_from_micros(dates[i]),
+                tendered_amount_out=tendered[i],
+                change_returned=change[i],
+            )
+            start = blob_start + desc_offsets[i]
+            end = blob_start + desc_offsets[i + 1]
+            if end > start:
+                txn.description = self._mmap[start:end].decode("utf-8")
+            transactions.append(txn)
+        return transactions
+
+    def __getitem__(self, year: int) -> List[Transaction]:
+        if year not in self._directory:
+            raise KeyError(year)
+        if year in self._years:
+            self._years.move_to_end(year)
+            return self._years[year]
+
+        transactions = self._decode_year(year)
+        self.decode_count += 1
+        self._years[year] = transactions
+        if len(self._years) > self.max_resident_years:
+            self._years.popitem(last=False)
+        return transactions
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._directory)
+
+    def __len__(self) -> int:
+        return len(self._directory)
+
+    def date_bounds(self) -> Optional[Tuple[datetime, datetime]]:
+        """Earliest and latest transaction date, without decoding."""
+        if not self._directory:
+            return None
+        return (
+            _from_micros(min(e[1] for e in self._directory.values())),
+            _from_micros(max(e[2] for e in self._directory.values())),
+        )
+
+    def is_loaded(self, year: int) -> bool:
+        return year in self._years
+
+
+def load_account_transactions(
+    *,
+    account_config: AccountConfig,
+    csv_path: str,
+    parse_csv: Callable[[AccountConfig], Dict[int, List[Transaction]]],
+    max_resident_years: int = MAX_RESIDENT_YEARS,
+) -> Mapping:
+    """Return the transactions of one account, from its cache if valid.
+
+    On a cache miss *parse_csv* is called and its result is written to
+    the cache. If the cache cannot be written the parsed transactions
+    are returned as is.
+    """
+    cache_path = f"{csv_path}{CACHE_SUFFIX}"
+    stat = os.stat(csv_path)
+    stamp = _read_header(cache_path)
+    digest: Optional[bytes] = None
+    if stamp is not None and stamp[0] == stat.st_size:
+        if stamp[1] == stat.st_mtime_ns:
+            return CachedAccountYears(
+                cache_path=cache_path,
+                account=account_config.account,
+                max_resident_years=max_resident_years,
+            )
+        # Touched but possibly unchanged (e.g. re-downloaded): compare
+        # the content before reparsing.
+        digest = hash_file(csv_path)
+        if digest == stamp[2]:
+            _update_header_mtime(
+                cache_path=cache_path,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                digest=digest,
+            )
+            return CachedAccountYears(
+                cache_path=cache_path,
+                account=account_config.account,
+                max_resident_years=max_resident_years,
+            )
+
+    transactions_per_year = parse_csv(account_config)
+    try:
+        write_cache(
+            cache_path=cache_path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            digest=digest or hash_file(csv_path),
+            transactions_per_year=transactions_per_year,
+        )
+    except (OSError, ValueError):
+        logger.warning(
+            "Could not write transaction cache %s", cache_path, exc_info=True
+        )
+        return transactions_per_year
+    return CachedAccountYears(
+        cache_path=cache_path,
+        account=account_config.account,
+        max_resident_years=max_resident_years,
+    )
+
+
+class CachedCsvTransactions(Mapping):
+    """Drop-in ``csv_transactions_per_account`` backed by transaction caches.
+
+    Maps every AccountConfig to a year -> transactions mapping. Accounts
+    without CSV map to an empty dict.
+    """
+
+    def __init__(
+        self,
+        *,
+        account_configs: List[AccountConfig],
+        get_csv_path: Callable[[AccountConfig], str],
+        parse_csv: Callable[[AccountConfig], Dict[int, List[Transaction]]],
+        max_resident_years: int = MAX_RESIDENT_YEARS,
+    ):
+        self._accounts: Dict[AccountConfig, Mapping] = {}
+        stamps = []
+        for account_config in account_configs:
+            if not account_config.has_input_csv():
+                self._accounts[account_config] = {}
+                continue
+            csv_path = get_csv_path(account_config)
+            self._accounts[account_config] = load_account_transactions(
+                account_config=account_config,
+                csv_path=csv_path,
+                parse_csv=parse_csv,
+                max_resident_years=max_resident_years,
+            )
+            stat = os.stat(csv_path)
+            stamps.append((csv_path, stat.st_size, stat.st_mtime_ns))
+        # Identifies the loaded data without decoding any year.
+        self.data_version: Tuple = tuple(stamps)
+
+    def __getitem__(self, account_config: AccountConfig) -> Mapping:
+        return self._accounts[account_config]
+
+    def __iter__(self) -> Iterator[AccountConfig]:
+        return iter(self._accounts)
+
+    def __len__(self) -> int:
+        return len(self._accounts)
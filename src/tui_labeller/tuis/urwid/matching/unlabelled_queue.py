@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Mapping, Optional
+
+from hledger_config.config.AccountConfig import AccountConfig
+from hledger_core.generics.Transaction import Transaction
+from hledger_core.TransactionObjects.Receipt import Receipt
+
+from tui_labeller.tuis.urwid.matching.candidate_search import get_net_amount
+from tui_labeller.tuis.urwid.matching.ClaimedIndex import get_claimed_index
+
+# Age at which an unlabelled transaction weighs twice its amount.
+AGE_WEIGHT_DAYS = 365
+
+
+@dataclass
+class QueueEntry:
+    """A CSV transaction that no labelled receipt claims yet."""
+
+    transaction: Transaction
+    account_str: str
+    priority: float
+    # Incoming, e.g. a salary or refund, which rarely has a receipt.
+    is_credit: bool = False
+
+
+def is_credit(txn: Transaction) -> bool:
+    """Check if *txn* entered the account (a negative amount is a
+    debit)."""
+    return txn.tendered_amount_out - txn.change_returned > 0
+
+
+def get_priority(*, txn: Transaction, now: datetime) -> float:
+    """Higher for larger and older transactions."""
+    age_days = max((now - txn.the_date).days, 0)
+    return get_net_amount(txn) * (1 + age_days / AGE_WEIGHT_DAYS)
+
+
+def get_unlabelled_queue(
+    *,
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, List[Transaction]]
+    ],
+    labelled_receipts: List[Receipt],
+    now: Optional[datetime] = None,
+    accounts: Optional[List[str]] = None,
+) -> List[QueueEntry]:
+    """Return the CSV transactions without a labelled receipt, highest
+    priority first.
+
+    The store is diffed against the session's ``ClaimedIndex``, one
+    transaction per claim of its claim key. Debits come first, credits
+    (salary, refunds) after them. Priority grows with the amount and the
+    age, ties are ordered by account and date. *accounts* limits the
+    queue to those accounts.
+    """
+    if now is None:
+        now = datetime.now()
+    claimed_index = get_claimed_index(labelled_receipts)
+    entries: List[QueueEntry] = []
+    for account_config, txns_per_year in csv_transactions_per_account.items():
+        if not account_config.has_input_csv():
+            continue
+        account_str = account_config.account.to_string()
+        if accounts is not None and account_str not in accounts:
+            continue
+        dated = [
+            txn
+            for year in sorted(txns_per_year)
+            for txn in txns_per_year[year]
+            if txn.the_date is not None
+        ]
+        for txn in claimed_index.get_unclaimed(dated):
+            entries.append(
+                QueueEntry(
+                    transaction=txn,
+                    account_str=account_str,
+                    priority=get_priority(txn=txn, now=now),
+                    is_credit=is_credit(txn),
+                )
+            )
+    entries.sort(
+        key=lambda entry: (
+            entry.is_credit,
+            -entry.priority,
+            entry.account_str,
+            entry.transaction.the_date,
+        )
+    )
+    return entries
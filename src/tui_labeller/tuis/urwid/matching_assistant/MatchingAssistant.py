@@ -0,0 +1,253 @@
+from typing import AbstractSet, Callable, List, Optional
+
+import urwid
+from hledger_core.generics.Transaction import Transaction
+
+from tui_labeller.tuis.urwid.matching.candidate_ranking import (
+    ClaimKey,
+    RankedCandidate,
+    format_ranked_candidates,
+    rank_candidates,
+)
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    CandidateSearchResult,
+)
+from tui_labeller.tuis.urwid.matching.IncrementalSearch import (
+    IncrementalSearch,
+)
+from tui_labeller.tuis.urwid.matching.match_query import (
+    MatchAction,
+    MatchQuery,
+    alternate_currency,
+    swap_day_and_month,
+    widen_amount,
+    widen_date,
+)
+from tui_labeller.tuis.urwid.matching.repair_hypotheses import (
+    HypothesisResult,
+    evaluate_hypotheses,
+    get_hypotheses,
+)
+from tui_labeller.tuis.urwid.matching.TransactionIndex import (
+    TransactionIndex,
+)
+
+ACTION_KEYS = {
+    "d": MatchAction.WIDEN_DATE,
+    "a": MatchAction.WIDEN_AMOUNT,
+    "s": MatchAction.SWAP_DAY_AND_MONTH,
+    "c": MatchAction.ALTERNATE_CURRENCY,
+}
+RATE_KEYS = set("0123456789.") | {"backspace", "delete", "left", "right"}
+
+
+class MatchingAssistant(urwid.WidgetWrap):
+    """Overlay with the repair actions for a receipt without unique match.
+
+    Each action derives a new MatchQuery and re-queries the transaction
+    index, so the candidate counts are always current. Widening actions
+    only search the added date slices and amount band. All actions are
+    also evaluated ahead, such that each shows whether it would give a
+    unique match. A unique match is accepted with Enter, any listed
+    candidate with its number.
+    """
+
+    def __init__(
+        self,
+        *,
+        index: TransactionIndex,
+        query: MatchQuery,
+        on_accept: Callable[[MatchQuery, Transaction], None],
+        on_cancel: Callable[[], None],
+        claimed_keys: Optional[AbstractSet[ClaimKey]] = None,
+        conversion_ratio: Optional[float] = None,
+    ):
+        self.index: TransactionIndex = index
+        self.query: MatchQuery = query
+        self.history: List[MatchQuery] = []
+        self.on_accept = on_accept
+        self.on_cancel = on_cancel
+        self.claimed_keys: AbstractSet[ClaimKey] = claimed_keys or set()
+        self.result: CandidateSearchResult = CandidateSearchResult()
+        self.search: Optional[IncrementalSearch] = None
+        self.conversion_ratio: Optional[float] = conversion_ratio
+        self.hypotheses: List[HypothesisResult] = []
+        self.ranked: List[RankedCandidate] = []
+        self.entering_rate: bool = False
+
+        self.status_text = urwid.Text("")
+        self.candidates_text = urwid.Text("")
+        self.message_text = urwid.Text(("error", ""))
+        self.rate_edit = urwid.Edit(
+            "Conversion rate (1 receipt currency = X account currency): ",
+            f"{conversion_ratio or 1.0:g}",
+        )
+        self.actions_text = urwid.Text("")
+        pile = urwid.Pile(
+            [
+                self.status_text,
+                urwid.Divider(),
+                self.candidates_text,
+                urwid.Divider(),
+                urwid.Text(("navigation", "Actions")),
+                self.actions_text,
+                urwid.Text(
+                    " [u] Undo  [Enter] Accept unique match"
+                    + "  [1-9] Accept candidate  [Esc] Close"
+                ),
+                urwid.Divider(),
+                self.rate_edit,
+                self.message_text,
+            ]
+        )
+        super().__init__(
+            urwid.LineBox(
+                urwid.Filler(pile, valign="top"), title="Matching assistant"
+            )
+        )
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-run the search for the current query and redraw."""
+        query = self.query
+        search = self.search
+        if (
+            search is None
+            or search.account_config != query.account_config
+            or search.receipt_date != query.receipt_date
+            or search.net_amount != query.search_amount
+        ):
+            search = self.search = IncrementalSearch(
+                index=self.index,
+                account_config=query.account_config,
+                receipt_date=query.receipt_date,
+                net_amount=query.search_amount,
+            )
+        self.result = search.search(
+            day_margin=query.day_margin, amount_margin=query.amount_margin
+        )
+        self.ranked = rank_candidates(
+            candidates=self.result.matching or self.result.in_window,
+            receipt_date=query.receipt_date,
+            net_amount=query.search_amount,
+            currency=None,
+            claimed_keys=self.claimed_keys,
+            day_margin=query.day_margin,
+            amount_margin=query.amount_margin,
+        )
+
+        currency = ""
+        if query.conversion_ratio != 1.0:
+            currency = f" (x{query.conversion_ratio:g})"
+        self.status_text.set_text(
+            f"{query.receipt_date:%Y-%m-%d} ± {query.day_margin} day(s),"
+            f" {query.search_amount:.2f}{currency}"
+            f" ± {query.amount_margin:.0%}\n"
+            f"{len(self.result.matching)} matching,"
+            f" {len(self.result.in_window)} in date window"
+        )
+        self.candidates_text.set_text(
+            format_ranked_candidates(ranked=self.ranked, indent=" ")
+            or " No candidates."
+        )
+        self.hypotheses = evaluate_hypotheses(
+            index=self.index,
+            hypotheses=get_hypotheses(
+                query, conversion_ratio=self.conversion_ratio
+            ),
+        )
+        self._update_actions_text()
+
+    def _update_actions_text(self) -> None:
+        """List the actions with what each would match."""
+        outcomes = {h.action: h for h in self.hypotheses}
+        markup = []
+        for key, action in ACTION_KEYS.items():
+            if markup:
+                markup.append("\n")
+            markup.append(f" [{key}] {action.value}")
+            outcome = outcomes.get(action)
+            if outcome is None:
+                continue
+            if outcome.is_unique:
+                markup.append(("matched", " -> unique match"))
+            else:
+                markup.append(f" -> {outcome.candidate_count} matching")
+        self.actions_text.set_text(markup)
+
+    def apply_action(self, action: MatchAction) -> None:
+        """Apply one repair action to the query."""
+        if action == MatchAction.WIDEN_DATE:
+            new_query = widen_date(self.query)
+        elif action == MatchAction.WIDEN_AMOUNT:
+            new_query = widen_amount(self.query)
+        elif action == MatchAction.SWAP_DAY_AND_MONTH:
+            new_query = swap_day_and_month(self.query)
+            if new_query is None:
+                self._show_message("Cannot swap day and month for this date.")
+                return
+        else:
+            try:
+                ratio = float(self.rate_edit.get_edit_text())
+            except ValueError:
+                self._show_message("Enter a numeric conversion rate.")
+                return
+            if ratio <= 0:
+                self._show_message("The conversion rate must be positive.")
+                return
+            new_query = alternate_currency(self.query, ratio)
+        self.history.append(self.query)
+        self.query = new_query
+        self._show_message("")
+        self.refresh()
+
+    def undo(self) -> None:
+        if self.history:
+            self.query = self.history.pop()
+            self.refresh()
+
+    def accept(self, candidate_nr: Optional[int] = None) -> None:
+        """Accept the unique match, or candidate *candidate_nr* (1-based)."""
+        if candidate_nr is not None:
+            if not 1 <= candidate_nr <= len(self.ranked):
+                return
+            transaction = self.ranked[candidate_nr - 1].transaction
+        elif len(self.result.matching) == 1:
+            transaction = self.result.matching[0]
+        else:
+            self._show_message(
+                f"{len(self.result.matching)} matching candidates, pick one"
+                " by number or apply another action."
+            )
+            return
+        self.on_accept(self.query, transaction)
+
+    def _show_message(self, msg: str) -> None:
+        self.message_text.set_text(("error", msg))
+
+    def keypress(self, size, key):
+        if self.entering_rate:
+            if key == "enter":
+                self.entering_rate = False
+                self.apply_action(MatchAction.ALTERNATE_CURRENCY)
+            elif key == "esc":
+                self.entering_rate = False
+                self._show_message("")
+            elif key in RATE_KEYS:
+                self.rate_edit.keypress((size[0],), key)
+            return None
+
+        if key == "c":
+            self.entering_rate = True
+            self._show_message("Type the rate and press Enter.")
+        elif key in ACTION_KEYS:
+            self.apply_action(ACTION_KEYS[key])
+        elif key == "u":
+            self.undo()
+        elif key == "enter":
+            self.accept()
+        elif key.isdigit() and key != "0":
+            self.accept(candidate_nr=int(key))
+        elif key in ("esc", "q"):
+            self.on_cancel()
+        return None
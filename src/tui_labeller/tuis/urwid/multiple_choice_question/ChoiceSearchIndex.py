@@ -0,0 +1,53 @@
+import heapq
+import re
+from bisect import bisect_left
+from typing import List, Optional, Set
+
+# Matches returned per search.
+SEARCH_LIMIT = 50
+# Sorts after every character, closes the range of words with a prefix.
+_MAX_CHAR = "\U0010ffff"
+_WORD = re.compile(r"\w+")
+
+
+def get_words(text: Optional[str]) -> List[str]:
+    return _WORD.findall(str(text).lower()) if text else []
+
+
+class ChoiceSearchIndex:
+    """Sorted word index over the searchable fields of each choice.
+
+    A choice matches if each typed word starts a word of one of its
+    fields, e.g. ``ma str`` finds the shop in ``Main street``. Every
+    typed word is a bisect range of the sorted words, so a search does
+    not scan the choices. Matches are returned in choice order, which
+    is the rank of the choices (e.g. by frequency).
+    """
+
+    def __init__(self, fields_per_choice: List[List[Optional[str]]]):
+        pairs = sorted(
+            {
+                (word, index)
+                for index, fields in enumerate(fields_per_choice)
+                for field in fields
+                for word in get_words(field)
+            }
+        )
+        self._words: List[str] = [word for word, _ in pairs]
+        self._indices: List[int] = [index for _, index in pairs]
+
+    def _with_prefix(self, prefix: str) -> Set[int]:
+        start = bisect_left(self._words, prefix)
+        end = bisect_left(self._words, prefix + _MAX_CHAR)
+        return set(self._indices[start:end])
+
+    def search(self, text: str, limit: int = SEARCH_LIMIT) -> List[int]:
+        """Indices of the first *limit* choices matching every word of
+        *text*."""
+        words = get_words(text)
+        if not words:
+            return []
+        # Start from the rarest word to keep the intersections small.
+        matches = sorted((self._with_prefix(word) for word in words), key=len)
+        found = matches[0].intersection(*matches[1:])
+        return heapq.nsmallest(limit, found)
@@ -315,3 +315,12 @@ class HorizontalMultipleChoiceWidget(urwid.WidgetWrap):
         self.selected = value
         self._update_selection(self.question_data.choices.index(value))
         self.confirm_selection()
+
+    def clear_answer(self) -> None:
+        """Deselect all choices."""
+        self.selected = None
+        for widget in self.choice_widgets:
+            widget.contents[0][0].base_widget.set_state(
+                False, do_callback=False
+            )
+            widget.contents[0][0].set_attr_map({None: "normal"})
@@ -10,7 +10,9 @@ from tui_labeller.tuis.urwid.input_validation.InputType import InputType
 from tui_labeller.tuis.urwid.multiple_choice_question.helper import (
     get_selected_caption,
     get_vc_question,
-    get_vc_question_with_highlight,
+)
+from tui_labeller.tuis.urwid.multiple_choice_question.VirtualChoiceList import (  # noqa: E501
+    VirtualChoiceList,
 )
 from tui_labeller.tuis.urwid.question_data_classes import (
     VerticalMultipleChoiceQuestionData,
@@ -39,6 +41,11 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
             question_data.extra_data
             and question_data.extra_data.get("scrollable")
         )
+        # Scrollable lists render only their visible window, and are
+        # filtered by the letters typed.
+        self._choice_list = VirtualChoiceList(self.indentation)
+        self._filter_text: str = ""
+        self._filtered: Union[None, List[int]] = None
         super().__init__(caption=self._get_batch_caption())
         self.input_type: InputType = InputType.INTEGER
         self.ai_suggestions = ai_suggestions or []
@@ -74,11 +81,12 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
                     idx = int(text)
             except (ValueError, AttributeError):
                 idx = 0
-            return get_vc_question_with_highlight(
+            return self._choice_list.render(
                 vc_question_data=self.question_data,
-                indentation=self.indentation,
                 highlighted_index=idx,
                 window_size=MAX_VISIBLE_ADDRESSES,
+                indices=self._filtered,
+                filter_text=self._filter_text,
             )
         return get_vc_question(
             vc_question_data=self.question_data,
@@ -213,7 +221,10 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
         Args:
             direction: -1 for up, +1 for down.
         """
-        max_index = len(self.question_data.choices) - 1
+        indices = self._filtered
+        max_index = (
+            len(self.question_data.choices) if indices is None else len(indices)
+        ) - 1
         if max_index < 0:
             return
         if self.edit_text.strip():
@@ -221,6 +232,9 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
                 current = int(self.edit_text)
             except ValueError:
                 current = 0
+            if indices is not None:
+                # Scroll through the matches of the filter.
+                current = indices.index(current) if current in indices else 0
         else:
             current = -1 if direction == 1 else max_index + 1
 
@@ -229,16 +243,35 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
             new_index = max_index
         elif new_index > max_index:
             new_index = 0
+        if indices is not None:
+            new_index = indices[new_index]
 
         self.set_edit_text(str(new_index))
         self.set_edit_pos(len(str(new_index)))
-        self.set_caption(
-            get_vc_question_with_highlight(
-                vc_question_data=self.question_data,
-                indentation=self.indentation,
-                highlighted_index=new_index,
-                window_size=MAX_VISIBLE_ADDRESSES,
+        self.set_caption(self._get_batch_caption())
+
+    @typechecked
+    def _set_filter(self, filter_text: str) -> None:
+        """Show the choices matching *filter_text* (all choices if it is
+        empty), with the best match selected."""
+        self._filter_text = filter_text
+        if filter_text.strip():
+            self._filtered = self._choice_list.search(
+                vc_question_data=self.question_data, text=filter_text
             )
+            self.set_edit_text(str(self._filtered[0]) if self._filtered else "")
+        else:
+            self._filtered = None
+            self.set_edit_text("")
+        self.set_edit_pos(len(self.edit_text))
+        self.set_caption(self._get_batch_caption())
+
+    @typechecked
+    def _is_filter_char(self, key: str) -> bool:
+        return (
+            self._scrollable
+            and len(key) == 1
+            and (key.isalpha() or (key == " " and bool(self._filter_text)))
         )
 
     @typechecked
@@ -310,6 +343,16 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
                 return None
             return None
 
+        if self._is_filter_char(key):
+            self._set_filter(self._filter_text + key)
+            return None
+
+        if self._filter_text and key in ("backspace", "esc"):
+            self._set_filter(
+                self._filter_text[:-1] if key == "backspace" else ""
+            )
+            return None
+
         elif key in ("delete", "backspace"):
             # Handle backspace/delete by calling super() first to update the
             # text
@@ -319,6 +362,9 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
             return result
 
         elif self.valid_char(ch=key):
+            if self._filter_text:
+                # Typing an index selects from the full list again.
+                self._set_filter("")
             # Calculate batch boundaries
             batch_start = self.current_batch * self.BATCH_SIZE
             batch_choices = self._get_batch_choices()
@@ -510,6 +556,9 @@ class VerticalMultipleChoiceWidget(urwid.Edit):
             except (ValueError, IndexError):
                 current_answer = None
 
+        self._filter_text = ""
+        self._filtered = None
+
         # Reset the current batch if it's out of bounds for the new choices
         max_batch = (len(self.question_data.choices) - 1) // self.BATCH_SIZE
         if self.current_batch > max_batch:
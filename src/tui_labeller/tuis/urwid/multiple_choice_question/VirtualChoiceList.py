@@ -0,0 +1,88 @@
+from typing import List, Optional, Tuple
+
+from tui_labeller.tuis.urwid.multiple_choice_question.ChoiceSearchIndex import (  # noqa: E501
+    ChoiceSearchIndex,
+)
+from tui_labeller.tuis.urwid.multiple_choice_question.helper import (
+    get_vc_question_with_highlight,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    VerticalMultipleChoiceQuestionData,
+)
+
+
+class VirtualChoiceList:
+    """Window renderer for a long choice list, e.g. the shop addresses.
+
+    A caption only formats the lines in its window, from the cached
+    choice lines of ``get_vc_question_with_highlight``. A word index over
+    the shop name, street and city of ``extra_data["shop_ids"]`` (or the
+    choice text) filters the list to the best ranked matches of the
+    typed text. The index is rebuilt when the choices or extra data
+    (shops) are replaced.
+
+    The question data is passed per call, as reconfiguration replaces
+    the question data of a widget.
+    """
+
+    def __init__(self, indentation: int):
+        self.indentation: int = indentation
+        self._search_key: Optional[Tuple[int, int, int]] = None
+        self._search_index: Optional[ChoiceSearchIndex] = None
+
+    @staticmethod
+    def _get_search_fields(
+        vc_question_data: VerticalMultipleChoiceQuestionData,
+    ) -> List[List[Optional[str]]]:
+        choices = vc_question_data.choices
+        shop_ids = (vc_question_data.extra_data or {}).get("shop_ids")
+        if not shop_ids or len(shop_ids) != len(choices):
+            return [[choice] for choice in choices]
+        fields = []
+        for shop_id in shop_ids:
+            address = getattr(shop_id, "address", None)
+            fields.append(
+                [
+                    shop_id.name,
+                    getattr(address, "street", None),
+                    getattr(address, "city", None),
+                ]
+            )
+        return fields
+
+    def search(
+        self, *, vc_question_data: VerticalMultipleChoiceQuestionData, text: str
+    ) -> List[int]:
+        """Indices of the best ranked choices matching *text*."""
+        key = (
+            vc_question_data.choices_version,
+            vc_question_data.suggestions_version,
+            len(vc_question_data.choices),
+        )
+        if self._search_index is None or key != self._search_key:
+            self._search_index = ChoiceSearchIndex(
+                self._get_search_fields(vc_question_data)
+            )
+            self._search_key = key
+        return self._search_index.search(text)
+
+    def render(
+        self,
+        *,
+        vc_question_data: VerticalMultipleChoiceQuestionData,
+        highlighted_index: int,
+        window_size: int,
+        indices: Optional[List[int]] = None,
+        filter_text: str = "",
+    ) -> str:
+        """Caption of the choices at *indices* (default: all, with index 0
+        pinned at the top) in a window around the highlighted choice,
+        below a line with the *filter_text* if there is one."""
+        return get_vc_question_with_highlight(
+            vc_question_data=vc_question_data,
+            indentation=self.indentation,
+            highlighted_index=highlighted_index,
+            window_size=window_size,
+            indices=indices,
+            filter_text=filter_text,
+        )
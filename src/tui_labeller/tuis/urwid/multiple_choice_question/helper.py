@@ -1,3 +1,6 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
 from typeguard import typechecked
 
 from tui_labeller.tuis.urwid.question_data_classes import (
@@ -29,6 +32,76 @@ def input_is_in_int_range(
         return False
 
 
+class ChoiceLines:
+    """The parts of the caption lines of a choice list that do not depend
+    on the batch or window shown: the AI suggestion and annotation text
+    next to each choice, and the length of the longest choice."""
+
+    def __init__(self, vc_question_data: VerticalMultipleChoiceQuestionData):
+        suggestion_texts: Dict[str, str] = {}
+        for suggestion in vc_question_data.ai_suggestions:
+            # The last suggestion of a choice is shown. Use fixed-width
+            # spacing instead of tabs for consistent rendering.
+            suggestion_texts[suggestion.question] = (
+                f"{suggestion.probability:.2f} {suggestion.model_name}"
+            )
+        annotations = (vc_question_data.extra_data or {}).get(
+            "annotations"
+        ) or {}
+        self.choices: List[str] = vc_question_data.choices
+        self.suffixes: List[str] = [
+            suggestion_texts.get(choice, "") + annotations.get(choice, "")
+            for choice in self.choices
+        ]
+        self.max_length: int = max(
+            (len(choice) for choice in self.choices), default=0
+        )
+
+    def format_line(
+        self, *, index: int, indentation: int, width: int, marker: str = ""
+    ) -> str:
+        return (
+            f"{marker}{' ' * indentation}{index} "
+            f"{self.choices[index]:<{width}} "
+            f" {self.suffixes[index]}"
+        )
+
+
+# Choice lines of the most recently shown choice lists.
+MAX_CACHED_CHOICE_LINES = 32
+_CHOICE_LINES: OrderedDict = OrderedDict()
+
+
+def get_choice_lines(
+    vc_question_data: VerticalMultipleChoiceQuestionData,
+) -> ChoiceLines:
+    """Return the (cached) choice lines of *vc_question_data*.
+
+    Cached per choices and suggestions version, which change whenever
+    the choices, AI suggestions or extra data (annotations) of the
+    question data are replaced, so copies of the question data share
+    their lines until they are changed.
+    """
+    key = (
+        vc_question_data.choices_version,
+        vc_question_data.suggestions_version,
+        len(vc_question_data.choices),
+    )
+    if key in _CHOICE_LINES:
+        _CHOICE_LINES.move_to_end(key)
+        return _CHOICE_LINES[key]
+    choice_lines = ChoiceLines(vc_question_data)
+    _CHOICE_LINES[key] = choice_lines
+    if len(_CHOICE_LINES) > MAX_CACHED_CHOICE_LINES:
+        _CHOICE_LINES.popitem(last=False)
+    return choice_lines
+
+
+def _to_ascii(text: str) -> str:
+    # Ensure the output is clean ASCII to avoid encoding issues
+    return text.encode("ascii", errors="ignore").decode("ascii")
+
+
 @typechecked
 def get_selected_caption(
     *,
@@ -36,42 +109,13 @@ def get_selected_caption(
     selected_index: int,
     indentation: int,
 ) -> str:
-
-    @typechecked
-    def get_selected_answer(
-        *,
-        vc_question_data: VerticalMultipleChoiceQuestionData,
-        selected_index: int,
-        indentation: int,
-    ) -> str:
-        max_choice_length = max(
-            len(choice) for choice in vc_question_data.choices
-        )
-        suggestion_text = ""
-        for suggestion in vc_question_data.ai_suggestions:
-            if suggestion.question == vc_question_data.choices[selected_index]:
-                # Use fixed-width spacing instead of tabs for consistent
-                # rendering
-                suggestion_text = (
-                    f"{suggestion.probability:.2f} {suggestion.model_name}"
-                )
-        # Replace tabs with spaces and ensure consistent indentation
-        return (
-            f"{' ' * indentation}{selected_index} {vc_question_data.choices[selected_index]:<{max_choice_length}} "  # noqa: E501
-            f" {suggestion_text}"
-        )
-
-    new_caption: str = vc_question_data.question
-    new_caption += (
-        f"\n{
-            get_selected_answer(
-                vc_question_data=vc_question_data,
-                selected_index=selected_index,
-                indentation=indentation,
-                )}"
+    choice_lines = get_choice_lines(vc_question_data)
+    selected_answer = choice_lines.format_line(
+        index=selected_index,
+        indentation=indentation,
+        width=choice_lines.max_length,
     )
-
-    return f"{new_caption}\n"
+    return f"{vc_question_data.question}\n{selected_answer}\n"
 
 
 def get_vc_question(
@@ -81,103 +125,124 @@ def get_vc_question(
     batch_start: int = 0,
     batch_size: int = None,
 ) -> str:
-    result = [vc_question_data.question]
+    choice_lines = get_choice_lines(vc_question_data)
     # If batch_size is None, show all choices from batch_start
-    choices = (
-        vc_question_data.choices[
-            batch_start : batch_start + batch_size  # noqa: E203
-        ]
-        if batch_size
-        else vc_question_data.choices[batch_start:]
+    total = len(choice_lines.choices)
+    batch_end = min(batch_start + batch_size, total) if batch_size else total
+    indices = range(batch_start, batch_end)
+    max_choice_length = max(
+        (len(choice_lines.choices[i]) for i in indices), default=0
     )
-    max_choice_length = max(len(choice) for choice in choices) if choices else 0
 
-    for i, choice in enumerate(choices):
-        suggestion_text = ""
-        for suggestion in vc_question_data.ai_suggestions:
-            if suggestion.question == choice:
-                # Use fixed-width spacing instead of tabs for consistent
-                # rendering
-                suggestion_text = (
-                    f"{suggestion.probability:.2f} {suggestion.model_name}"
-                )
-        # Replace tabs with spaces and ensure consistent indentation
-        global_index = batch_start + i
-        line = (
-            f"{' ' * indentation}{global_index} {choice:<{max_choice_length}} "
-            f" {suggestion_text}"
+    result = [vc_question_data.question]
+    for index in indices:
+        result.append(
+            choice_lines.format_line(
+                index=index, indentation=indentation, width=max_choice_length
+            )
         )
-        result.append(line)
-
-    options_text: str = "\n".join(result)
-    # Ensure the output is clean ASCII to avoid encoding issues
-    options_text = options_text.encode("ascii", errors="ignore").decode("ascii")
+    options_text: str = _to_ascii("\n".join(result))
     return f"\n{options_text}\n"
 
 
+def get_window_positions(
+    *,
+    total: int,
+    highlighted_position: int,
+    window_size: int,
+    pin_first: bool = True,
+) -> List[int]:
+    """Positions of a list of *total* entries visible in a window of
+    *window_size* entries that keeps the highlighted one visible.
+
+    With *pin_first*, position 0 is always shown at the top and the
+    remaining (window_size - 1) slots slide over positions 1..total-1.
+    """
+    if total <= window_size:
+        return list(range(total))
+    first = 1 if pin_first else 0
+    slots = window_size - first
+    # Ensure the highlighted position is visible.
+    if highlighted_position < first:
+        window_start = first
+    else:
+        # Centre the highlight in the sliding portion.
+        half = slots // 2
+        window_start = highlighted_position - half
+        window_start = max(first, window_start)
+        window_start = min(window_start, total - slots)
+        window_start = max(first, window_start)
+    window_end = min(window_start + slots, total)
+    return list(range(first)) + list(range(window_start, window_end))
+
+
 def get_vc_question_with_highlight(
     *,
     vc_question_data: VerticalMultipleChoiceQuestionData,
     indentation: int,
     highlighted_index: int,
     window_size: int = 12,
+    indices: Optional[List[int]] = None,
+    filter_text: str = "",
 ) -> str:
     """Render the choice list with a visible window that scrolls to keep the
     highlighted item visible.  Index 0 is always pinned at the top.
 
     The visible window contains up to *window_size* entries.  When the
     highlighted index moves beyond the window, the window shifts so the
-    highlighted item stays visible.
-    """
-    all_choices = vc_question_data.choices
-    total = len(all_choices)
-    if total == 0:
-        return f"\n{vc_question_data.question}\n"
+    highlighted item stays visible. Only the lines of the window are
+    formatted, the suggestions and annotations come from the cached
+    choice lines.
 
-    highlighted_index = max(0, min(highlighted_index, total - 1))
-
-    # Determine which indices to show.
-    if total <= window_size:
-        visible_indices = list(range(total))
+    With *indices*, the window slides over those choices only (e.g. the
+    matches of a filter, nothing pinned), below a line with the
+    *filter_text* if there is one.
+    """
+    choice_lines = get_choice_lines(vc_question_data)
+    result = [vc_question_data.question]
+    if filter_text:
+        nr_of_matches = len(indices or [])
+        result.append(
+            f"{' ' * indentation}Filter: {filter_text} "
+            f"({nr_of_matches} matches)"
+        )
+    if indices is None:
+        total = len(choice_lines.choices)
+        if total == 0:
+            return f"\n{vc_question_data.question}\n"
+        highlighted_index = max(0, min(highlighted_index, total - 1))
+        visible_indices = get_window_positions(
+            total=total,
+            highlighted_position=highlighted_index,
+            window_size=window_size,
+        )
     else:
-        # Index 0 is always pinned; the remaining (window_size - 1) slots
-        # form a sliding window over indices 1..total-1.
-        slots = window_size - 1
-        # Ensure the highlighted index is visible.
-        if highlighted_index == 0:
-            window_start = 1
-        else:
-            # Centre the highlight in the sliding portion.
-            half = slots // 2
-            window_start = highlighted_index - half
-            window_start = max(1, window_start)
-            window_start = min(window_start, total - slots)
-            window_start = max(1, window_start)
-        window_end = min(window_start + slots, total)
-        visible_indices = [0] + list(range(window_start, window_end))
-
-    max_choice_length = (
-        max(len(all_choices[i]) for i in visible_indices)
-        if visible_indices
-        else 0
-    )
+        highlighted_position = (
+            indices.index(highlighted_index)
+            if highlighted_index in indices
+            else 0
+        )
+        visible_indices = [
+            indices[position]
+            for position in get_window_positions(
+                total=len(indices),
+                highlighted_position=highlighted_position,
+                window_size=window_size,
+                pin_first=False,
+            )
+        ]
 
-    result = [vc_question_data.question]
+    max_choice_length = max(
+        (len(choice_lines.choices[i]) for i in visible_indices), default=0
+    )
     for idx in visible_indices:
-        choice = all_choices[idx]
-        suggestion_text = ""
-        for suggestion in vc_question_data.ai_suggestions:
-            if suggestion.question == choice:
-                suggestion_text = (
-                    f"{suggestion.probability:.2f} {suggestion.model_name}"
-                )
-        marker = ">" if idx == highlighted_index else " "
-        line = (
-            f"{marker}{' ' * indentation}{idx} {choice:<{max_choice_length}} "
-            f" {suggestion_text}"
+        result.append(
+            choice_lines.format_line(
+                index=idx,
+                indentation=indentation,
+                width=max_choice_length,
+                marker=">" if idx == highlighted_index else " ",
+            )
         )
-        result.append(line)
-
-    options_text: str = "\n".join(result)
-    options_text = options_text.encode("ascii", errors="ignore").decode("ascii")
+    options_text: str = _to_ascii("\n".join(result))
     return f"\n{options_text}\n"
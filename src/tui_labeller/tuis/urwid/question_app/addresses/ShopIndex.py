@@ -0,0 +1,188 @@
+import sys
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from hledger_core.TransactionObjects.Address import Address
+from hledger_core.TransactionObjects.Receipt import Receipt
+from hledger_core.TransactionObjects.ShopId import ShopId
+
+# Shop name, address string and shop account number.
+ShopKey = Tuple[str, str, str]
+# Sorts after every character, closes the range of categories with a prefix.
+_MAX_CHAR = "\U0010ffff"
+
+
+def _to_shop_id(shop_identifier) -> ShopId:
+    """The ShopId of a receipt, also if it was loaded in its dict form."""
+    if not isinstance(shop_identifier, dict):
+        return shop_identifier
+    address = shop_identifier.get("address")
+    return ShopId(
+        name=shop_identifier["name"],
+        address=Address(**address) if isinstance(address, dict) else address,
+        shop_account_nr=shop_identifier.get("shop_account_nr") or None,
+    )
+
+
+def _has_address(shop_id: ShopId) -> bool:
+    address = getattr(shop_id, "address", None)
+    if address is None:
+        return False
+    return any(
+        field is not None and field != ""
+        for field in (
+            address.street,
+            address.house_nr,
+            address.zipcode,
+            address.city,
+            address.country,
+        )
+    )
+
+
+def get_shop_key(shop_id: ShopId) -> ShopKey:
+    """Identifies a shop, interned as it is shared by many receipts."""
+    return (
+        sys.intern(shop_id.name),
+        sys.intern(shop_id.address.to_string()),
+        sys.intern(shop_id.shop_account_nr or ""),
+    )
+
+
+class ShopIndex:
+    """Shops with an address per category, counted in one pass.
+
+    Built once per session from ``labelled_receipts`` and extended as
+    receipts are finished, instead of regrouping all receipts on each
+    reconfiguration. Categories are kept sorted, so the categories with
+    a prefix (the tiers of ``get_initial_complete_list``) are a bisect
+    range. The address choices are memoized per category until a
+    receipt is added.
+    """
+
+    def __init__(self):
+        self.shops: Dict[ShopKey, ShopId] = {}
+        # category -> shop key -> nr of receipts.
+        self.category_counts: Dict[str, Counter] = {}
+        self.shop_counts: Counter = Counter()
+        self.categories: List[str] = []
+        self._counted: Set[int] = set()
+        self._memo: Dict[Optional[str], Tuple[List[str], List[ShopId]]] = {}
+        self._source: Optional[List[Receipt]] = None
+        self._indexed_count: int = 0
+
+    def add_receipt(self, receipt: Receipt) -> None:
+        """Count the shop of a (just finished) receipt once."""
+        if id(receipt) in self._counted:
+            return
+        self._counted.add(id(receipt))
+        category = receipt.receipt_category
+        if category is None or receipt.shop_identifier is None:
+            return
+        shop_id = _to_shop_id(receipt.shop_identifier)
+        if not _has_address(shop_id):
+            return
+        shop_key = get_shop_key(shop_id)
+        self.shops.setdefault(shop_key, shop_id)
+        if category not in self.category_counts:
+            self.category_counts[category] = Counter()
+            insort(self.categories, category)
+        self.category_counts[category][shop_key] += 1
+        self.shop_counts[shop_key] += 1
+        self._memo.clear()
+
+    def sync(self, labelled_receipts: List[Receipt]) -> "ShopIndex":
+        """Index the receipts of *labelled_receipts* not indexed yet.
+
+        Receipts appended to the same list since the last call are added
+        incrementally; another list rebuilds the index.
+        """
+        if (
+            labelled_receipts is not self._source
+            or len(labelled_receipts) < self._indexed_count
+        ):
+            self.shops = {}
+            self.category_counts = {}
+            self.shop_counts = Counter()
+            self.categories = []
+            self._counted = set()
+            self._memo = {}
+            self._source = labelled_receipts
+            self._indexed_count = 0
+        start = self._indexed_count
+        for receipt in labelled_receipts[start:]:
+            self.add_receipt(receipt)
+        self._indexed_count = len(labelled_receipts)
+        return self
+
+    def get_categories_with_prefix(self, prefix: str) -> List[str]:
+        start = bisect_left(self.categories, prefix)
+        end = bisect_left(self.categories, prefix + _MAX_CHAR)
+        return self.categories[start:end]
+
+    def get_category_shops(self, category: str) -> List[Tuple[int, ShopId]]:
+        """(count, ShopId) of the shops of *category*, most used first."""
+        counts = self.category_counts.get(category, Counter())
+        return [
+            (count, self.shops[shop_key])
+            for shop_key, count in counts.most_common()
+        ]
+
+    def _get_shop_keys(self, categories: List[str]) -> Set[ShopKey]:
+        shop_keys: Set[ShopKey] = set()
+        for category in categories:
+            shop_keys.update(self.category_counts[category])
+        return shop_keys
+
+    def _sort(self, shop_keys) -> List[ShopKey]:
+        return sorted(
+            shop_keys,
+            key=lambda shop_key: (-self.shop_counts[shop_key], *shop_key),
+        )
+
+    def get_initial_complete_list(
+        self, category_input: Optional[str] = None
+    ) -> Tuple[List[str], List[ShopId]]:
+        """Address choices for *category_input*, see
+        ``update_addresses.get_initial_complete_list``."""
+        if category_input not in self._memo:
+            self._memo[category_input] = self._get_complete_list(category_input)
+        choices, shop_ids = self._memo[category_input]
+        return list(choices), list(shop_ids)
+
+    def _get_complete_list(
+        self, category_input: Optional[str]
+    ) -> Tuple[List[str], List[ShopId]]:
+        tiers: List[List[ShopKey]] = []
+        placed: Set[ShopKey] = set()
+        if category_input:
+            # Parent prefix: e.g. "groceries:" from "groceries:ah"
+            parent_prefix = category_input.split(":")[0] + ":"
+            for prefix in (category_input, parent_prefix):
+                shop_keys = self._get_shop_keys(
+                    self.get_categories_with_prefix(prefix)
+                )
+                tiers.append(self._sort(shop_keys - placed))
+                placed |= shop_keys
+        tiers.append(self._sort(self.shop_counts.keys() - placed))
+
+        choices: List[str] = ["manual address"]
+        shop_ids: List[ShopId] = [
+            ShopId(name="manual address", address=Address())
+        ]
+        for tier in tiers:
+            for shop_key in tier:
+                shop_id = self.shops[shop_key]
+                choices.append(f"{shop_id.name}: {shop_key[1]}")
+                shop_ids.append(shop_id)
+        return choices, shop_ids
+
+
+# Session-wide index shared by all reconfiguration passes.
+SHOP_INDEX = ShopIndex()
+
+
+def get_shop_index(labelled_receipts: List[Receipt]) -> ShopIndex:
+    """Return the session's shop index, synced with the receipts."""
+    return SHOP_INDEX.sync(labelled_receipts)
@@ -1,9 +1,10 @@
-from typing import Dict, List, Union
+from typing import List, Union
 
 import urwid
 from typeguard import typechecked
 from urwid import AttrMap, Pile
 
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import HistoryStore
 from tui_labeller.tuis.urwid.multiple_choice_question.HorizontalMultipleChoiceWidget import (  # noqa: E501
     HorizontalMultipleChoiceWidget,
 )
@@ -47,7 +48,7 @@ def build_questionnaire(
     ai_suggestion_box: AttrMap,
     history_suggestion_box: AttrMap,
     error_display: AttrMap,
-    history_store: Dict,
+    history_store: HistoryStore,
 ) -> None:
     # Manual
     """Build the complete questionnaire UI."""
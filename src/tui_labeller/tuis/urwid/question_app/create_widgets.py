@@ -1,4 +1,4 @@
-from typing import Dict, Union
+from typing import Union
 
 import urwid
 from typeguard import typechecked
@@ -7,6 +7,7 @@ from urwid import AttrMap, Pile
 from tui_labeller.tuis.urwid.date_question.DateTimeQuestion import (
     DateTimeQuestion,
 )
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import HistoryStore
 from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
     InputValidationQuestion,
 )
@@ -38,7 +39,7 @@ def create_question_widget(
         VerticalMultipleChoiceQuestionData,
         HorizontalMultipleChoiceQuestionData,
     ],
-    history_store: Dict,
+    history_store: HistoryStore,
     descriptor_col_width: int,
 ) -> Union[
     VerticalMultipleChoiceWidget, HorizontalMultipleChoiceWidget, AttrMap
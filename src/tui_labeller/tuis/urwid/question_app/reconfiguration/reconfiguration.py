@@ -1,7 +1,8 @@
+import copy
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import datetime
+from typing import Any, List, Mapping, Optional, Tuple, Union
 
 import urwid
 from hledger_config.config.AccountConfig import AccountConfig
@@ -25,6 +26,44 @@ from tui_labeller.tuis.urwid.input_validation.InputType import (  # noqa: E402
 from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (  # noqa: E501, E402
     InputValidationQuestion,
 )
+from tui_labeller.tuis.urwid.matching.account_lookup import (  # noqa: E402
+    find_matching_accounts,
+    get_account_annotations,
+    order_account_choices,
+)
+from tui_labeller.tuis.urwid.matching.adaptive_search import (  # noqa: E402
+    AdaptiveMatch,
+    adaptive_search,
+    is_adaptive_matching,
+)
+from tui_labeller.tuis.urwid.matching.candidate_ranking import (  # noqa: E402
+    RankedCandidate,
+    format_ranked_candidates,
+    get_claim_key,
+    rank_candidates,
+)
+from tui_labeller.tuis.urwid.matching.candidate_search import (  # noqa: E402
+    find_candidates,
+    get_date_bounds,
+    get_matching_margins,
+    get_net_amount,
+    is_amount_within_margin,
+)
+from tui_labeller.tuis.urwid.matching.ClaimedIndex import (  # noqa: E402
+    get_claimed_index,
+)
+from tui_labeller.tuis.urwid.matching.ExchangeRateIndex import (  # noqa: E402
+    get_exchange_rate_index,
+)
+from tui_labeller.tuis.urwid.matching.LiveMatcher import (  # noqa: E402
+    LiveMatcher,
+)
+from tui_labeller.tuis.urwid.matching.split_payment import (  # noqa: E402
+    MAX_SHORTLIST,
+    SplitMatchResult,
+    find_split_combinations,
+    get_shortlist,
+)
 from tui_labeller.tuis.urwid.multiple_choice_question.HorizontalMultipleChoiceWidget import (  # noqa: E501, E402
     HorizontalMultipleChoiceWidget,
 )
@@ -64,6 +103,7 @@ from tui_labeller.tuis.urwid.receipts.WithdrawalQuestions import (  # noqa: E402
 
 DATE_RANGE_ERROR_ID = "__date_range_error__"
 MATCH_CHOICE_QUESTION = "No unique CSV match. Select action:"
+MATCH_ASSISTANT_CHOICE = "Open matching assistant"
 
 
 @dataclass
@@ -82,6 +122,12 @@ class AmountMatchResult:
     status: str  # "matched", "no_match", "ambiguous", "skipped"
     candidate_count: int = 0
     candidates: List[Transaction] = field(default_factory=list)
+    # Split payments: one CSV transaction per account, summing to the total.
+    combinations: List[Tuple[Transaction, ...]] = field(default_factory=list)
+    # Best scoring candidates, listed in the sidebar when not matched.
+    ranked: List[RankedCandidate] = field(default_factory=list)
+    # Margins the adaptive search needed for a unique match, if used.
+    adaptive: Optional[AdaptiveMatch] = None
 
 
 @typechecked
@@ -584,6 +630,10 @@ def handle_withdrawal_toggle(
 
 
 AMOUNT_DEBITED_QUESTION = "Amount debited from source account:"
+EXCHANGE_RATE_QUESTION = "Exchange rate (1 source = X destination):"
+# Relative amount tolerance added for withdrawals in another currency,
+# as the historical rate only estimates the rate of the day.
+FX_RATE_TOLERANCE = 0.03
 
 
 @typechecked
@@ -771,25 +821,12 @@ def handle_post_account_withdrawal_questions(
     return new_tui
 
 
-def _get_transactions_in_date_range(
-    transactions_per_year: Dict[int, List[Transaction]],
-    target_date: datetime,
-    date_margin: timedelta,
-) -> List[Transaction]:
-    """Filter transactions to those within *date_margin* of *target_date*."""
-    year = target_date.year
-    transactions = transactions_per_year.get(year, [])
-    start = target_date - date_margin
-    end = target_date + date_margin
-    return [t for t in transactions if start <= t.the_date <= end]
-
-
 def _try_background_withdrawal_match(
     *,
     tui,
     config: Optional["Config"],
     csv_transactions_per_account: Optional[
-        Dict[AccountConfig, Dict[int, List[Transaction]]]
+        Mapping[AccountConfig, Mapping[int, List[Transaction]]]
     ],
 ) -> None:
     """Search CSV transactions for a withdrawal match and pre-fill the amount.
@@ -798,6 +835,12 @@ def _try_background_withdrawal_match(
     CSV transactions near the receipt date whose amount could match. If
     exactly one match is found, sets the default on the "Amount debited
     from source account" question.
+
+    When the source account's currency differs from the withdrawn one,
+    the withdrawn amount is converted at the rate of the labelled
+    withdrawal nearest to the receipt date, and compared with a wider
+    tolerance. The rate implied by the match pre-fills the exchange rate
+    question.
     """
     if config is None or csv_transactions_per_account is None:
         return
@@ -806,6 +849,7 @@ def _try_background_withdrawal_match(
     source_account_str: Optional[str] = None
     receipt_date = None
     receipt_amount: Optional[float] = None
+    withdrawn_currency: Optional[str] = None
 
     for inp in tui.inputs:
         w = inp.base_widget
@@ -819,6 +863,8 @@ def _try_background_withdrawal_match(
                 receipt_amount = float(w.get_answer())
             except (ValueError, TypeError):
                 pass
+        elif q == CURRENCY_QUESTION and w.has_answer():
+            withdrawn_currency = str(w.get_answer())
 
     if source_account_str is None or receipt_date is None:
         return
@@ -839,46 +885,71 @@ def _try_background_withdrawal_match(
     if not txns_per_year:
         return
 
-    # Search within configured date margin (default 7 days).
-    day_margin = (
-        config.matching_algo.days if hasattr(config, "matching_algo") else 7
+    # The withdrawn amount in the source account's currency, if known.
+    source_currency = matching_account_config.account.base_currency.value
+    is_foreign = (
+        withdrawn_currency is not None and withdrawn_currency != source_currency
     )
-    candidates = _get_transactions_in_date_range(
-        transactions_per_year=txns_per_year,
-        target_date=receipt_date,
-        date_margin=timedelta(days=day_margin),
+    estimated_rate: Optional[float] = None
+    source_amount: Optional[float] = None
+    if receipt_amount is not None and receipt_amount > 0:
+        if not is_foreign:
+            source_amount = receipt_amount
+        else:
+            estimated_rate = get_exchange_rate_index(
+                tui.labelled_receipts
+            ).get_rate(
+                from_currency=source_currency,
+                to_currency=withdrawn_currency,
+                the_date=receipt_date,
+            )
+            if estimated_rate:
+                source_amount = receipt_amount / estimated_rate
+
+    # Search within the configured date margin (default 7 days). If the
+    # user already entered an amount on the receipt side, narrow the
+    # candidates by absolute value (within the configured amount margin,
+    # widened by the rate tolerance for foreign withdrawals).
+    day_margin, amount_margin = get_matching_margins(config)
+    search = find_candidates(
+        csv_transactions_per_account=csv_transactions_per_account,
+        account_config=matching_account_config,
+        config=config,
+        receipt_date=receipt_date,
+        net_amount=None if is_foreign else source_amount,
     )
-
-    if not candidates:
+    if not search.in_window:
         return
+    matching = search.matching
+    if is_foreign and source_amount is not None:
+        matching = [
+            txn
+            for txn in search.in_window
+            if is_amount_within_margin(
+                txn_net=get_net_amount(txn),
+                net_amount=source_amount,
+                amount_margin=amount_margin + FX_RATE_TOLERANCE,
+            )
+        ]
+    # Transactions claimed by labelled receipts are not this withdrawal.
+    claimed_index = get_claimed_index(tui.labelled_receipts)
+    candidates = claimed_index.prefer_unclaimed(matching or search.in_window)
 
-    # If the user already entered an amount on the receipt side, narrow
-    # candidates by absolute value (within the configured amount margin).
-    if receipt_amount is not None and receipt_amount > 0:
-        amount_margin = (
-            config.matching_algo.amount_range
-            if hasattr(config, "matching_algo")
-            else 0.05
-        )
-        narrowed = []
-        for txn in candidates:
-            net = abs(txn.tendered_amount_out - txn.change_returned)
-            if abs(net - receipt_amount) <= amount_margin * max(
-                receipt_amount, 0.01
-            ):
-                narrowed.append(txn)
-        if narrowed:
-            candidates = narrowed
-
-    # Pick the best match: prefer exact count == 1, else pick the one
-    # closest in time to the receipt date.
+    # Pick the best match: prefer exact count == 1, else the best scoring
+    # one (close in time and amount, not yet claimed by another receipt).
     if len(candidates) == 1:
         best = candidates[0]
     else:
-        best = min(
-            candidates,
-            key=lambda t: abs((t.the_date - receipt_date).total_seconds()),
-        )
+        best = rank_candidates(
+            candidates=candidates,
+            receipt_date=receipt_date,
+            net_amount=source_amount,
+            currency=None,
+            claimed_keys=claimed_index.keys,
+            day_margin=day_margin,
+            amount_margin=amount_margin,
+            k=1,
+        )[0].transaction
 
     matched_amount = abs(best.tendered_amount_out - best.change_returned)
     matched_date_str = best.the_date.strftime("%Y-%m-%d")
@@ -897,6 +968,35 @@ def _try_background_withdrawal_match(
                 )
             break
 
+    if is_foreign:
+        # The rate of a unique amount match, else the historical estimate.
+        rate = estimated_rate
+        if len(matching) == 1 and best is matching[0] and matched_amount:
+            rate = receipt_amount / matched_amount
+        if rate:
+            _prefill_exchange_rate(tui=tui, rate=rate)
+
+
+def _prefill_exchange_rate(*, tui: "QuestionnaireApp", rate: float) -> None:
+    """Set the exchange rate question, unless the user changed it from
+    its default or from the rate prefilled earlier."""
+    for inp in tui.inputs:
+        w = inp.base_widget
+        if w.question_data.question != EXCHANGE_RATE_QUESTION:
+            continue
+        kept = {
+            float(w.question_data.default or 1),
+            tui.prefilled_answers.get(EXCHANGE_RATE_QUESTION),
+        }
+        try:
+            untouched = not w.has_answer() or float(w.get_answer()) in kept
+        except (ValueError, TypeError):
+            untouched = False
+        if untouched:
+            tui.prefilled_answers[EXCHANGE_RATE_QUESTION] = round(rate, 6)
+            w.set_answer(round(rate, 6))
+        return
+
 
 def _prefill_withdrawal_from_metadata(
     *,
@@ -934,6 +1034,7 @@ def _prefill_withdrawal_from_metadata(
 
 
 BELONGS_TO_QUESTION = "Belongs to bank/accounts_without_csv:"
+CURRENCY_QUESTION = "Currency:"
 CHANGE_RETURNED_QUESTION = "Change returned to account:"
 MATCH_WARNING_QUESTION = (
     "No unique CSV match — adjust amount, date, or account (Enter to continue):"
@@ -944,7 +1045,7 @@ def _validate_account_date_range(
     *,
     tui: "QuestionnaireApp",
     csv_transactions_per_account: Optional[
-        Dict[AccountConfig, Dict[int, List[Transaction]]]
+        Mapping[AccountConfig, Mapping[int, List[Transaction]]]
     ],
 ) -> Optional[DateRangeResult]:
     """Check whether the selected account's CSV covers the receipt date.
@@ -977,11 +1078,9 @@ def _validate_account_date_range(
     # Find matching AccountConfig.
     for ac, txns_per_year in csv_transactions_per_account.items():
         if ac.account.to_string() == account_str:
-            # Flatten all transactions to find actual min/max dates.
-            all_txns = [
-                t for year_list in txns_per_year.values() for t in year_list
-            ]
-            if not all_txns:
+            # Actual min/max dates across all years.
+            date_bounds = get_date_bounds(txns_per_year)
+            if date_bounds is None:
                 account_inp.set_attr_map({None: "error"})
                 result = DateRangeResult(status="no_data")
                 _update_date_range_sidebar(
@@ -989,8 +1088,7 @@ def _validate_account_date_range(
                 )
                 return result
 
-            csv_min = min(t.the_date for t in all_txns)
-            csv_max = max(t.the_date for t in all_txns)
+            csv_min, csv_max = date_bounds
 
             if receipt_date.date() > csv_max.date():
                 account_inp.set_attr_map({None: "error"})
@@ -1074,12 +1172,89 @@ def _clear_date_range_sidebar(*, tui: "QuestionnaireApp") -> None:
     )
 
 
+@dataclass
+class _AccountPortion:
+    """Answers of one "Belongs to" account block of a receipt."""
+
+    account_str: Optional[str] = None
+    currency: Optional[str] = None
+    amount_paid: Optional[float] = None
+    change_returned: Optional[float] = None
+    account_inp: Any = None
+    amount_inp: Any = None
+    change_inp: Any = None
+
+    @property
+    def net_amount(self) -> float:
+        return abs((self.amount_paid or 0.0) - (self.change_returned or 0.0))
+
+    def set_attr(self, attr: str) -> None:
+        self.amount_inp.set_attr_map({None: attr})
+        if self.change_inp is not None:
+            self.change_inp.set_attr_map({None: attr})
+
+
+def _get_csv_account_config(
+    *,
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, List[Transaction]]
+    ],
+    account_str: str,
+) -> Optional[AccountConfig]:
+    """Find the CSV-backed AccountConfig for an account string."""
+    for ac in csv_transactions_per_account:
+        if ac.account.to_string() == account_str and ac.has_input_csv():
+            return ac
+    return None
+
+
+def _collect_account_portions(
+    *, tui: "QuestionnaireApp"
+) -> Tuple[Optional[datetime], List[_AccountPortion]]:
+    """Read the receipt date and the answers of every account block."""
+    receipt_date = None
+    portions: List[_AccountPortion] = []
+
+    for inp in tui.inputs:
+        w = inp.base_widget
+        q = w.question_data.question
+        if q == "Receipt date and time:\n" and w.has_answer():
+            receipt_date = w.get_answer()
+        elif q == BELONGS_TO_QUESTION:
+            # Every "Belongs to" question starts a new account block.
+            portions.append(
+                _AccountPortion(
+                    account_str=str(w.get_answer()) if w.has_answer() else None,
+                    account_inp=inp,
+                )
+            )
+        elif q == CURRENCY_QUESTION and w.has_answer() and portions:
+            portions[-1].currency = str(w.get_answer())
+        elif q == AMOUNT_PAID_QUESTION and w.has_answer():
+            if not portions:
+                portions.append(_AccountPortion())
+            try:
+                portions[-1].amount_paid = float(w.get_answer())
+            except (ValueError, TypeError):
+                pass
+            portions[-1].amount_inp = inp
+        elif q == CHANGE_RETURNED_QUESTION and w.has_answer():
+            if not portions:
+                portions.append(_AccountPortion())
+            try:
+                portions[-1].change_returned = float(w.get_answer())
+            except (ValueError, TypeError):
+                pass
+            portions[-1].change_inp = inp
+    return receipt_date, portions
+
+
 def _try_non_withdrawal_amount_match(
     *,
     tui: "QuestionnaireApp",
     config: Optional["Config"],
     csv_transactions_per_account: Optional[
-        Dict[AccountConfig, Dict[int, List[Transaction]]]
+        Mapping[AccountConfig, Mapping[int, List[Transaction]]]
     ],
 ) -> Optional[AmountMatchResult]:
     """After 'Add another account = n', check if the entered amount matches a
@@ -1087,6 +1262,8 @@ def _try_non_withdrawal_amount_match(
 
     Turns amount/change fields green on match, red on mismatch.  Only
     applies to non-withdrawal receipts with CSV-backed accounts.
+    Receipts paid from several accounts are validated per account and
+    as a split payment, see ``_try_split_payment_match``.
 
     Returns an AmountMatchResult, or None when matching is skipped.
     """
@@ -1097,59 +1274,35 @@ def _try_non_withdrawal_amount_match(
         _remove_match_choice(tui=tui)
         return None
 
-    receipt_date = None
-    account_str: Optional[str] = None
-    amount_paid: Optional[float] = None
-    change_returned: Optional[float] = None
-    amount_inp = None
-    change_inp = None
-    account_count = 0
-
-    for inp in tui.inputs:
-        w = inp.base_widget
-        q = w.question_data.question
-        if q == "Receipt date and time:\n" and w.has_answer():
-            receipt_date = w.get_answer()
-        elif q == BELONGS_TO_QUESTION and w.has_answer():
-            account_str = str(w.get_answer())
-            account_count += 1
-        elif q == AMOUNT_PAID_QUESTION and w.has_answer():
-            try:
-                amount_paid = float(w.get_answer())
-            except (ValueError, TypeError):
-                pass
-            amount_inp = inp
-        elif q == CHANGE_RETURNED_QUESTION and w.has_answer():
-            try:
-                change_returned = float(w.get_answer())
-            except (ValueError, TypeError):
-                pass
-            change_inp = inp
+    receipt_date, portions = _collect_account_portions(tui=tui)
 
-    # Multi-account receipts split the total across accounts, so
-    # per-account CSV matching is not meaningful.
-    if account_count > 1:
+    if receipt_date is None or not portions:
         _remove_match_choice(tui=tui)
         return None
 
+    if len(portions) > 1:
+        return _try_split_payment_match(
+            tui=tui,
+            config=config,
+            csv_transactions_per_account=csv_transactions_per_account,
+            receipt_date=receipt_date,
+            portions=portions,
+        )
+
+    portion = portions[0]
     if (
-        receipt_date is None
-        or account_str is None
-        or amount_paid is None
-        or amount_inp is None
+        portion.account_str is None
+        or portion.amount_paid is None
+        or portion.amount_inp is None
     ):
         _remove_match_choice(tui=tui)
         return None
 
-    if change_returned is None:
-        change_returned = 0.0
-
     # Find matching AccountConfig (CSV accounts only).
-    matching_ac: Optional[AccountConfig] = None
-    for ac in csv_transactions_per_account:
-        if ac.account.to_string() == account_str and ac.has_input_csv():
-            matching_ac = ac
-            break
+    matching_ac = _get_csv_account_config(
+        csv_transactions_per_account=csv_transactions_per_account,
+        account_str=portion.account_str,
+    )
 
     if matching_ac is None:
         # Asset account without CSV -- skip matching and remove any
@@ -1159,40 +1312,74 @@ def _try_non_withdrawal_amount_match(
 
     txns_per_year = csv_transactions_per_account.get(matching_ac, {})
     if not txns_per_year:
-        amount_inp.set_attr_map({None: "error"})
+        portion.amount_inp.set_attr_map({None: "error"})
         return AmountMatchResult(status="no_match", candidate_count=0)
 
-    day_margin = (
-        config.matching_algo.days if hasattr(config, "matching_algo") else 7
-    )
-    candidates = _get_transactions_in_date_range(
-        transactions_per_year=txns_per_year,
-        target_date=receipt_date,
-        date_margin=timedelta(days=day_margin),
+    net_amount = portion.net_amount
+    search = find_candidates(
+        csv_transactions_per_account=csv_transactions_per_account,
+        account_config=matching_ac,
+        config=config,
+        receipt_date=receipt_date,
+        net_amount=net_amount,
     )
-
-    net_amount = abs(amount_paid - change_returned)
-
-    if candidates:
-        amount_margin = (
-            config.matching_algo.amount_range
-            if hasattr(config, "matching_algo")
-            else 0.05
+    # Transactions claimed by labelled receipts cannot be this receipt's,
+    # which resolves e.g. two identical payments in one week.
+    claimed_index = get_claimed_index(tui.labelled_receipts)
+    candidates = claimed_index.prefer_unclaimed(search.matching)
+
+    # A candidate the user picked (from the ranked list or the matching
+    # assistant) resolves the match as long as it is in the date window;
+    # its amount may differ, e.g. for a receipt in another currency. The
+    # pin holds for the amount it was applied at: a corrected amount is
+    # matched afresh. Compared by key: lazily loaded years may be decoded
+    # again.
+    pinned = tui.pinned_matches.get(portion.account_str)
+    if pinned is not None:
+        pinned_amount = tui.pinned_amounts.setdefault(
+            portion.account_str, round(net_amount, 2)
         )
-        narrowed = []
-        for txn in candidates:
-            txn_net = abs(txn.tendered_amount_out - txn.change_returned)
-            if abs(txn_net - net_amount) <= amount_margin * max(
-                net_amount, 0.01
-            ):
-                narrowed.append(txn)
-        candidates = narrowed
+        if pinned_amount != round(net_amount, 2):
+            del tui.pinned_matches[portion.account_str]
+            del tui.pinned_amounts[portion.account_str]
+            pinned = None
+    if pinned is not None:
+        pinned_key = get_claim_key(pinned)
+        pinned_candidates = [
+            txn for txn in search.in_window if get_claim_key(txn) == pinned_key
+        ]
+        if pinned_candidates:
+            candidates = pinned_candidates[:1]
+
+    # Look for the tightest margins (within the configured ones) that
+    # single out one transaction.
+    adaptive = None
+    if len(candidates) != 1 and is_adaptive_matching(config):
+        day_margin, amount_margin = get_matching_margins(config)
+        adaptive = adaptive_search(
+            candidates=claimed_index.prefer_unclaimed(search.in_window),
+            receipt_date=receipt_date,
+            net_amount=net_amount,
+            max_days=day_margin,
+            max_amount_margin=amount_margin,
+        )
+        if adaptive is not None:
+            candidates = [adaptive.transaction]
+            indent = tui.indentation_spaces * " "
+            tui.error_display.base_widget.contents[1][0].set_text(
+                (
+                    "matched",
+                    (
+                        f"{indent}Matched within -{adaptive.days_before}/"
+                        f"+{adaptive.days_after} days and"
+                        f" {adaptive.amount_margin:.0%} of the amount."
+                    ),
+                )
+            )
 
     if len(candidates) == 1:
         # Unique match -- green.
-        amount_inp.set_attr_map({None: "matched"})
-        if change_inp is not None:
-            change_inp.set_attr_map({None: "matched"})
+        portion.set_attr("matched")
         _remove_match_choice(tui=tui)
         logger.info(
             "Amount match: %.2f matched CSV transaction",
@@ -1202,12 +1389,11 @@ def _try_non_withdrawal_amount_match(
             status="matched",
             candidate_count=1,
             candidates=candidates,
+            adaptive=adaptive,
         )
 
     # No match or ambiguous -- red.
-    amount_inp.set_attr_map({None: "error"})
-    if change_inp is not None:
-        change_inp.set_attr_map({None: "error"})
+    portion.set_attr("error")
 
     status = "ambiguous" if len(candidates) > 1 else "no_match"
     logger.info(
@@ -1216,13 +1402,200 @@ def _try_non_withdrawal_amount_match(
         len(candidates),
     )
 
+    # Rank the amount matches, or when there are none every transaction
+    # in the date window, such that one keystroke can pick the right one.
+    day_margin, amount_margin = get_matching_margins(config)
+    tui.ranked_candidates = rank_candidates(
+        candidates=candidates or search.in_window,
+        receipt_date=receipt_date,
+        net_amount=net_amount,
+        currency=portion.currency,
+        claimed_keys=claimed_index.keys,
+        day_margin=day_margin,
+        amount_margin=amount_margin,
+    )
+    _update_ranked_candidates_sidebar(tui=tui)
+
     # Inject the match choice widget if not already present.
-    _inject_match_choice(tui=tui, candidate_count=len(candidates))
+    _inject_match_choice(
+        tui=tui,
+        candidate_count=len(candidates),
+        ranked_count=len(tui.ranked_candidates),
+    )
 
     return AmountMatchResult(
         status=status,
         candidate_count=len(candidates),
         candidates=candidates,
+        ranked=tui.ranked_candidates,
+    )
+
+
+def _update_ranked_candidates_sidebar(*, tui: "QuestionnaireApp") -> None:
+    """List the ranked CSV candidates in the sidebar error panel."""
+    indent = tui.indentation_spaces * " "
+    if not tui.ranked_candidates:
+        msg = f"{indent}No CSV transactions near the receipt date."
+    else:
+        msg = (
+            f"{indent}No unique CSV match. Press a number to pick:\n"
+            + format_ranked_candidates(
+                ranked=tui.ranked_candidates, indent=indent
+            )
+        )
+    tui.error_display.base_widget.contents[1][0].set_text(("error", msg))
+
+
+def pin_match(
+    *, tui: "QuestionnaireApp", account_str: str, transaction: Transaction
+) -> None:
+    """Pin *transaction* as the match of the portion paid from
+    *account_str*, until its amount is changed."""
+    tui.pinned_matches[account_str] = transaction
+    tui.pinned_amounts.pop(account_str, None)
+
+
+def _resolve_ranked_candidate(*, tui: "QuestionnaireApp", choice: str) -> None:
+    """Pin the ranked candidate the user picked and copy its amount.
+
+    The amount fields are overwritten only when the entered amount does
+    not already match the candidate (e.g. a typo), such that a correct
+    paid/change split is kept.
+    """
+    index = int(choice) - 1
+    if not 0 <= index < len(tui.ranked_candidates):
+        return
+    picked = tui.ranked_candidates[index]
+    _, portions = _collect_account_portions(tui=tui)
+    if len(portions) != 1 or portions[0].account_str is None:
+        return
+    portion = portions[0]
+    pin_match(
+        tui=tui,
+        account_str=portion.account_str,
+        transaction=picked.transaction,
+    )
+
+    txn_net = get_net_amount(picked.transaction)
+    if round(txn_net, 2) != round(portion.net_amount, 2):
+        if portion.amount_inp is not None:
+            portion.amount_inp.base_widget.set_answer(txn_net)
+        if portion.change_inp is not None:
+            portion.change_inp.base_widget.set_answer(0.0)
+    logger.info(
+        "Amount match: picked ranked candidate %d (%s, %.2f)",
+        index + 1,
+        picked.transaction.the_date,
+        txn_net,
+    )
+
+
+def _try_split_payment_match(
+    *,
+    tui: "QuestionnaireApp",
+    config: "Config",
+    csv_transactions_per_account: Mapping[
+        AccountConfig, Mapping[int, List[Transaction]]
+    ],
+    receipt_date: datetime,
+    portions: List[_AccountPortion],
+) -> Optional[AmountMatchResult]:
+    """Validate a receipt that was paid from several accounts.
+
+    Each CSV-backed portion is checked against its own account's CSV.
+    The split as a whole matches when exactly one combination of one
+    CSV transaction per account sums to the total paid from those
+    accounts.  Portions paid from accounts without CSV are not
+    validated.
+    """
+    csv_portions: List[Tuple[_AccountPortion, AccountConfig]] = []
+    for portion in portions:
+        if (
+            portion.account_str is None
+            or portion.amount_paid is None
+            or portion.amount_inp is None
+        ):
+            _remove_match_choice(tui=tui)
+            return None
+        ac = _get_csv_account_config(
+            csv_transactions_per_account=csv_transactions_per_account,
+            account_str=portion.account_str,
+        )
+        if ac is not None:
+            csv_portions.append((portion, ac))
+
+    if not csv_portions:
+        _remove_match_choice(tui=tui)
+        return None
+
+    _, amount_margin = get_matching_margins(config)
+    claimed_index = get_claimed_index(tui.labelled_receipts)
+    shortlists: List[List[Transaction]] = []
+    portion_matches: List[List[Transaction]] = []
+    for portion, ac in csv_portions:
+        search = find_candidates(
+            csv_transactions_per_account=csv_transactions_per_account,
+            account_config=ac,
+            config=config,
+            receipt_date=receipt_date,
+            net_amount=portion.net_amount,
+        )
+        matches = claimed_index.prefer_unclaimed(search.matching)
+        portion_matches.append(matches)
+        # A portion is paid by a transaction of its own amount; only for
+        # a portion without one, the total decides among the window.
+        shortlists.append(
+            get_shortlist(
+                candidates=matches
+                or claimed_index.prefer_unclaimed(search.in_window),
+                net_amount=portion.net_amount,
+                size=MAX_SHORTLIST,
+            )
+        )
+
+    total = sum(portion.net_amount for portion, _ in csv_portions)
+    split = SplitMatchResult(
+        portion_candidates=portion_matches,
+        combinations=find_split_combinations(
+            shortlists=shortlists,
+            total=total,
+            amount_margin=amount_margin,
+        ),
+    )
+
+    if len(split.combinations) == 1:
+        for portion, _ in csv_portions:
+            portion.set_attr("matched")
+        _remove_match_choice(tui=tui)
+        logger.info(
+            "Split amount match: %.2f over %d accounts matched CSV",
+            total,
+            len(csv_portions),
+        )
+        return AmountMatchResult(
+            status="matched",
+            candidate_count=1,
+            candidates=list(split.combinations[0]),
+            combinations=split.combinations,
+        )
+
+    # Point out which portions do not match their own account's CSV.
+    for (portion, _), matches in zip(csv_portions, split.portion_candidates):
+        portion.set_attr("matched" if len(matches) == 1 else "error")
+
+    status = "ambiguous" if len(split.combinations) > 1 else "no_match"
+    logger.info(
+        "Split amount match: %.2f over %d accounts did not uniquely match",
+        total,
+        len(csv_portions),
+    )
+    tui.ranked_candidates = []
+    _inject_match_choice(tui=tui, candidate_count=len(split.combinations))
+    return AmountMatchResult(
+        status=status,
+        candidate_count=len(split.combinations),
+        candidates=[txn for combo in split.combinations for txn in combo],
+        combinations=split.combinations,
     )
 
 
@@ -1230,9 +1603,18 @@ def _inject_match_choice(
     *,
     tui: "QuestionnaireApp",
     candidate_count: int,
+    ranked_count: int = 0,
 ) -> None:
     """Inject the 'No unique CSV match' choice widget after 'Add another
-    account (y/n)?' if not already present."""
+    account (y/n)?' if not already present.
+
+    The first *ranked_count* choices are the numbers of the ranked
+    candidates in the sidebar, so typing a number picks that candidate.
+    """
+    choices = [str(nr) for nr in range(1, ranked_count + 1)] + [
+        "Correct amounts/dates",
+        MATCH_ASSISTANT_CHOICE,
+    ]
     # Check if already present.
     for inp in tui.inputs:
         w = inp if not isinstance(inp, AttrMap) else inp.base_widget
@@ -1240,7 +1622,11 @@ def _inject_match_choice(
             hasattr(w, "question_data")
             and w.question_data.question == MATCH_CHOICE_QUESTION
         ):
-            return  # Already injected.
+            if w.question_data.choices == choices:
+                return  # Already injected.
+            # The ranked candidates changed, rebuild with the new choices.
+            _remove_match_choice(tui=tui)
+            break
 
     # Find insert position: after the last "Add another account (y/n)?".
     insert_idx = None
@@ -1258,10 +1644,7 @@ def _inject_match_choice(
     # Build choice widget.
     q_data = HorizontalMultipleChoiceQuestionData(
         question=MATCH_CHOICE_QUESTION,
-        choices=[
-            "Correct amounts/dates",
-            "Enter matching CLI",
-        ],
+        choices=choices,
         ai_suggestions=[],
         ans_required=True,
         reconfigurer=True,
@@ -1365,6 +1748,26 @@ def _remove_match_choice(*, tui: "QuestionnaireApp") -> None:
     tui.pile.contents = pile_contents
 
 
+@typechecked
+def keep_match_state(
+    *, previous: "QuestionnaireApp", tui: "QuestionnaireApp"
+) -> "QuestionnaireApp":
+    """Carry the CSV match state and the reconfigurer hook of *previous*
+    over to *tui* if the questionnaire was rebuilt into a new app.
+
+    Without it, the pinned matches, the ranked candidates, the prefilled
+    answers and the hook that opens the matching assistant are lost after
+    e.g. adding an account or toggling the withdrawal questions.
+    """
+    if tui is not previous:
+        tui.pinned_matches = previous.pinned_matches
+        tui.pinned_amounts = previous.pinned_amounts
+        tui.ranked_candidates = previous.ranked_candidates
+        tui.prefilled_answers = previous.prefilled_answers
+        tui.on_reconfigurer = previous.on_reconfigurer
+    return tui
+
+
 @typechecked
 def get_configuration(
     tui: "QuestionnaireApp",
@@ -1374,7 +1777,7 @@ def get_configuration(
     withdrawal_questions: Optional["WithdrawalQuestions"] = None,
     config: Optional["Config"] = None,
     csv_transactions_per_account: Optional[
-        Dict[AccountConfig, Dict[int, List[Transaction]]]
+        Mapping[AccountConfig, Mapping[int, List[Transaction]]]
     ] = None,
     prefilled_receipt: Optional[Receipt] = None,
 ) -> "QuestionnaireApp":
@@ -1392,18 +1795,24 @@ def get_configuration(
     is_address_selector_focused: bool = is_at_address_selector(tui=tui)
     # Handle manual address questions if the address selector is focused
     if is_address_selector_focused:
-        tui = handle_manual_address_questions(
-            tui=tui,
-            optional_questions=optional_questions,
-            current_questions=tui.inputs,
-            preserved_answers=preserved_answers,
+        tui = keep_match_state(
+            previous=tui,
+            tui=handle_manual_address_questions(
+                tui=tui,
+                optional_questions=optional_questions,
+                current_questions=tui.inputs,
+                preserved_answers=preserved_answers,
+            ),
         )
         # Remove manual address questions if a non-manual address is selected
-        tui = remove_manual_address_questions(
-            tui=tui,
-            optional_questions=optional_questions,
-            current_questions=tui.inputs,
-            preserved_answers=preserved_answers,
+        tui = keep_match_state(
+            previous=tui,
+            tui=remove_manual_address_questions(
+                tui=tui,
+                optional_questions=optional_questions,
+                current_questions=tui.inputs,
+                preserved_answers=preserved_answers,
+            ),
         )
 
     # Handle withdrawal toggle reconfigurer.
@@ -1412,12 +1821,15 @@ def get_configuration(
             question_str == WITHDRAWAL_TOGGLE_QUESTION
             and withdrawal_questions is not None
         ):
-            tui = handle_withdrawal_toggle(
-                tui=tui,
-                withdrawal_questions=withdrawal_questions,
-                preserved_answers=preserve_current_answers(tui=tui),
-                labelled_receipts=labelled_receipts,
-                toggle_answer=str(answer),
+            tui = keep_match_state(
+                previous=tui,
+                tui=handle_withdrawal_toggle(
+                    tui=tui,
+                    withdrawal_questions=withdrawal_questions,
+                    preserved_answers=preserve_current_answers(tui=tui),
+                    labelled_receipts=labelled_receipts,
+                    toggle_answer=str(answer),
+                ),
             )
             # Prefill withdrawal questions from existing receipt metadata.
             if (
@@ -1463,12 +1875,15 @@ def get_configuration(
 
         if answer == "y" and not has_later_reconfig:
             # Add a new block of account questions
-            return handle_add_account(
-                account_questions_to_add=account_questions,
-                current_questions=current_questions,
-                preserved_answers=preserved_answers,
-                selected_accounts=selected_accounts,
-                labelled_receipts=labelled_receipts,
+            return keep_match_state(
+                previous=tui,
+                tui=handle_add_account(
+                    account_questions_to_add=account_questions,
+                    current_questions=current_questions,
+                    preserved_answers=preserved_answers,
+                    selected_accounts=selected_accounts,
+                    labelled_receipts=labelled_receipts,
+                ),
             )
         elif answer == "y" and has_later_reconfig:
             pass
@@ -1493,11 +1908,14 @@ def get_configuration(
                 _has_withdrawal_questions(tui=tui)
                 and withdrawal_questions is not None
             ):
-                tui = handle_post_account_withdrawal_questions(
-                    tui=tui,
-                    withdrawal_questions=withdrawal_questions,
-                    preserved_answers=preserve_current_answers(tui=tui),
-                    labelled_receipts=labelled_receipts,
+                tui = keep_match_state(
+                    previous=tui,
+                    tui=handle_post_account_withdrawal_questions(
+                        tui=tui,
+                        withdrawal_questions=withdrawal_questions,
+                        preserved_answers=preserve_current_answers(tui=tui),
+                        labelled_receipts=labelled_receipts,
+                    ),
                 )
                 # Prefill post-account withdrawal answers from metadata.
                 if (
@@ -1511,11 +1929,14 @@ def get_configuration(
                 preserved_answers = preserve_current_answers(tui=tui)
 
             if has_later_reconfig:
-                tui = handle_optional_questions(
-                    tui=tui,
-                    optional_questions=optional_questions,
-                    current_questions=tui.inputs,
-                    preserved_answers=preserved_answers,
+                tui = keep_match_state(
+                    previous=tui,
+                    tui=handle_optional_questions(
+                        tui=tui,
+                        optional_questions=optional_questions,
+                        current_questions=tui.inputs,
+                        preserved_answers=preserved_answers,
+                    ),
                 )
 
     # Re-check post-account withdrawal questions on every pass (handles
@@ -1525,11 +1946,14 @@ def get_configuration(
         and _has_post_account_withdrawal_questions(tui=tui)
         and withdrawal_questions is not None
     ):
-        tui = handle_post_account_withdrawal_questions(
-            tui=tui,
-            withdrawal_questions=withdrawal_questions,
-            preserved_answers=preserve_current_answers(tui=tui),
-            labelled_receipts=labelled_receipts,
+        tui = keep_match_state(
+            previous=tui,
+            tui=handle_post_account_withdrawal_questions(
+                tui=tui,
+                withdrawal_questions=withdrawal_questions,
+                preserved_answers=preserve_current_answers(tui=tui),
+                labelled_receipts=labelled_receipts,
+            ),
         )
         if (
             prefilled_receipt is not None
@@ -1549,30 +1973,249 @@ def get_configuration(
                 # to the amount field naturally.
                 _remove_match_choice(tui=tui)
                 preserved_answers = preserve_current_answers(tui=tui)
-            # "Enter matching CLI" is handled in ask_urwid_receipt.py
-            # (the while-loop detects the answer and suspends urwid).
+            elif str(answer).isdigit():
+                # A ranked candidate was picked from the sidebar list.
+                _resolve_ranked_candidate(tui=tui, choice=str(answer))
+                _remove_match_choice(tui=tui)
+                preserved_answers = preserve_current_answers(tui=tui)
+            # MATCH_ASSISTANT_CHOICE opens an overlay from the running main
+            # loop, see ask_urwid_receipt.py.
 
     # Set focus to the next unanswered question
     tui = set_default_focus_and_answers(tui, preserved_answers)
 
+    # Runs last so it re-applies after any TUI rebuild (e.g. manual
+    # address questions creating new widgets).
+    refresh_csv_match(
+        tui=tui,
+        config=config,
+        csv_transactions_per_account=csv_transactions_per_account,
+    )
+
+    return tui
+
+
+def refresh_csv_match(
+    *,
+    tui: "QuestionnaireApp",
+    config: Optional["Config"],
+    csv_transactions_per_account: Optional[
+        Mapping[AccountConfig, Mapping[int, List[Transaction]]]
+    ],
+) -> None:
+    """Re-validate the receipt against the CSVs after its answers changed.
+
+    Also called from inside the main loop, e.g. when the matching
+    assistant resolved a match, without a full reconfiguration.
+    """
     # Issue 8: Validate that the selected account's CSV covers the
-    # receipt date.  Runs last so it re-applies after any TUI rebuild
-    # (e.g. manual address questions creating new widgets).
+    # receipt date.
     _validate_account_date_range(
         tui=tui,
         csv_transactions_per_account=csv_transactions_per_account,
     )
 
     # Issue 7: Check if the entered amount matches a CSV transaction
-    # (non-withdrawal receipts only).  Runs last for the same reason.
+    # (non-withdrawal receipts only).
     if not _has_withdrawal_questions(tui=tui):
         _try_non_withdrawal_amount_match(
             tui=tui,
             config=config,
             csv_transactions_per_account=csv_transactions_per_account,
         )
+    else:
+        # Again once the exchange rate question is injected, such that
+        # it is pre-filled; the candidate search is memoized.
+        _try_background_withdrawal_match(
+            tui=tui,
+            config=config,
+            csv_transactions_per_account=csv_transactions_per_account,
+        )
+    _update_live_matcher(
+        tui=tui,
+        config=config,
+        csv_transactions_per_account=csv_transactions_per_account,
+    )
+    _rank_account_choices(
+        tui=tui,
+        config=config,
+        csv_transactions_per_account=csv_transactions_per_account,
+    )
 
-    return tui
+
+def _rank_account_choices(
+    *,
+    tui: "QuestionnaireApp",
+    config: Optional["Config"],
+    csv_transactions_per_account: Optional[
+        Mapping[AccountConfig, Mapping[int, List[Transaction]]]
+    ],
+) -> None:
+    """Move the accounts with a CSV transaction matching the receipt date
+    and the entered amount to the top of their "Belongs to" question.
+
+    The matches are annotated next to the choices, such that the paying
+    account is found without trying the accounts one by one.
+    """
+    if csv_transactions_per_account is None or _has_withdrawal_questions(
+        tui=tui
+    ):
+        return
+    receipt_date, portions = _collect_account_portions(tui=tui)
+    claimed_index = get_claimed_index(tui.labelled_receipts)
+    for portion in portions:
+        if portion.account_inp is None:
+            continue
+        widget = portion.account_inp.base_widget
+        extra_data = widget.question_data.extra_data or {}
+        unranked = extra_data.get("unranked_choices")
+        if unranked is None:
+            unranked = list(widget.question_data.choices)
+
+        matches = []
+        if receipt_date is not None and portion.amount_paid is not None:
+            matches = find_matching_accounts(
+                csv_transactions_per_account=csv_transactions_per_account,
+                config=config,
+                receipt_date=receipt_date,
+                net_amount=portion.net_amount,
+                claimed_index=claimed_index,
+            )
+        choices = order_account_choices(choices=unranked, matches=matches)
+        annotations = get_account_annotations(matches)
+        if (
+            choices == widget.question_data.choices
+            and annotations == extra_data.get("annotations", {})
+        ):
+            continue
+
+        # The answer is an index into the choices, keep it by value.
+        answer = widget.get_answer() if widget.has_answer() else None
+        # The question data is shared with the questions the next
+        # receipt is built from, so the ranking goes on a copy.
+        question_data = copy.copy(widget.question_data)
+        question_data.choices = choices
+        question_data.extra_data = {
+            **extra_data,
+            "unranked_choices": unranked,
+            "annotations": annotations,
+        }
+        widget.question_data = question_data
+        widget.set_edit_text("")
+        widget.refresh_choices()
+        if answer is not None:
+            widget.set_answer(answer)
+
+
+def _update_live_matcher(
+    *,
+    tui: "QuestionnaireApp",
+    config: Optional["Config"],
+    csv_transactions_per_account: Optional[
+        Mapping[AccountConfig, Mapping[int, List[Transaction]]]
+    ],
+) -> None:
+    """Shortlist the account's date window as soon as the account and
+    the receipt date are known, and filter it while the amount is typed.
+
+    Only receipts paid from one CSV-backed account get live feedback.
+    """
+    receipt_date, portions = _collect_account_portions(tui=tui)
+    if (
+        config is None
+        or csv_transactions_per_account is None
+        or receipt_date is None
+        or len(portions) != 1
+        or portions[0].account_str is None
+        or _has_withdrawal_questions(tui=tui)
+    ):
+        tui.live_matcher = None
+        return
+    account_config = _get_csv_account_config(
+        csv_transactions_per_account=csv_transactions_per_account,
+        account_str=portions[0].account_str,
+    )
+    if account_config is None:
+        tui.live_matcher = None
+        return
+
+    key = (portions[0].account_str, receipt_date, get_matching_margins(config))
+    if tui.live_matcher is None or tui.live_matcher.key != key:
+        search = find_candidates(
+            csv_transactions_per_account=csv_transactions_per_account,
+            account_config=account_config,
+            config=config,
+            receipt_date=receipt_date,
+            net_amount=None,
+        )
+        _, amount_margin = get_matching_margins(config)
+        tui.live_matcher = LiveMatcher(
+            key=key,
+            receipt_date=receipt_date,
+            candidates=get_claimed_index(
+                tui.labelled_receipts
+            ).prefer_unclaimed(search.in_window),
+            amount_margin=amount_margin,
+        )
+
+    # The amount questions are recreated on reconfiguration; connecting
+    # again is a no-op for widgets that are already connected.
+    for inp in tui.inputs:
+        w = inp.base_widget
+        if w.question_data.question in (
+            AMOUNT_PAID_QUESTION,
+            CHANGE_RETURNED_QUESTION,
+        ):
+            urwid.disconnect_signal(
+                w, "postchange", _on_live_amount_change, user_args=[tui]
+            )
+            urwid.connect_signal(
+                w, "postchange", _on_live_amount_change, user_args=[tui]
+            )
+
+
+def _on_live_amount_change(
+    tui: "QuestionnaireApp", widget: urwid.Edit, old_text: str
+) -> None:
+    """Show the live match of the amount typed so far."""
+    if tui.live_matcher is None:
+        return
+    _, portions = _collect_account_portions(tui=tui)
+    if len(portions) != 1 or portions[0].amount_inp is None:
+        return
+    portion = portions[0]
+    change_returned = portion.change_returned or 0.0
+    if widget.question_data.question == CHANGE_RETURNED_QUESTION:
+        # Typing in the change field: parse what is there so far.
+        try:
+            change_returned = float(widget.get_edit_text() or 0)
+        except ValueError:
+            return
+    amount_text = portion.amount_inp.base_widget.get_edit_text()
+    status = tui.live_matcher.update(
+        amount_text=amount_text, change_returned=change_returned
+    )
+
+    if len(status.matching) == 1:
+        portion.set_attr("matched")
+    elif status.candidate_count == 0 and amount_text:
+        portion.set_attr("error")
+    else:
+        portion.set_attr("normal")
+
+    indent = tui.indentation_spaces * " "
+    count = f"{status.candidate_count}{'' if status.complete else '+'}"
+    msg = f"{indent}Live: {count} candidate(s), {len(status.matching)} matching"
+    if status.best is not None:
+        best = status.best
+        msg += (
+            f"\n{indent}Best: {best.the_date:%Y-%m-%d}"
+            f" {get_net_amount(best):.2f}"
+        )
+        description = getattr(best, "description", None)
+        if description:
+            msg += f" {description}"
+    tui.error_display.base_widget.contents[1][0].set_text(("error", msg))
 
 
 @typechecked
@@ -1,10 +1,16 @@
+from itertools import count
 from typing import Dict, List, Optional, Union
 
 from hledger_core.AISuggestion import AISuggestion  # noqa: F401
 from urwid import AttrMap
 
+from tui_labeller.tuis.urwid.input_validation.CategoryTrie import (
+    CategoryTrie,
+)
 from tui_labeller.tuis.urwid.input_validation.InputType import InputType
 
+_VERSIONS = count(1)
+
 
 class HistorySuggestion:
     def __init__(self, question: str, frequency: int):
@@ -45,6 +51,8 @@ class InputValidationQuestionData:
         default: Optional[str] = None,
         question_id: Optional[str] = None,
         custom_validator: Optional[callable] = None,
+        fuzzy_autocomplete: bool = False,
+        category_trie: Optional[CategoryTrie] = None,
     ):
         self.question: str = question
         self.input_type = input_type
@@ -56,6 +64,10 @@ class InputValidationQuestionData:
         self.default: str = default
         self.question_id: Union[None, str] = question_id
         self.custom_validator: Optional[callable] = custom_validator
+        # Suggest close matches when a typo leaves no prefix match.
+        self.fuzzy_autocomplete: bool = fuzzy_autocomplete
+        # Completes the answer segment by segment, from the namespace.
+        self.category_trie: Optional[CategoryTrie] = category_trie
 
 
 class VerticalMultipleChoiceQuestionData:
@@ -83,6 +95,36 @@ class VerticalMultipleChoiceQuestionData:
         self.navigation_display: Union[None, AttrMap] = navigation_display
         self.extra_data: Optional[Dict] = extra_data
 
+    # Replacing the choices, suggestions or extra data (annotations) gives
+    # them a new, session-unique version, the key of the cached caption
+    # lines of the multiple-choice helpers.
+    @property
+    def choices(self) -> List[str]:
+        return self._choices
+
+    @choices.setter
+    def choices(self, choices: List[str]) -> None:
+        self._choices = choices
+        self.choices_version: int = next(_VERSIONS)
+
+    @property
+    def ai_suggestions(self) -> List[AISuggestion]:
+        return self._ai_suggestions
+
+    @ai_suggestions.setter
+    def ai_suggestions(self, ai_suggestions: List[AISuggestion]) -> None:
+        self._ai_suggestions = ai_suggestions
+        self.suggestions_version: int = next(_VERSIONS)
+
+    @property
+    def extra_data(self) -> Optional[Dict]:
+        return self._extra_data
+
+    @extra_data.setter
+    def extra_data(self, extra_data: Optional[Dict]) -> None:
+        self._extra_data = extra_data
+        self.suggestions_version: int = next(_VERSIONS)
+
 
 class HorizontalMultipleChoiceQuestionData:
     def __init__(
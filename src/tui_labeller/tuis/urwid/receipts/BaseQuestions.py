@@ -2,6 +2,9 @@ from typing import Dict, List, Optional, Union
 
 from typeguard import typechecked
 
+from tui_labeller.tuis.urwid.input_validation.CategoryTrie import (
+    get_category_trie,
+)
 from tui_labeller.tuis.urwid.input_validation.InputType import InputType
 from tui_labeller.tuis.urwid.question_data_classes import (
     AISuggestion,
@@ -12,11 +15,12 @@ from tui_labeller.tuis.urwid.question_data_classes import (
 
 
 def validate_category(value: str) -> Optional[str]:
-    """Validate the category input.
+    """Validate the category input against the configured category
+    namespace, if there is one.
 
     Returns None if valid, or an error message string if invalid.
     """
-    return None
+    return get_category_trie().validate(value)
 
 
 class BaseQuestions:
@@ -77,6 +81,8 @@ class BaseQuestions:
             reconfigurer=True,
             terminator=False,
             custom_validator=validate_category,
+            fuzzy_autocomplete=True,
+            category_trie=get_category_trie(),
         )
 
     def verify_unique_questions(self, questions):
@@ -58,6 +58,9 @@ class OptionalQuestions:
                             urwid.Text("Q          - quit"),
                             urwid.Text("Up/Down    - scroll through addresses"),
                             urwid.Text("Type a number to select that answer."),
+                            urwid.Text(
+                                "Letters    - filter by shop, street or city."
+                            ),
                             urwid.Text(
                                 "Enter      - confirm choice, goto next"
                                 " question."
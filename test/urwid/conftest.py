@@ -0,0 +1,14 @@
+import pytest
+
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    open_history_store,
+    reset_history_store,
+)
+
+
+@pytest.fixture(autouse=True)
+def history_store(tmp_path):
+    """Each test gets its own answer history, never the user's."""
+    store = open_history_store(path=str(tmp_path / "answer_history.json"))
+    yield store
+    reset_history_store()
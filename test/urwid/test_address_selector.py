@@ -0,0 +1,157 @@
+"""Tests for the virtualized, filterable shop address selector.
+
+Scenarios:
+  1. The window of a scrollable list renders the same caption as
+     get_vc_question_with_highlight.
+  2. The search finds choices by a word prefix of the shop name, street
+     or city, every typed word must match, best ranked choices first.
+  3. Typing letters in the address selector filters the addresses and
+     selects the best match; the arrows scroll through the matches,
+     backspace widens and escape clears the filter.
+  4. Scrolling and filtering thousands of addresses stays fast.
+"""
+
+import time
+
+import urwid
+from hledger_core.TransactionObjects.Address import Address
+from hledger_core.TransactionObjects.ShopId import ShopId
+
+from tui_labeller.tuis.urwid.multiple_choice_question.helper import (
+    get_vc_question_with_highlight,
+)
+from tui_labeller.tuis.urwid.multiple_choice_question.VerticalMultipleChoiceWidget import (  # noqa: E501
+    MAX_VISIBLE_ADDRESSES,
+    VerticalMultipleChoiceWidget,
+)
+from tui_labeller.tuis.urwid.multiple_choice_question.VirtualChoiceList import (  # noqa: E501
+    VirtualChoiceList,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    VerticalMultipleChoiceQuestionData,
+)
+
+SHOPS = [
+    ("ah", "Main street", "Delft"),
+    ("jumbo", "Market", "Delft"),
+    ("hema", "Main street", "Leiden"),
+    ("ah", "Station road", "Leiden"),
+    ("blokker", "Market", "Den Haag"),
+]
+
+
+def _make_question_data(shops):
+    shop_ids = [ShopId(name="manual address", address=Address())]
+    choices = ["manual address"]
+    for name, street, city in shops:
+        shop_ids.append(
+            ShopId(name=name, address=Address(street=street, city=city))
+        )
+        choices.append(f"{name}: {street} {city}")
+    return VerticalMultipleChoiceQuestionData(
+        question="Select Shop Address:",
+        choices=choices,
+        nr_of_ans_per_batch=12,
+        ans_required=True,
+        reconfigurer=True,
+        terminator=False,
+        ai_suggestions=[],
+        question_id="address_selector",
+        extra_data={"shop_ids": shop_ids, "scrollable": True},
+    )
+
+
+def _make_widget(shops):
+    widget = VerticalMultipleChoiceWidget(
+        question_data=_make_question_data(shops)
+    )
+    widget.owner = urwid.AttrMap(widget, "normal")
+    return widget
+
+
+def _type(widget, keys):
+    for key in keys:
+        widget.keypress((80,), key)
+
+
+class TestAddressSelector:
+
+    def test_window_matches_full_render(self):
+        question_data = _make_question_data(SHOPS * 5)
+        choice_list = VirtualChoiceList(1)
+
+        for highlighted_index in (0, 1, 7, 14, 25):
+            assert choice_list.render(
+                vc_question_data=question_data,
+                highlighted_index=highlighted_index,
+                window_size=8,
+            ) == get_vc_question_with_highlight(
+                vc_question_data=question_data,
+                indentation=1,
+                highlighted_index=highlighted_index,
+                window_size=8,
+            )
+
+    def test_search_by_name_street_or_city(self):
+        question_data = _make_question_data(SHOPS)
+        choice_list = VirtualChoiceList(1)
+
+        def search(text):
+            return choice_list.search(vc_question_data=question_data, text=text)
+
+        assert search("ah") == [1, 4]
+        assert search("main") == [1, 3]
+        assert search("LEI") == [3, 4]
+        assert search("ah leid") == [4]
+        assert search("mar den") == [5]
+        assert search("aldi") == []
+
+    def test_type_to_filter(self):
+        widget = _make_widget(SHOPS)
+
+        _type(widget, "lei")
+        assert widget.get_edit_text() == "3"
+        assert "Filter: lei (2 matches)" in widget.caption
+        assert "jumbo" not in widget.caption
+        assert "> 3 hema: Main street Leiden" in widget.caption
+
+        _type(widget, ["down"])
+        assert widget.get_edit_text() == "4"
+        _type(widget, ["down"])
+        assert widget.get_edit_text() == "3"
+
+        _type(widget, " ah")
+        assert widget.get_edit_text() == "4"
+        assert widget.keypress((80,), "enter") == "reconfigurer"
+        assert widget.get_answer() == "ah: Station road Leiden"
+
+        _type(widget, "x")
+        assert widget.get_edit_text() == ""
+        assert "(0 matches)" in widget.caption
+        _type(widget, ["backspace"])
+        assert widget.get_edit_text() == "4"
+        _type(widget, ["esc"])
+        assert "Filter" not in widget.caption
+        assert "jumbo" in widget.caption
+
+    def test_large_list_benchmark(self):
+        cities = ["Delft", "Leiden", "Den Haag", "Gouda", "Breda"]
+        shops = [
+            (f"shop{i}", f"street{i % 400}", cities[i % 5])
+            for i in range(5_000)
+        ]
+        widget = _make_widget(shops)
+
+        start = time.perf_counter()
+        _type(widget, ["down"] * 200)
+        scroll_time = (time.perf_counter() - start) / 200
+        start = time.perf_counter()
+        _type(widget, "gouda street")
+        filter_time = (time.perf_counter() - start) / 12
+
+        print(f"scroll: {scroll_time * 1000:.2f} ms per key")
+        print(f"filter: {filter_time * 1000:.2f} ms per key")
+        assert widget.get_edit_text() == "4"
+        assert widget.caption.count("\n") <= MAX_VISIBLE_ADDRESSES + 3
+        assert scroll_time < 0.005
+        assert filter_time < 0.05
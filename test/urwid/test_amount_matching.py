@@ -20,11 +20,65 @@ Scenarios (return values and match choice widget):
   12. DateRangeResult status reflects date coverage.
   13. Mismatch injects choice widget after "Add another account".
   14. Match removes choice widget if present.
+
+Scenarios (candidate search memo):
+  15. Repeating the same query is served from the memo.
+  16. Changing the CSV data or matching_algo invalidates the memo.
+
+Scenarios (split payments over several accounts):
+  17. One transaction per account sums to the total → all green. Two
+      portions paid from one account match once, not once per order.
+      Rows of other amounts that happen to add up to the total do not
+      make the split ambiguous.
+  18. A portion without matching transaction → that portion red.
+
+Scenarios (ranked candidates):
+  19. Ambiguous candidates are ranked by date distance and listed in the
+      sidebar, with one numbered choice per candidate.
+  20. Transactions claimed by a labelled receipt rank last.
+  21. Picking a ranked candidate resolves the ambiguous match, until the
+      amount is corrected.
+
+Scenarios (claimed transactions):
+  22. A transaction claimed by a labelled receipt is skipped, which
+      resolves two identical payments in one week.
+  23. When every candidate is claimed they are kept (relabelling).
+      Two payments of one amount on one day are two claims, and a
+      relabelled receipt does not claim its own transaction.
+  24. The claimed index grows with the labelled receipts list and with
+      finished receipts.
+
+Scenarios (adaptive matching):
+  25. Ambiguous at the configured margins, unique at tighter ones; the
+      needed margins are reported.
+  26. The window grows faster after the receipt date than before it.
+  27. Nothing beyond the configured maxima is matched.
+
+Scenarios (live feedback while typing):
+  28. Each keystroke in the amount field narrows the shortlist; the
+      count and best match show in the sidebar, a mismatch turns red
+      before the field is left.
+  29. Typing the change returned matches the net amount.
+  30. A keystroke that runs out of budget keeps the unfiltered rest.
+
+Scenarios (account reverse lookup):
+  31. The accounts with a transaction matching the date and amount move
+      to the top of "Belongs to", annotated; the answer is kept.
+  32. Unique matches rank before ambiguous ones, accounts without CSV
+      are skipped.
+  33. Once nothing matches, the original order is restored.
+
+Scenarios (unlabelled transaction queue):
+  34. Transactions claimed by labelled receipts and accounts without CSV
+      are left out; larger and older transactions come first, incoming
+      ones after all debits.
+  35. A queued transaction pre-seeds the receipt's date, account and
+      amount, and is pinned as its match.
 """
 
 from datetime import datetime
 from types import SimpleNamespace
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import pytest
 import urwid
@@ -35,15 +89,32 @@ from hledger_core.TransactionObjects.Account import Account
 from hledger_core.TransactionObjects.AccountTransaction import (
     AccountTransaction,
 )
+from hledger_core.TransactionObjects.ExchangedItem import ExchangedItem
+from hledger_core.TransactionObjects.Receipt import Receipt
 
+from tui_labeller.tuis.urwid.ask_urwid_receipt import _seed_match_target
 from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.matching.account_lookup import (
+    find_matching_accounts,
+)
+from tui_labeller.tuis.urwid.matching.candidate_search import MATCH_MEMO
+from tui_labeller.tuis.urwid.matching.ClaimedIndex import (
+    ClaimedIndex,
+    get_claimed_index,
+)
+from tui_labeller.tuis.urwid.matching.LiveMatcher import LiveMatcher
+from tui_labeller.tuis.urwid.matching.unlabelled_queue import (
+    get_unlabelled_queue,
+)
 from tui_labeller.tuis.urwid.question_app.generator import (
     create_questionnaire,
 )
 from tui_labeller.tuis.urwid.question_app.reconfiguration.reconfiguration import (  # noqa: E501
     MATCH_CHOICE_QUESTION,
+    _resolve_ranked_candidate,
     _try_non_withdrawal_amount_match,
     _validate_account_date_range,
+    refresh_csv_match,
 )
 from tui_labeller.tuis.urwid.question_data_classes import (
     DateQuestionData,
@@ -109,6 +180,20 @@ def _make_transaction(
     )
 
 
+def _make_labelled_receipt(
+    account: Account, the_date: datetime, amount: float
+) -> Receipt:
+    """Labelled receipt claiming one transaction of *account*."""
+    return Receipt(
+        net_bought_items=ExchangedItem(
+            quantity=1.0,
+            description="groceries",
+            the_date=the_date,
+            account_transactions=[_make_transaction(account, the_date, amount)],
+        )
+    )
+
+
 def _make_config(days: int = 2, amount_range: float = 0) -> SimpleNamespace:
     """Lightweight config with only matching_algo."""
     return SimpleNamespace(
@@ -213,6 +298,98 @@ def _build_tui(
     return tui
 
 
+def _build_split_tui(
+    *,
+    receipt_date: datetime,
+    portions: List[Tuple[str, str]],
+):
+    """Build a QuestionnaireApp paid from several accounts.
+
+    *portions* holds one (account, amount paid) pair per account block.
+    """
+    account_choices = sorted({account_str for account_str, _ in portions})
+    questions = [
+        DateQuestionData(
+            question="Receipt date and time:\n",
+            date_only=False,
+            ai_suggestions=[],
+            ans_required=True,
+            reconfigurer=False,
+            terminator=False,
+        ),
+        HorizontalMultipleChoiceQuestionData(
+            question="Is this a withdrawal? (y/n)",
+            choices=["y", "n"],
+            ai_suggestions=[],
+            ans_required=True,
+            reconfigurer=True,
+            terminator=False,
+        ),
+    ]
+    for _ in portions:
+        questions.extend(
+            [
+                VerticalMultipleChoiceQuestionData(
+                    question="Belongs to bank/accounts_without_csv:",
+                    choices=account_choices,
+                    nr_of_ans_per_batch=10,
+                    ai_suggestions=[],
+                    ans_required=True,
+                    reconfigurer=True,
+                    terminator=False,
+                ),
+                InputValidationQuestionData(
+                    question="Amount paid from account:",
+                    input_type=InputType.FLOAT,
+                    ai_suggestions=[],
+                    history_suggestions=[],
+                    ans_required=True,
+                    reconfigurer=False,
+                    terminator=False,
+                ),
+                HorizontalMultipleChoiceQuestionData(
+                    question="Add another account (y/n)?",
+                    choices=["n", "y"],
+                    ai_suggestions=[],
+                    ans_required=True,
+                    reconfigurer=True,
+                    terminator=False,
+                ),
+            ]
+        )
+
+    tui = create_questionnaire(
+        header="Test", questions=questions, labelled_receipts=[]
+    )
+    tui.loop.screen = urwid.raw_display.Screen()
+
+    remaining = list(portions)
+    for inp in tui.inputs:
+        w = inp.base_widget
+        q = w.question_data.question
+        if q == "Receipt date and time:\n":
+            w.set_answer(receipt_date)
+        elif q == "Is this a withdrawal? (y/n)":
+            w.set_answer("n")
+        elif q == "Belongs to bank/accounts_without_csv:":
+            w.set_answer(remaining[0][0])
+        elif q == "Amount paid from account:":
+            w.set_answer(float(remaining.pop(0)[1]))
+        elif q == "Add another account (y/n)?":
+            w.set_answer("y" if remaining else "n")
+
+    return tui
+
+
+def _get_amount_attrs(tui) -> List[dict]:
+    """Read the attr_maps of all amount paid fields, in order."""
+    return [
+        inp.attr_map
+        for inp in tui.inputs
+        if inp.base_widget.question_data.question == "Amount paid from account:"
+    ]
+
+
 def _get_attr(tui, question_substr: str) -> Optional[dict]:
     """Read the attr_map from a widget matching the question substring."""
     for inp in tui.inputs:
@@ -226,6 +403,18 @@ def _get_sidebar_text(tui) -> str:
     return tui.error_display.base_widget.contents[1][0].text
 
 
+def _get_match_choices(tui) -> Optional[List[str]]:
+    """Return the choices of the match choice widget, if present."""
+    for inp in tui.inputs:
+        w = inp.base_widget if hasattr(inp, "base_widget") else inp
+        if (
+            hasattr(w, "question_data")
+            and w.question_data.question == MATCH_CHOICE_QUESTION
+        ):
+            return w.question_data.choices
+    return None
+
+
 def _has_match_choice(tui) -> bool:
     """Check if the match choice widget is present in the TUI."""
     for inp in tui.inputs:
@@ -970,3 +1159,866 @@ class TestDateRangeValidation:
         assert result.csv_max == datetime(2025, 3, 15)
         sidebar_text = _get_sidebar_text(tui)
         assert "CSV ends at 2025-03-15" in sidebar_text
+
+
+# ---------------------------------------------------------------------------
+# Tests: candidate search memo
+# ---------------------------------------------------------------------------
+
+
+class TestMatchMemo:
+    """Tests for the memo in front of the CSV candidate search."""
+
+    def _match(self, tui, config, csv_data):
+        return _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=config,
+            csv_transactions_per_account=csv_data,
+        )
+
+    def test_repeated_query_hits_memo(self, bank_account, bank_config):
+        """Re-running the same match is a memo hit with the same result."""
+        txn = _make_transaction(bank_account, datetime(2025, 1, 15), -42.17)
+        csv_data = {bank_config: {2025: [txn]}}
+        config = _make_config(days=2, amount_range=0)
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        MATCH_MEMO.invalidate()
+        MATCH_MEMO.reset_stats()
+
+        first = self._match(tui, config, csv_data)
+        second = self._match(tui, config, csv_data)
+
+        assert MATCH_MEMO.stats()["misses"] == 1
+        assert MATCH_MEMO.stats()["hits"] == 1
+        assert first.status == second.status == "matched"
+
+    def test_paid_change_split_shares_entry(self, bank_account, bank_config):
+        """Paid 50/change 7.83 and paid 42.17 normalize to the same query."""
+        txn = _make_transaction(bank_account, datetime(2025, 1, 15), -42.17)
+        csv_data = {bank_config: {2025: [txn]}}
+        config = _make_config(days=2, amount_range=0)
+        receipt_date = datetime(2025, 1, 15, 10, 30)
+        MATCH_MEMO.invalidate()
+        MATCH_MEMO.reset_stats()
+
+        self._match(
+            _build_tui(
+                receipt_date=receipt_date,
+                account_str=bank_account.to_string(),
+                amount_paid="42.17",
+            ),
+            config,
+            csv_data,
+        )
+        self._match(
+            _build_tui(
+                receipt_date=receipt_date,
+                account_str=bank_account.to_string(),
+                amount_paid="50",
+                change_returned="7.83",
+            ),
+            config,
+            csv_data,
+        )
+
+        assert MATCH_MEMO.stats()["hits"] == 1
+
+    def test_config_change_invalidates(self, bank_account, bank_config):
+        """Widening the day margin must not reuse the narrower result."""
+        txn = _make_transaction(bank_account, datetime(2025, 1, 18), -42.17)
+        csv_data = {bank_config: {2025: [txn]}}
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        MATCH_MEMO.invalidate()
+        MATCH_MEMO.reset_stats()
+
+        narrow = self._match(tui, _make_config(days=2), csv_data)
+        wide = self._match(tui, _make_config(days=5), csv_data)
+
+        assert narrow.status == "no_match"
+        assert wide.status == "matched"
+        assert MATCH_MEMO.stats()["hits"] == 0
+
+    def test_csv_change_invalidates(self, bank_account, bank_config):
+        """Appending a CSV row must not reuse the stale result."""
+        txn = _make_transaction(bank_account, datetime(2025, 1, 15), -42.17)
+        csv_data = {bank_config: {2025: [txn]}}
+        config = _make_config(days=2, amount_range=0)
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        MATCH_MEMO.invalidate()
+        MATCH_MEMO.reset_stats()
+
+        before = self._match(tui, config, csv_data)
+        csv_data[bank_config][2025].append(
+            _make_transaction(bank_account, datetime(2025, 1, 16), -42.17)
+        )
+        after = self._match(tui, config, csv_data)
+
+        assert before.status == "matched"
+        assert after.status == "ambiguous"
+        assert MATCH_MEMO.stats()["hits"] == 0
+
+
+# ---------------------------------------------------------------------------
+# Tests: split payments
+# ---------------------------------------------------------------------------
+
+
+class TestSplitPaymentMatch:
+    """Receipts paid partly from one account and partly from another."""
+
+    @pytest.fixture
+    def savings_account(self):
+        return _make_account(acct_type="savings")
+
+    @pytest.fixture
+    def savings_config(self, savings_account):
+        return _make_account_config(savings_account, has_csv=True)
+
+    def test_split_over_two_accounts_matches(
+        self, bank_account, bank_config, savings_account, savings_config
+    ):
+        """30 from checking + 12.17 from savings, both in CSV → green."""
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 15), -30.0
+                    ),
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 14), -8.5
+                    ),
+                ]
+            },
+            savings_config: {
+                2025: [
+                    _make_transaction(
+                        savings_account, datetime(2025, 1, 16), -12.17
+                    ),
+                ]
+            },
+        }
+        tui = _build_split_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            portions=[
+                (bank_account.to_string(), "30"),
+                (savings_account.to_string(), "12.17"),
+            ],
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert result.status == "matched"
+        assert len(result.combinations) == 1
+        assert sorted(
+            abs(txn.tendered_amount_out) for txn in result.combinations[0]
+        ) == [12.17, 30.0]
+        assert _get_amount_attrs(tui) == [
+            {None: "matched"},
+            {None: "matched"},
+        ]
+        assert not _has_match_choice(tui)
+
+    def test_two_portions_from_one_account_match_once(
+        self, bank_account, bank_config
+    ):
+        """30 + 12.17 both from checking → one combination, green."""
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 15), -30.0
+                    ),
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 16), -12.17
+                    ),
+                ]
+            },
+        }
+        tui = _build_split_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            portions=[
+                (bank_account.to_string(), "30"),
+                (bank_account.to_string(), "12.17"),
+            ],
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert result.status == "matched"
+        assert len(result.combinations) == 1
+        assert _get_amount_attrs(tui) == [
+            {None: "matched"},
+            {None: "matched"},
+        ]
+
+    def test_portions_match_their_own_amount(self, bank_account, bank_config):
+        """20 + 22.17 also sums to 42.17, but 30 + 12.17 was typed."""
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(bank_account, datetime(2025, 1, 15), -a)
+                    for a in (30.0, 20.0, 12.17, 22.17)
+                ]
+            },
+        }
+        tui = _build_split_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            portions=[
+                (bank_account.to_string(), "30"),
+                (bank_account.to_string(), "12.17"),
+            ],
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert result.status == "matched"
+        assert [
+            abs(txn.tendered_amount_out) for txn in result.combinations[0]
+        ] == [30.0, 12.17]
+        assert _get_amount_attrs(tui) == [
+            {None: "matched"},
+            {None: "matched"},
+        ]
+
+    def test_unmatched_portion_turns_red(
+        self, bank_account, bank_config, savings_account, savings_config
+    ):
+        """Savings CSV has no 12.17 → savings portion red, choice shown."""
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 15), -30.0
+                    ),
+                ]
+            },
+            savings_config: {
+                2025: [
+                    _make_transaction(
+                        savings_account, datetime(2025, 1, 16), -99.0
+                    ),
+                ]
+            },
+        }
+        tui = _build_split_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            portions=[
+                (bank_account.to_string(), "30"),
+                (savings_account.to_string(), "12.17"),
+            ],
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert result.status == "no_match"
+        assert _get_amount_attrs(tui) == [
+            {None: "matched"},
+            {None: "error"},
+        ]
+        assert _has_match_choice(tui)
+
+
+# ---------------------------------------------------------------------------
+# Tests: ranked candidates
+# ---------------------------------------------------------------------------
+
+
+class TestRankedCandidates:
+    """Ambiguous matches list scored candidates for a one-key pick."""
+
+    def _ambiguous_setup(self, bank_account, bank_config):
+        txns = [
+            _make_transaction(bank_account, datetime(2025, 1, 17), -42.17),
+            _make_transaction(bank_account, datetime(2025, 1, 15), -42.17),
+        ]
+        csv_data = {bank_config: {2025: txns}}
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        return txns, csv_data, tui
+
+    def test_candidates_ranked_in_sidebar(self, bank_account, bank_config):
+        """Closest date ranks first; choices 1 and 2 are offered."""
+        txns, csv_data, tui = self._ambiguous_setup(bank_account, bank_config)
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert result.status == "ambiguous"
+        assert [r.transaction for r in result.ranked] == [txns[1], txns[0]]
+        sidebar = _get_sidebar_text(tui)
+        assert "[1] 2025-01-15 42.17" in sidebar
+        assert "[2] 2025-01-17 42.17" in sidebar
+        assert _get_match_choices(tui)[:2] == ["1", "2"]
+
+    def test_claimed_candidate_ranks_last(self, bank_account, bank_config):
+        """The same-day transaction already belongs to another receipt."""
+        txns, csv_data, _ = self._ambiguous_setup(bank_account, bank_config)
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="40.00",
+        )
+        tui.labelled_receipts.append(
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 15), -42.17)
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert [r.transaction for r in result.ranked] == [txns[0], txns[1]]
+        assert result.ranked[1].claimed
+        assert "(claimed)" in _get_sidebar_text(tui)
+
+    def test_pick_resolves_ambiguous_match(self, bank_account, bank_config):
+        """Picking candidate 2 pins it; the next pass is a unique match."""
+        txns, csv_data, tui = self._ambiguous_setup(bank_account, bank_config)
+        config = _make_config(days=2, amount_range=0)
+        _try_non_withdrawal_amount_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+
+        _resolve_ranked_candidate(tui=tui, choice="2")
+        result = _try_non_withdrawal_amount_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+
+        assert result.status == "matched"
+        assert result.candidates == [txns[0]]
+        assert _get_attr(tui, "Amount paid") == {None: "matched"}
+        assert not _has_match_choice(tui)
+
+    def test_corrected_amount_drops_the_pick(self, bank_account, bank_config):
+        """After a pick, a mistyped amount is not matched to the pick."""
+        txns, csv_data, tui = self._ambiguous_setup(bank_account, bank_config)
+        config = _make_config(days=2, amount_range=0)
+        _try_non_withdrawal_amount_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+        _resolve_ranked_candidate(tui=tui, choice="2")
+        _try_non_withdrawal_amount_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+
+        for inp in tui.inputs:
+            if "Amount paid" in inp.base_widget.question_data.question:
+                inp.base_widget.set_answer(99.0)
+        result = _try_non_withdrawal_amount_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+
+        assert result.status == "no_match"
+        assert _get_attr(tui, "Amount paid") == {None: "error"}
+        assert tui.pinned_matches == {}
+
+
+class TestClaimedTransactions:
+    """Transactions of labelled receipts are no candidates."""
+
+    def test_claimed_transaction_is_skipped(self, bank_account, bank_config):
+        txns = [
+            _make_transaction(bank_account, datetime(2025, 1, 13), -42.17),
+            _make_transaction(bank_account, datetime(2025, 1, 15), -42.17),
+        ]
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        tui.labelled_receipts.append(
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 13), -42.17)
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=3, amount_range=0),
+            csv_transactions_per_account={bank_config: {2025: txns}},
+        )
+
+        assert result.status == "matched"
+        assert result.candidates == [txns[1]]
+        assert not _has_match_choice(tui)
+
+    def test_all_claimed_are_kept(self, bank_account, bank_config):
+        txn = _make_transaction(bank_account, datetime(2025, 1, 15), -42.17)
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        tui.labelled_receipts.append(
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 15), -42.17)
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account={bank_config: {2025: [txn]}},
+        )
+
+        assert result.status == "matched"
+
+    def test_same_day_payments_are_claimed_once_each(
+        self, bank_account, bank_config
+    ):
+        txns = [
+            _make_transaction(bank_account, datetime(2025, 1, 15, 9), -42.17),
+            _make_transaction(bank_account, datetime(2025, 1, 15, 17), -42.17),
+        ]
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        tui.labelled_receipts.append(
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 15), -42.17)
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account={bank_config: {2025: txns}},
+        )
+
+        assert result.status == "matched"
+        assert result.candidates == [txns[1]]
+
+    def test_relabelled_receipt_keeps_its_transaction(
+        self, bank_account, bank_config
+    ):
+        txns = [
+            _make_transaction(bank_account, datetime(2025, 1, 15), -42.17),
+            _make_transaction(bank_account, datetime(2025, 1, 16), -42.17),
+        ]
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        relabelled = _make_labelled_receipt(
+            bank_account, datetime(2025, 1, 15), -42.17
+        )
+        tui.labelled_receipts.append(relabelled)
+        get_claimed_index(tui.labelled_receipts).remove_receipt(relabelled)
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account={bank_config: {2025: txns}},
+        )
+
+        assert result.status != "matched"
+        assert result.candidates == txns
+        # A later sync does not claim its transaction again.
+        assert not get_claimed_index(tui.labelled_receipts).is_claimed(txns[0])
+
+    def test_index_follows_receipts(self, bank_account):
+        labelled = [
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 13), -5.0)
+        ]
+        index = ClaimedIndex().sync(labelled)
+        assert len(index) == 1
+
+        labelled.append(
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 14), -6.0)
+        )
+        index.sync(labelled)
+        index.add_receipt(
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 15), -7.0)
+        )
+
+        assert len(index) == 3
+        assert index.is_claimed(
+            _make_transaction(bank_account, datetime(2025, 1, 14, 9), -6.0)
+        )
+        assert not index.is_claimed(
+            _make_transaction(bank_account, datetime(2025, 1, 14), -6.5)
+        )
+        assert len(index.sync([])) == 0
+
+
+class TestAdaptiveMatching:
+    """matching_algo.adaptive searches the tightest unique margins."""
+
+    def _match(self, bank_account, bank_config, txn_days, days=3):
+        config = _make_config(days=days, amount_range=0.1)
+        config.matching_algo.adaptive = True
+        txns = [
+            _make_transaction(bank_account, datetime(2025, 1, day), -42.17)
+            for day in txn_days
+        ]
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=config,
+            csv_transactions_per_account={bank_config: {2025: txns}},
+        )
+        return txns, tui, result
+
+    def test_resolves_ambiguous_match(self, bank_account, bank_config):
+        txns, tui, result = self._match(bank_account, bank_config, [17, 15])
+
+        assert result.status == "matched"
+        assert result.candidates == [txns[1]]
+        assert result.adaptive.days_after == 0
+        assert result.adaptive.amount_margin == 0.0
+        assert "Matched within -0/+0 days" in _get_sidebar_text(tui)
+
+    def test_prefers_later_posting(self, bank_account, bank_config):
+        txns, _, result = self._match(bank_account, bank_config, [13, 16])
+
+        assert result.status == "matched"
+        assert result.candidates == [txns[1]]
+        assert (result.adaptive.days_before, result.adaptive.days_after) == (
+            0,
+            1,
+        )
+
+    def test_stays_within_maxima(self, bank_account, bank_config):
+        _, _, result = self._match(bank_account, bank_config, [20], days=3)
+
+        assert result.status == "no_match"
+        assert result.adaptive is None
+
+
+class TestLiveMatch:
+    """The amount is matched on every keystroke."""
+
+    def _setup(self, bank_account, bank_config):
+        txns = [
+            _make_transaction(bank_account, datetime(2025, 1, 15), -42.17),
+            _make_transaction(bank_account, datetime(2025, 1, 16), -47.5),
+            _make_transaction(bank_account, datetime(2025, 1, 14), -8.2),
+        ]
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="1",
+        )
+        refresh_csv_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account={bank_config: {2025: txns}},
+        )
+        return tui
+
+    def _get_input(self, tui, question):
+        for inp in tui.inputs:
+            if inp.base_widget.question_data.question == question:
+                return inp.base_widget
+        raise AssertionError(question)
+
+    def test_keystrokes_narrow_shortlist(self, bank_account, bank_config):
+        tui = self._setup(bank_account, bank_config)
+        amount = self._get_input(tui, "Amount paid from account:")
+
+        amount.set_edit_text("4")
+        assert "Live: 2 candidate(s), 0 matching" in _get_sidebar_text(tui)
+        assert _get_attr(tui, "Amount paid") == {None: "normal"}
+
+        amount.set_edit_text("42.17")
+        assert "Live: 1 candidate(s), 1 matching" in _get_sidebar_text(tui)
+        assert "Best: 2025-01-15 42.17" in _get_sidebar_text(tui)
+        assert _get_attr(tui, "Amount paid") == {None: "matched"}
+
+        amount.set_edit_text("43")
+        assert "Live: 0 candidate(s)" in _get_sidebar_text(tui)
+        assert _get_attr(tui, "Amount paid") == {None: "error"}
+
+    def test_change_returned_is_subtracted(self, bank_account, bank_config):
+        tui = self._setup(bank_account, bank_config)
+        self._get_input(tui, "Amount paid from account:").set_edit_text("50")
+        change = self._get_input(tui, "Change returned to account:")
+
+        change.set_edit_text("2.5")
+
+        assert "1 matching" in _get_sidebar_text(tui)
+        assert "Best: 2025-01-16 47.50" in _get_sidebar_text(tui)
+        assert _get_attr(tui, "Amount paid") == {None: "matched"}
+
+    def test_budget_keeps_superset(self, bank_account):
+        txns = [
+            _make_transaction(bank_account, datetime(2025, 1, 15), -nr)
+            for nr in range(1, 500)
+        ]
+        matcher = LiveMatcher(
+            key="bank",
+            receipt_date=datetime(2025, 1, 15),
+            candidates=txns,
+            amount_margin=0.0,
+            budget=0.0,
+        )
+
+        status = matcher.update(amount_text="12")
+
+        assert not status.complete
+        assert status.candidate_count > 11
+        assert [t.tendered_amount_out for t in status.matching] == [-12]
+
+
+class TestAccountLookup:
+    """The account is looked up from the receipt date and amount."""
+
+    @pytest.fixture
+    def savings_account(self):
+        return _make_account(acct_type="savings")
+
+    @pytest.fixture
+    def savings_config(self, savings_account):
+        return _make_account_config(savings_account, has_csv=True)
+
+    def _get_account_widget(self, tui):
+        for inp in tui.inputs:
+            w = inp.base_widget
+            if (
+                w.question_data.question
+                == "Belongs to bank/accounts_without_csv:"
+            ):
+                return w
+        raise AssertionError("no account question")
+
+    def _setup(self, bank_account, savings_account, wallet_account):
+        choices = sorted(
+            acc.to_string()
+            for acc in (bank_account, savings_account, wallet_account)
+        )
+        return _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="12.17",
+            account_choices=choices,
+        )
+
+    def test_matching_account_moves_to_top(
+        self,
+        bank_account,
+        bank_config,
+        savings_account,
+        savings_config,
+        wallet_account,
+        wallet_config,
+    ):
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(bank_account, datetime(2025, 1, 15), -30)
+                ]
+            },
+            savings_config: {
+                2025: [
+                    _make_transaction(
+                        savings_account, datetime(2025, 1, 16), -12.17
+                    )
+                ]
+            },
+            wallet_config: {},
+        }
+        tui = self._setup(bank_account, savings_account, wallet_account)
+
+        refresh_csv_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        widget = self._get_account_widget(tui)
+        assert widget.question_data.choices[0] == savings_account.to_string()
+        assert widget.get_answer() == bank_account.to_string()
+        widget.set_edit_text("")
+        widget.refresh_choices()
+        assert "[match 2025-01-16 12.17]" in widget.caption
+
+    def test_unique_match_ranks_first(
+        self,
+        bank_account,
+        bank_config,
+        savings_account,
+        savings_config,
+        wallet_config,
+    ):
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, day), -12.17
+                    )
+                    for day in (14, 15)
+                ]
+            },
+            savings_config: {
+                2025: [
+                    _make_transaction(
+                        savings_account, datetime(2025, 1, 16), -12.17
+                    )
+                ]
+            },
+            wallet_config: {},
+        }
+
+        matches = find_matching_accounts(
+            csv_transactions_per_account=csv_data,
+            config=_make_config(days=2, amount_range=0),
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            net_amount=12.17,
+        )
+
+        assert [(m.account_str, len(m.matching)) for m in matches] == [
+            (savings_account.to_string(), 1),
+            (bank_account.to_string(), 2),
+        ]
+
+    def test_order_restored_without_match(
+        self,
+        bank_account,
+        bank_config,
+        savings_account,
+        savings_config,
+        wallet_account,
+    ):
+        csv_data = {
+            bank_config: {},
+            savings_config: {
+                2025: [
+                    _make_transaction(
+                        savings_account, datetime(2025, 1, 16), -12.17
+                    )
+                ]
+            },
+        }
+        config = _make_config(days=2, amount_range=0)
+        tui = self._setup(bank_account, savings_account, wallet_account)
+        widget = self._get_account_widget(tui)
+        original = list(widget.question_data.choices)
+        refresh_csv_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+        assert widget.question_data.choices != original
+
+        for inp in tui.inputs:
+            if (
+                inp.base_widget.question_data.question
+                == "Amount paid from account:"
+            ):
+                inp.base_widget.set_answer(99.0)
+        refresh_csv_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+
+        assert widget.question_data.choices == original
+        assert widget.question_data.extra_data["annotations"] == {}
+
+
+class TestUnlabelledQueue:
+    """CSV transactions without receipt are labelled in priority order."""
+
+    def _csv_data(self, bank_account, bank_config, wallet_config):
+        return {
+            bank_config: {
+                2024: [
+                    _make_transaction(bank_account, datetime(2024, 1, 15), -50)
+                ],
+                2025: [
+                    _make_transaction(bank_account, datetime(2025, 1, 10), -80),
+                    _make_transaction(bank_account, datetime(2025, 1, 12), -20),
+                    _make_transaction(bank_account, datetime(2025, 1, 14), -60),
+                    # An incoming salary.
+                    _make_transaction(bank_account, datetime(2025, 1, 1), 3000),
+                ],
+            },
+            wallet_config: {},
+        }
+
+    def test_queue_skips_claimed_and_ranks(
+        self, bank_account, bank_config, wallet_config
+    ):
+        labelled = [
+            _make_labelled_receipt(bank_account, datetime(2025, 1, 12), -20)
+        ]
+
+        queue = get_unlabelled_queue(
+            csv_transactions_per_account=self._csv_data(
+                bank_account, bank_config, wallet_config
+            ),
+            labelled_receipts=labelled,
+            now=datetime(2025, 1, 15),
+        )
+
+        # 50 from a year ago weighs about 100, more than 80 from this week.
+        # The larger salary is queued after the debits.
+        assert [e.transaction.tendered_amount_out for e in queue] == [
+            -50,
+            -80,
+            -60,
+            3000,
+        ]
+        assert {e.account_str for e in queue} == {bank_account.to_string()}
+
+    def test_target_seeds_receipt(self, bank_account, bank_config):
+        target = _make_transaction(bank_account, datetime(2025, 1, 14), -60)
+        csv_data = {
+            bank_config: {
+                2025: [
+                    target,
+                    _make_transaction(bank_account, datetime(2025, 1, 14), -60),
+                ]
+            }
+        }
+        tui = _build_tui(
+            receipt_date=datetime(2025, 2, 1),
+            account_str=bank_account.to_string(),
+            amount_paid="1",
+        )
+
+        _seed_match_target(tui, transaction=target)
+        refresh_csv_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert tui.pinned_matches[bank_account.to_string()] is target
+        assert _get_attr(tui, "Amount paid") == {None: "matched"}
+        for inp in tui.inputs:
+            w = inp.base_widget
+            if w.question_data.question == "Amount paid from account:":
+                assert w.get_answer() == 60.0
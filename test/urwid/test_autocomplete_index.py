@@ -0,0 +1,230 @@
+"""Tests for the prefix index behind the autocomplete suggestions.
+
+Scenarios:
+  1. The index filters like ``get_filtered_suggestions``, for prefixes,
+     ``a*d`` wildcards, a lone ``*``, empty input and no match.
+  2. Typing, erasing and retyping a text keystroke by keystroke gives the
+     same suggestions as filtering each text from scratch.
+  3. An index over a list that grew by append is no longer current.
+  4. Micro-benchmark: typing a category over thousands of entries is
+     faster with the index than with the linear filter.
+  5. The fuzzy filter finds the category behind a typo, closest first,
+     then most frequent.
+  6. The fuzzy filter tolerates fewer typos in short texts and ignores
+     wildcards.
+  7. A question with fuzzy autocompletion shows the close matches when a
+     typo leaves no prefix match, a question without does not.
+  8. The fuzzy filter stays fast on 50k categories.
+"""
+
+import random
+import time
+
+import pytest
+import urwid
+
+from tui_labeller.tuis.urwid.input_validation.autocomplete_filtering import (
+    get_filtered_suggestions,
+)
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import HistoryStore
+from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
+    InputValidationQuestion,
+)
+from tui_labeller.tuis.urwid.input_validation.SuggestionIndex import (
+    SuggestionIndex,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    AISuggestion,
+    InputValidationQuestionData,
+)
+
+FRUIT = ["avocado", "Apple", "apricot", "banana", "Blueberry", "cherry"]
+
+
+def _make_categories(count: int):
+    rng = random.Random(7)
+    roots = ["expenses", "assets", "income", "liabilities"]
+    words = ["food", "groceries", "rent", "transport", "health", "gifts"]
+    return [
+        ":".join(
+            [rng.choice(roots)]
+            + [rng.choice(words) for _ in range(rng.randint(1, 3))]
+            + [f"item{i}"]
+        )
+        for i in range(count)
+    ]
+
+
+class TestSuggestionIndex:
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "",
+            "  ",
+            "*",
+            "a",
+            "A",
+            "ap",
+            "a*t",
+            "a*c",
+            "*rr",
+            "b*e*y",
+            "x",
+            "**",
+        ],
+    )
+    def test_matches_linear_filter(self, text):
+        index = SuggestionIndex(FRUIT)
+
+        assert index.filter(text) == get_filtered_suggestions(
+            input_text=text, available_suggestions=FRUIT
+        )
+
+    def test_incremental_typing(self):
+        categories = _make_categories(500)
+        index = SuggestionIndex(categories)
+        typed = "expenses:f*o*item1"
+        texts = [typed[:end] for end in range(len(typed) + 1)]
+        # Type, erase back to "exp", then paste more at once and type a
+        # different branch.
+        texts += texts[::-1][: len(typed) - 2]
+        texts += ["expe", "expenses:f*rent", "a*gift"]
+
+        for text in texts:
+            assert index.filter(text) == get_filtered_suggestions(
+                input_text=text, available_suggestions=categories
+            ), text
+
+    def test_grown_list_is_not_current(self):
+        history = ["apple"]
+        index = SuggestionIndex(history)
+        assert index.is_current(history)
+
+        history.append("apricot")
+
+        assert not index.is_current(history)
+        assert not index.is_current(list(history))
+        assert SuggestionIndex(history).filter("ap") == ["apple", "apricot"]
+
+    def test_typing_benchmark(self):
+        categories = _make_categories(20_000)
+        typed = "expenses:groceries*item19"
+        texts = [typed[:end] for end in range(1, len(typed) + 1)]
+
+        start = time.perf_counter()
+        expected = [
+            get_filtered_suggestions(
+                input_text=text, available_suggestions=categories
+            )
+            for text in texts
+        ]
+        linear = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = SuggestionIndex(categories)
+        built = time.perf_counter() - start
+        actual = [index.filter(text) for text in texts]
+        indexed = time.perf_counter() - start - built
+
+        print(
+            f"linear: {linear * 1000:.1f} ms, build: {built * 1000:.1f} ms,"
+            f" indexed: {indexed * 1000:.1f} ms"
+        )
+        assert actual == expected
+        # The index is built once per question, the keystrokes are the
+        # steady state. Loose factor to avoid a flaky timing.
+        assert indexed * 3 < linear
+
+
+class TestFuzzyFilter:
+
+    def test_typo_in_long_category(self):
+        index = SuggestionIndex(
+            ["groceries:ekoplaza", "groceries:albert", "gifts", "rent"]
+        )
+
+        assert index.filter("grocreies:eko") == ["-"]
+        assert index.fuzzy_filter("grocreies:eko") == ["groceries:ekoplaza"]
+
+    def test_ranked_by_distance_then_frequency(self):
+        index = SuggestionIndex(
+            ["transport:taxi", "transport:tram", "transport:train"],
+            frequencies={"transport:tram": 1, "transport:train": 5},
+        )
+
+        # One edit to tram, two to train and taxi.
+        assert index.fuzzy_filter("transport:tramx") == [
+            "transport:tram",
+            "transport:train",
+            "transport:taxi",
+        ]
+        # Two edits to each, ordered by frequency.
+        assert index.fuzzy_filter("transport:trxx") == [
+            "transport:train",
+            "transport:tram",
+            "transport:taxi",
+        ]
+        assert index.fuzzy_filter("transport:trxx", limit=1) == [
+            "transport:train"
+        ]
+
+    def test_short_texts_and_wildcards(self):
+        index = SuggestionIndex(["rent", "gifts", "groceries"])
+
+        assert index.fuzzy_filter("rnt") == []
+        assert index.fuzzy_filter("gfts") == ["gifts"]
+        # Two edits from groceries, only one is tolerated in 6 characters.
+        assert index.fuzzy_filter("grcoer") == []
+        assert index.fuzzy_filter("gfts*") == []
+
+    @pytest.mark.parametrize("fuzzy", [True, False])
+    def test_question_falls_back_to_fuzzy(self, fuzzy):
+        question_data = InputValidationQuestionData(
+            question="Category:",
+            input_type=InputType.LETTERS_SEMICOLON,
+            ans_required=True,
+            reconfigurer=False,
+            terminator=False,
+            ai_suggestions=[AISuggestion("groceries:ekoplaza", 0.9, "AI")],
+            history_suggestions=[],
+            question_id="category",
+            fuzzy_autocomplete=fuzzy,
+        )
+        history_store = HistoryStore()
+        history_store.touch("category", "groceries:albert")
+        ai_box = urwid.AttrMap(urwid.Text(""), "normal")
+        history_box = urwid.AttrMap(urwid.Text(""), "normal")
+        question = InputValidationQuestion(
+            question_data=question_data,
+            history_store=history_store,
+            ai_suggestion_box=ai_box,
+            history_suggestion_box=history_box,
+        )
+        question.owner = urwid.AttrMap(question, "normal")
+
+        for key in "grocreies:":
+            question.keypress((40,), key)
+
+        if fuzzy:
+            assert ai_box.base_widget.text == "groceries:ekoplaza"
+            assert history_box.base_widget.text == "groceries:albert"
+        else:
+            assert ai_box.base_widget.text == "-"
+            assert history_box.base_widget.text == "-"
+
+    def test_fuzzy_benchmark(self):
+        index = SuggestionIndex(_make_categories(50_000))
+        typos = ["expnses:groc", "incme:tr", "assest:food:rnet", "liabilitis:"]
+
+        worst = 0.0
+        for typo in typos:
+            start = time.perf_counter()
+            matches = index.fuzzy_filter(typo)
+            worst = max(worst, time.perf_counter() - start)
+            assert len(matches) <= 10
+
+        print(f"worst fuzzy keystroke: {worst * 1000:.1f} ms")
+        assert index.fuzzy_filter("expnses:groc")
+        assert worst < 0.5
@@ -0,0 +1,167 @@
+"""Tests for the batch assignment of labelled receipts to CSV transactions.
+
+Scenarios:
+  1. Two receipts that each see the same two candidates are resolved by
+     the global minimum cost assignment.
+  2. Receipts with interchangeable candidates are reported ambiguous.
+  3. A receipt without candidate and a CSV transaction without receipt
+     are reported as orphans.
+  4. A receipt with more candidates than the other receipts can take is
+     assigned the one left over.
+  5. The solver handles tens of thousands of sparse components.
+  6. The interchangeable receipts found in one pass over the residual
+     graph are the ones a re-solve without their edge assigns at equal
+     cost, also in one large component.
+"""
+
+import random
+import time
+from datetime import datetime
+from test.urwid.test_amount_matching import (
+    _make_account,
+    _make_account_config,
+    _make_config,
+    _make_labelled_receipt,
+    _make_transaction,
+)
+
+import pytest
+
+from tui_labeller.tuis.urwid.matching.assignment_solver import (
+    COST_EPSILON,
+    get_components,
+    solve_min_cost_assignment,
+)
+from tui_labeller.tuis.urwid.matching.batch_assignment import assign_receipts
+
+
+@pytest.fixture
+def bank_account():
+    return _make_account()
+
+
+@pytest.fixture
+def bank_config(bank_account):
+    return _make_account_config(bank_account, has_csv=True)
+
+
+def _assign(bank_account, bank_config, receipt_days, csv_days, amount=-12.17):
+    labelled_receipts = [
+        _make_labelled_receipt(bank_account, datetime(2025, 1, day), amount)
+        for day in receipt_days
+    ]
+    csv_data = {
+        bank_config: {
+            2025: [
+                _make_transaction(bank_account, datetime(2025, 1, day), amount)
+                for day in csv_days
+            ]
+        }
+    }
+    return assign_receipts(
+        labelled_receipts=labelled_receipts,
+        csv_transactions_per_account=csv_data,
+        config=_make_config(days=3, amount_range=0),
+    )
+
+
+def _days(assignments):
+    return sorted(
+        (a.item.transaction.the_date.day, a.transaction.the_date.day)
+        for a in assignments
+    )
+
+
+class TestBatchAssignment:
+
+    def test_shared_candidates_are_resolved(self, bank_account, bank_config):
+        result = _assign(bank_account, bank_config, [10, 12], [10, 12])
+
+        assert all(len(a.candidates) == 2 for a in result.resolved)
+        assert _days(result.resolved) == [(10, 10), (12, 12)]
+        assert result.ambiguous == []
+
+    def test_ties_are_ambiguous(self, bank_account, bank_config):
+        result = _assign(bank_account, bank_config, [10, 10], [9, 11])
+
+        assert result.resolved == []
+        assert len(result.ambiguous) == 2
+
+    def test_orphans(self, bank_account, bank_config):
+        result = _assign(bank_account, bank_config, [10, 20], [11, 14])
+
+        assert _days(result.resolved) == [(10, 11)]
+        orphaned_items = result.orphaned_items
+        assert [i.transaction.the_date.day for i in orphaned_items] == [20]
+        assert [t.the_date.day for t in result.orphaned_transactions] == [14]
+
+    def test_left_over_candidate(self, bank_account, bank_config):
+        # The 15th only sees the 13th, which leaves the 10th to the 11th.
+        result = _assign(bank_account, bank_config, [11, 15], [10, 13])
+
+        assert _days(result.resolved) == [(11, 10), (15, 13)]
+
+
+class TestAssignmentSolver:
+
+    def test_sparse_corpus_scales(self):
+        # 20k receipts, each sharing two candidates with its neighbour.
+        edges = []
+        for pair in range(10_000):
+            left, right = 2 * pair, 2 * pair
+            edges += [
+                (left, right, 0.0),
+                (left, right + 1, 1.0),
+                (left + 1, right, 1.0),
+                (left + 1, right + 1, 0.0),
+            ]
+
+        start = time.perf_counter()
+        components = get_components(edges)
+        solutions = [solve_min_cost_assignment(c) for c in components]
+        elapsed = time.perf_counter() - start
+
+        assert len(components) == 10_000
+        assert all(s.cost == 0.0 and len(s.pairs) == 2 for s in solutions)
+        assert elapsed < 10
+
+    def test_interchangeable_matches_re_solving(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            edges = list(
+                {
+                    (rng.randrange(5), rng.randrange(5)): rng.choice(
+                        [0.0, 0.5, 1.0]
+                    )
+                    for _ in range(rng.randrange(1, 12))
+                }.items()
+            )
+            edges = [(u, v, cost) for (u, v), cost in edges]
+            solution = solve_min_cost_assignment(edges)
+
+            for left, right in solution.pairs.items():
+                alternative = solve_min_cost_assignment(
+                    [e for e in edges if (e[0], e[1]) != (left, right)]
+                )
+                expected = (
+                    len(alternative.pairs) == len(solution.pairs)
+                    and alternative.cost <= solution.cost + COST_EPSILON
+                )
+                assert (left in solution.interchangeable) == expected
+
+    def test_large_component_is_checked_in_one_pass(self):
+        # A chain of 500 receipts, each also seeing its neighbour's
+        # transaction at a higher cost; only the last two tie.
+        size = 500
+        edges = [(i, i, 0.0) for i in range(size)]
+        edges += [(i, i + 1, 1.0) for i in range(size - 1)]
+        edges += [(size - 1, size - 2, 0.0), (size - 2, size - 1, 0.0)]
+
+        start = time.perf_counter()
+        solution = solve_min_cost_assignment(edges)
+        elapsed = time.perf_counter() - start
+
+        assert len(get_components(edges)) == 1
+        assert solution.cost == 0.0
+        assert solution.interchangeable == {size - 2, size - 1}
+        assert elapsed < 10
@@ -0,0 +1,161 @@
+"""Tests for the cached choice lines of the multiple-choice captions.
+
+Scenarios:
+  1. The captions show the last AI suggestion and the annotation of each
+     choice, padded to the longest choice of the batch or window.
+  2. Moving the highlight reuses the choice lines, the suggestions are
+     not looked up again.
+  3. Replacing the choices, AI suggestions or extra data of the question
+     data (or of a copy of it) renders the new lines.
+  4. Scrolling through a long list with many suggestions stays fast.
+"""
+
+import copy
+import time
+
+from hledger_core.AISuggestion import AISuggestion
+
+from tui_labeller.tuis.urwid.multiple_choice_question.helper import (
+    get_choice_lines,
+    get_selected_caption,
+    get_vc_question,
+    get_vc_question_with_highlight,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    VerticalMultipleChoiceQuestionData,
+)
+
+
+class _CountingList(list):
+    """List that counts how often it is iterated."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.nr_of_iterations = 0
+
+    def __iter__(self):
+        self.nr_of_iterations += 1
+        return super().__iter__()
+
+
+def _make_question_data(choices, ai_suggestions=None, annotations=None):
+    return VerticalMultipleChoiceQuestionData(
+        question="Select account:",
+        choices=choices,
+        nr_of_ans_per_batch=15,
+        ans_required=True,
+        reconfigurer=False,
+        terminator=False,
+        ai_suggestions=ai_suggestions or [],
+        question_id="account",
+        extra_data={"annotations": annotations or {}},
+    )
+
+
+def _suggest(choice, probability, model_name="model"):
+    return AISuggestion(
+        question=choice, probability=probability, model_name=model_name
+    )
+
+
+class TestCaptionCache:
+
+    def test_suggestions_and_annotations(self):
+        question_data = _make_question_data(
+            ["cash", "savings", "checking"],
+            ai_suggestions=[
+                _suggest("savings", 0.5, "first"),
+                _suggest("savings", 0.75, "second"),
+            ],
+            annotations={"checking": " 12.50 on 2024-01-01"},
+        )
+
+        assert (
+            get_vc_question(vc_question_data=question_data, indentation=1)
+            == "\nSelect account:\n"
+            " 0 cash      \n"
+            " 1 savings   0.75 second\n"
+            " 2 checking   12.50 on 2024-01-01\n"
+        )
+        assert (
+            get_vc_question_with_highlight(
+                vc_question_data=question_data,
+                indentation=1,
+                highlighted_index=1,
+                window_size=2,
+            )
+            == "\nSelect account:\n  0 cash     \n> 1 savings  0.75 second\n"
+        )
+        assert (
+            get_selected_caption(
+                vc_question_data=question_data, selected_index=0, indentation=1
+            )
+            == "Select account:\n 0 cash      \n"
+        )
+
+    def test_highlight_reuses_lines(self):
+        ai_suggestions = _CountingList(
+            [_suggest(f"account{i}", 0.5) for i in range(20)]
+        )
+        question_data = _make_question_data(
+            [f"account{i}" for i in range(100)], ai_suggestions=ai_suggestions
+        )
+
+        captions = [
+            get_vc_question_with_highlight(
+                vc_question_data=question_data,
+                indentation=1,
+                highlighted_index=highlighted_index,
+            )
+            for highlighted_index in range(100)
+        ]
+
+        assert ai_suggestions.nr_of_iterations == 1
+        assert "> 5 account5   0.50 model\n" in captions[5]
+        assert "> 42 account42  \n" in captions[42]
+        assert get_choice_lines(question_data) is get_choice_lines(
+            question_data
+        )
+
+    def test_replaced_data_renders_new_lines(self):
+        question_data = _make_question_data(["cash", "savings"])
+
+        def caption(data):
+            return get_vc_question(vc_question_data=data, indentation=1)
+
+        assert "0.90" not in caption(question_data)
+        question_data.ai_suggestions = [_suggest("cash", 0.9)]
+        assert " 0 cash     0.90 model" in caption(question_data)
+
+        ranked = copy.copy(question_data)
+        assert get_choice_lines(ranked) is get_choice_lines(question_data)
+        ranked.choices = ["savings", "cash"]
+        ranked.extra_data = {"annotations": {"savings": " matched"}}
+        assert (
+            caption(ranked)
+            == "\nSelect account:\n"
+            " 0 savings   matched\n"
+            " 1 cash     0.90 model\n"
+        )
+        # The original question data keeps its lines.
+        assert " 0 cash     0.90 model" in caption(question_data)
+
+    def test_scroll_benchmark(self):
+        choices = [f"assets:bank:account{i}" for i in range(2_000)]
+        question_data = _make_question_data(
+            choices,
+            ai_suggestions=[_suggest(choice, 0.1) for choice in choices],
+        )
+        get_choice_lines(question_data)
+
+        start = time.perf_counter()
+        for highlighted_index in range(500):
+            get_vc_question_with_highlight(
+                vc_question_data=question_data,
+                indentation=1,
+                highlighted_index=highlighted_index,
+            )
+        scroll_time = (time.perf_counter() - start) / 500
+
+        print(f"scroll: {scroll_time * 1000:.3f} ms per key")
+        assert scroll_time < 0.002
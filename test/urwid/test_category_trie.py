@@ -0,0 +1,140 @@
+"""Tests for the category namespace trie.
+
+Scenarios:
+  1. Every path of the namespace is a category, looked up per segment and
+     case-insensitively; unknown categories get an error message, any
+     category is accepted without a namespace.
+  2. A category is only valid in the configured case; the error names
+     the configured segment.
+  3. Completions list the categories one segment deeper, with a trailing
+     colon for categories with children; a unique one completes.
+  4. The session trie is rebuilt only if the namespace changed, and backs
+     the category question's validator.
+  5. In the category question, tab completes the typed segment and the
+     AI suggestion box lists the next segments.
+"""
+
+import pytest
+import urwid
+
+from tui_labeller.tuis.urwid.input_validation.CategoryTrie import (
+    CATEGORY_TRIE,
+    CategoryTrie,
+    get_category_trie,
+)
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    HistoryStore,
+)
+from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
+    InputValidationQuestion,
+)
+from tui_labeller.tuis.urwid.receipts.BaseQuestions import (
+    BaseQuestions,
+    validate_category,
+)
+
+PATHS = [
+    "groceries",
+    "groceries:ekoplaza",
+    "groceries:albert",
+    "gifts",
+    "Garden",
+    "Garden:tools",
+    "rent",
+]
+
+
+@pytest.fixture
+def namespace():
+    """Configure the session namespace for one test."""
+    yield get_category_trie(PATHS)
+    get_category_trie([])
+
+
+class TestCategoryTrie:
+
+    def test_lookup_and_validation(self):
+        trie = CategoryTrie(PATHS)
+
+        assert trie.find("groceries:Albert").path == "groceries:albert"
+        assert trie.find("garden").path == "Garden"
+        assert trie.find("groceries:jumbo") is None
+        assert trie.validate("groceries:ekoplaza") is None
+        assert (
+            trie.validate("groceries:jumbo")
+            == "Unknown category: groceries has no 'jumbo'."
+        )
+        assert (
+            trie.validate("food")
+            == "Unknown category: the category namespace has no 'food'."
+        )
+        assert CategoryTrie().validate("anything:goes") is None
+
+    def test_validation_is_case_sensitive(self):
+        trie = CategoryTrie(PATHS)
+
+        assert trie.validate("Garden:tools") is None
+        assert (
+            trie.validate("Groceries:EkoPlaza")
+            == "Unknown category: the category namespace has no 'Groceries',"
+            " did you mean 'groceries'?"
+        )
+        assert (
+            trie.validate("groceries:EkoPlaza")
+            == "Unknown category: groceries has no 'EkoPlaza', did you mean"
+            " 'ekoplaza'?"
+        )
+        assert (
+            trie.validate("garden:tools")
+            == "Unknown category: the category namespace has no 'garden', did"
+            " you mean 'Garden'?"
+        )
+
+    def test_completions(self):
+        trie = CategoryTrie(PATHS)
+
+        assert trie.get_completions("g") == ["Garden:", "gifts", "groceries:"]
+        assert trie.get_completions("groc") == ["groceries:"]
+        assert trie.get_completions("groceries:") == [
+            "groceries:albert",
+            "groceries:ekoplaza",
+        ]
+        assert trie.get_completions("food:") == []
+        assert trie.get_completions("g*a") == []
+        assert trie.complete("groc") == "groceries:"
+        assert trie.complete("groceries:e") == "groceries:ekoplaza"
+        assert trie.complete("groceries:ekoplaza") is None
+        assert trie.complete("g") is None
+
+    def test_session_trie(self, namespace):
+        root = namespace.root
+
+        assert namespace is CATEGORY_TRIE
+        assert get_category_trie(list(PATHS)).root is root
+        assert validate_category("groceries:jumbo") is not None
+        assert validate_category("rent") is None
+        assert get_category_trie(PATHS + ["tax"]).root is not root
+        get_category_trie([])
+        assert validate_category("groceries:jumbo") is None
+
+    def test_question_completes_segments(self, namespace):
+        question_data = BaseQuestions().get_category_question()
+        ai_box = urwid.AttrMap(urwid.Text(""), "normal")
+        question = InputValidationQuestion(
+            question_data=question_data,
+            history_store=HistoryStore(),
+            ai_suggestion_box=ai_box,
+            history_suggestion_box=urwid.AttrMap(urwid.Text(""), "normal"),
+        )
+        question.owner = urwid.AttrMap(question, "normal")
+
+        for key in "groc":
+            question.keypress((40,), key)
+        assert ai_box.base_widget.text == "groceries:"
+
+        assert question.keypress((40,), "tab") is None
+        assert question.get_edit_text() == "groceries:"
+        assert ai_box.base_widget.text == "groceries:albert, groceries:ekoplaza"
+
+        question.keypress((40,), "x")
+        assert ai_box.base_widget.text == "-"
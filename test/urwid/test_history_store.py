@@ -0,0 +1,191 @@
+"""Tests for the frecency-ranked answer history.
+
+Scenarios:
+  1. Labelled receipts seed the category and shop answers, each receipt
+     is counted once however often the store is synced.
+  2. Answers are ranked by use count, decayed by the time since the last
+     use; an answer set in the questionnaire is touched, not counted.
+  3. The ranking list is reused until an answer of the question changes.
+  4. The store survives a save and load, without counting the receipts
+     of the previous session again. A missing file is an empty store.
+     Two receipts of one shop on one day are both counted.
+  5. The history suggestion box lists the store's answers for the
+     question, most frecent first.
+  6. The session's store is the one opened for it, not the user's file
+     at the default path; opening the same path again keeps it.
+"""
+
+from datetime import datetime, timedelta
+
+import urwid
+from hledger_core.TransactionObjects.Address import Address
+from hledger_core.TransactionObjects.Receipt import Receipt
+from hledger_core.TransactionObjects.ShopId import ShopId
+
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    CATEGORY_QUESTION,
+    DEFAULT_HISTORY_PATH,
+    HistoryStore,
+    get_history_store,
+    open_history_store,
+)
+from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
+    InputValidationQuestion,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    InputValidationQuestionData,
+)
+
+
+def _make_receipt(the_date: datetime, category: str, shop_name: str):
+    return Receipt(
+        the_date=the_date,
+        receipt_category=category,
+        shop_identifier=ShopId(
+            name=shop_name,
+            address=Address(street="Main street", city="Delft"),
+        ),
+    )
+
+
+def _days_ago(days: int) -> datetime:
+    return datetime.now() - timedelta(days=days)
+
+
+class TestHistoryStore:
+
+    def test_seeded_once_from_labelled_receipts(self):
+        receipts = [
+            _make_receipt(_days_ago(3), "groceries:ekoplaza", "ekoplaza"),
+            _make_receipt(_days_ago(2), "groceries:ekoplaza", "ekoplaza"),
+            _make_receipt(_days_ago(1), "gifts", "hema"),
+        ]
+        store = HistoryStore()
+
+        store.sync(receipts)
+        store.sync(receipts)
+        store.add_receipt(receipts[-1])
+
+        assert store.get_frequencies(CATEGORY_QUESTION) == {
+            "groceries:ekoplaza": 2.0,
+            "gifts": 1.0,
+        }
+        assert store.get_top("shop_name") == ["ekoplaza", "hema"]
+        assert store.get_top("shop_city") == ["Delft"]
+
+    def test_ranked_by_count_and_recency(self):
+        store = HistoryStore()
+        for days in (400, 390, 380):
+            store.add_receipt(_make_receipt(_days_ago(days), "rent", "a"))
+        store.add_receipt(_make_receipt(_days_ago(1), "gifts", "b"))
+        store.add_receipt(_make_receipt(_days_ago(2), "groceries", "c"))
+        store.add_receipt(_make_receipt(_days_ago(5), "groceries", "d"))
+
+        # Rent was used most, but over a year ago.
+        assert store.get_top(CATEGORY_QUESTION) == [
+            "groceries",
+            "gifts",
+            "rent",
+        ]
+        assert store.get_top(CATEGORY_QUESTION, k=1) == ["groceries"]
+
+        store.touch(CATEGORY_QUESTION, "rent")
+
+        assert store.get_top(CATEGORY_QUESTION)[0] == "rent"
+        assert store.get_frequencies(CATEGORY_QUESTION)["rent"] == 3.0
+
+    def test_ranking_reused_until_changed(self):
+        store = HistoryStore()
+        store.touch("shop_name", "hema")
+        ranking = store.get_top("shop_name")
+
+        assert store.get_top("shop_name") is ranking
+        store.touch("shop_street", "Main street")
+        assert store.get_top("shop_name") is ranking
+        store.touch("shop_name", "ekoplaza")
+        assert store.get_top("shop_name") is not ranking
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "history" / "answers.json")
+        receipts = [_make_receipt(_days_ago(2), "gifts", "hema")]
+        store = HistoryStore(path=path)
+        store.sync(receipts)
+        store.touch("shop_name", "ekoplaza")
+        store.save()
+
+        # The next session sees the same receipt again, and a new one.
+        receipts.append(_make_receipt(_days_ago(1), "gifts", "hema"))
+        loaded = HistoryStore(path=path).sync(receipts)
+
+        assert loaded.get_frequencies(CATEGORY_QUESTION) == {"gifts": 2.0}
+        assert loaded.get_top("shop_name") == ["hema", "ekoplaza"]
+        assert loaded.get_frequencies("shop_name")["ekoplaza"] == 0.0
+
+    def test_same_shop_and_day_counted_per_receipt(self, tmp_path):
+        path = str(tmp_path / "answers.json")
+        the_date = _days_ago(1)
+        receipts = [
+            _make_receipt(the_date, "groceries:ekoplaza", "ekoplaza"),
+            _make_receipt(the_date, "groceries:ekoplaza", "ekoplaza"),
+        ]
+        receipts[0].raw_img_filepaths = ["morning.jpg"]
+        receipts[1].raw_img_filepaths = ["evening.jpg"]
+        store = HistoryStore(path=path).sync(receipts)
+        store.save()
+
+        loaded = HistoryStore(path=path).sync(receipts)
+
+        assert store.get_frequencies("shop_name") == {"ekoplaza": 2.0}
+        assert loaded.get_frequencies("shop_name") == {"ekoplaza": 2.0}
+
+    def test_missing_file_is_an_empty_store(self, tmp_path):
+        store = HistoryStore(path=str(tmp_path / "missing.json")).sync([])
+
+        assert store.get_top(CATEGORY_QUESTION) == []
+
+    def test_question_lists_the_history(self):
+        store = HistoryStore()
+        store.add_receipt(_make_receipt(_days_ago(9), "gifts", "hema"))
+        store.add_receipt(_make_receipt(_days_ago(1), "groceries", "eko"))
+        store.add_receipt(_make_receipt(_days_ago(2), "groceries", "eko"))
+        question_data = InputValidationQuestionData(
+            question=CATEGORY_QUESTION,
+            input_type=InputType.LETTERS_SEMICOLON,
+            ans_required=True,
+            reconfigurer=False,
+            terminator=False,
+            ai_suggestions=[],
+            history_suggestions=[],
+        )
+        history_box = urwid.AttrMap(urwid.Text(""), "normal")
+        question = InputValidationQuestion(
+            question_data=question_data,
+            history_store=store,
+            history_suggestion_box=history_box,
+        )
+        question.owner = urwid.AttrMap(question, "normal")
+
+        question.keypress((40,), "g")
+        assert history_box.base_widget.text == "groceries, gifts"
+
+        score = store.get_score(CATEGORY_QUESTION, "gifts")
+        question.set_answer("gifts")
+        assert store.get_score(CATEGORY_QUESTION, "gifts") > score
+        assert store.get_frequencies(CATEGORY_QUESTION)["gifts"] == 1.0
+
+    def test_session_store_is_the_opened_one(
+        self, history_store, tmp_path, monkeypatch
+    ):
+        home = tmp_path / "home"
+        monkeypatch.setenv("HOME", str(home))
+        users_store = HistoryStore(path=DEFAULT_HISTORY_PATH)
+        users_store.touch("shop_name", "LEAKED SHOP")
+        users_store.save()
+
+        assert get_history_store([]) is history_store
+        assert get_history_store([]).get_top("shop_name") == []
+        assert open_history_store(path=history_store.path) is history_store
+
+        other = open_history_store(path=str(tmp_path / "other.json"))
+        assert get_history_store([]) is other
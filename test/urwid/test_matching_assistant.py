@@ -0,0 +1,717 @@
+"""Tests for the in-TUI matching assistant.
+
+Scenarios:
+  1. The sorted transaction index returns the same candidates as
+     ``search_candidates``.
+  2. Widening the date range turns an empty search into a unique match,
+     which Enter accepts.
+  3. Swapping day and month finds the transaction of the swapped date.
+  4. The alternate currency action searches the converted amount.
+  5. Choosing "Open matching assistant" opens the overlay without
+     leaving the main loop; accepting pins the match and turns the
+     amount green.
+  6. Widening margins incrementally gives the same candidates as a full
+     search, while only the added date slices and amount band are
+     scanned.
+  7. All repair hypotheses are evaluated ahead; the report tells which
+     one gives a unique match, using the latest labelled withdrawal
+     rate for the alternate currency.
+  8. The exchange rate index returns the rate of the labelled withdrawal
+     nearest to the receipt date, in either direction.
+  9. A foreign withdrawal is matched in the source currency at the
+     historical rate, and the matched rate pre-fills the exchange rate
+     question; without a known rate it keeps its default.
+ 10. After adding an account rebuilds the questionnaire, the pinned
+     matches are kept and "Open matching assistant" still opens the
+     overlay.
+ 11. A later unique match replaces the estimated exchange rate, but not
+     a rate typed by the user.
+"""
+
+from datetime import datetime
+from test.urwid.test_amount_matching import (
+    _build_tui,
+    _get_amount_attrs,
+    _get_match_choices,
+    _make_account,
+    _make_account_config,
+    _make_config,
+    _make_transaction,
+)
+
+import pytest
+import urwid
+from hledger_core.Currency import Currency
+from hledger_core.TransactionObjects.Account import Account
+from hledger_core.TransactionObjects.AccountTransaction import (
+    AccountTransaction,
+)
+from hledger_core.TransactionObjects.ExchangedItem import ExchangedItem
+from hledger_core.TransactionObjects.Receipt import (
+    Receipt,
+    WithdrawalMetadata,
+)
+
+from tui_labeller.tuis.urwid.ask_urwid_receipt import (
+    _MatchingSession,
+    _open_matching_assistant,
+)
+from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.matching.candidate_search import (
+    search_candidates,
+)
+from tui_labeller.tuis.urwid.matching.ExchangeRateIndex import (
+    ExchangeRateIndex,
+    get_exchange_rate_index,
+)
+from tui_labeller.tuis.urwid.matching.IncrementalSearch import (
+    IncrementalSearch,
+)
+from tui_labeller.tuis.urwid.matching.match_query import (
+    MatchAction,
+    MatchQuery,
+)
+from tui_labeller.tuis.urwid.matching.repair_hypotheses import (
+    evaluate_hypotheses,
+    get_hypotheses,
+)
+from tui_labeller.tuis.urwid.matching.TransactionIndex import (
+    TransactionIndex,
+)
+from tui_labeller.tuis.urwid.matching_assistant.MatchingAssistant import (
+    MatchingAssistant,
+)
+from tui_labeller.tuis.urwid.question_app.generator import (
+    create_questionnaire,
+)
+from tui_labeller.tuis.urwid.question_app.reconfiguration.reconfiguration import (  # noqa: E501
+    MATCH_ASSISTANT_CHOICE,
+    MATCH_CHOICE_QUESTION,
+    _try_non_withdrawal_amount_match,
+    get_configuration,
+    refresh_csv_match,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    DateQuestionData,
+    InputValidationQuestionData,
+    VerticalMultipleChoiceQuestionData,
+)
+from tui_labeller.tuis.urwid.receipts.AccountQuestions import (
+    AccountQuestions,
+)
+from tui_labeller.tuis.urwid.receipts.OptionalQuestions import (
+    OptionalQuestions,
+)
+
+
+@pytest.fixture
+def bank_account():
+    return _make_account()
+
+
+@pytest.fixture
+def bank_config(bank_account):
+    return _make_account_config(bank_account, has_csv=True)
+
+
+def _make_csv_data(bank_config, bank_account):
+    return {
+        bank_config: {
+            2025: [
+                _make_transaction(bank_account, datetime(2025, 1, 20), -42.17),
+                _make_transaction(bank_account, datetime(2025, 5, 3), -9.99),
+                _make_transaction(bank_account, datetime(2025, 1, 14), -35.0),
+                _make_transaction(bank_account, datetime(2025, 1, 15), -7.5),
+            ]
+        }
+    }
+
+
+def _make_daily_csv_data(bank_config, bank_account):
+    """One transaction per day of January 2025, of 10 + day."""
+    return {
+        bank_config: {
+            2025: [
+                _make_transaction(
+                    bank_account, datetime(2025, 1, day), -10.0 - day
+                )
+                for day in range(1, 32)
+            ]
+        }
+    }
+
+
+def _make_assistant(csv_data, query, accepted=None):
+    return MatchingAssistant(
+        index=TransactionIndex(csv_data),
+        query=query,
+        on_accept=lambda q, txn: accepted.append((q, txn)),
+        on_cancel=lambda: None,
+    )
+
+
+class TestMatchingAssistant:
+    def test_index_equals_linear_search(self, bank_account, bank_config):
+        csv_data = _make_csv_data(bank_config, bank_account)
+        index = TransactionIndex(csv_data)
+
+        for day_margin in (0, 1, 5, 200):
+            for net_amount in (None, 42.17, 7.5):
+                expected = search_candidates(
+                    transactions_per_year=csv_data[bank_config],
+                    receipt_date=datetime(2025, 1, 15, 10, 30),
+                    net_amount=net_amount,
+                    day_margin=day_margin,
+                    amount_margin=0.0,
+                )
+                found = index.search(
+                    account_config=bank_config,
+                    receipt_date=datetime(2025, 1, 15, 10, 30),
+                    net_amount=net_amount,
+                    day_margin=day_margin,
+                    amount_margin=0.0,
+                )
+                assert sorted(t.the_date for t in found.in_window) == sorted(
+                    t.the_date for t in expected.in_window
+                )
+                assert sorted(t.the_date for t in found.matching) == sorted(
+                    t.the_date for t in expected.matching
+                )
+
+    def test_widen_date_then_accept(self, bank_account, bank_config):
+        accepted = []
+        assistant = _make_assistant(
+            _make_csv_data(bank_config, bank_account),
+            MatchQuery(
+                account_config=bank_config,
+                receipt_date=datetime(2025, 1, 15, 10, 30),
+                net_amount=42.17,
+                day_margin=2,
+                amount_margin=0.0,
+            ),
+            accepted,
+        )
+        assert assistant.result.matching == []
+
+        assistant.keypress((60, 20), "d")
+        assistant.keypress((60, 20), "d")
+        assistant.keypress((60, 20), "enter")
+
+        assert assistant.query.day_margin == 8
+        assert len(assistant.result.matching) == 1
+        ((query, txn),) = accepted
+        assert query.day_margin == 8
+        assert txn.the_date == datetime(2025, 1, 20)
+
+    def test_swap_day_and_month(self, bank_account, bank_config):
+        assistant = _make_assistant(
+            _make_csv_data(bank_config, bank_account),
+            MatchQuery(
+                account_config=bank_config,
+                receipt_date=datetime(2025, 3, 5, 10, 30),
+                net_amount=9.99,
+                day_margin=1,
+                amount_margin=0.0,
+            ),
+        )
+
+        assistant.keypress((60, 20), "s")
+
+        assert assistant.query.receipt_date.month == 5
+        assert assistant.query.receipt_date.day == 3
+        assert len(assistant.result.matching) == 1
+
+        assistant.keypress((60, 20), "u")
+        assert assistant.query.receipt_date.month == 3
+
+    def test_alternate_currency(self, bank_account, bank_config):
+        assistant = _make_assistant(
+            _make_csv_data(bank_config, bank_account),
+            MatchQuery(
+                account_config=bank_config,
+                receipt_date=datetime(2025, 1, 14, 10, 30),
+                net_amount=350.0,
+                day_margin=1,
+                amount_margin=0.0,
+            ),
+        )
+
+        assistant.keypress((60, 20), "c")
+        for _ in range(3):
+            assistant.keypress((60, 20), "backspace")
+        for key in "0.1":
+            assistant.keypress((60, 20), key)
+        assistant.keypress((60, 20), "enter")
+
+        assert assistant.query.conversion_ratio == pytest.approx(0.1)
+        assert len(assistant.result.matching) == 1
+
+    def test_overlay_opens_in_main_loop(self, bank_account, bank_config):
+        csv_data = _make_csv_data(bank_config, bank_account)
+        config = _make_config(days=2, amount_range=0)
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+        _try_non_withdrawal_amount_match(
+            tui=tui, config=config, csv_transactions_per_account=csv_data
+        )
+        assert MATCH_ASSISTANT_CHOICE in _get_match_choices(tui)
+        for inp in tui.inputs:
+            if inp.base_widget.question_data.question == MATCH_CHOICE_QUESTION:
+                inp.base_widget.set_answer(MATCH_ASSISTANT_CHOICE)
+
+        session = _MatchingSession(
+            config=config,
+            csv_transactions_per_account=csv_data,
+            index=TransactionIndex(csv_data),
+            labelled_receipts=[],
+        )
+        tui.on_reconfigurer = lambda app: _open_matching_assistant(
+            app, session=session
+        )
+        tui._handle_input("reconfigurer")
+
+        overlay = tui.loop.widget
+        assert isinstance(overlay, urwid.Overlay)
+        assistant = overlay.top_w
+        assistant.keypress((60, 20), "d")
+        assistant.keypress((60, 20), "d")
+        assistant.keypress((60, 20), "enter")
+
+        assert tui.loop.widget is tui.columns
+        assert session.config.matching_algo.days == 8
+        assert all(a == {None: "matched"} for a in _get_amount_attrs(tui))
+        assert _get_match_choices(tui) is None
+
+    def test_assistant_after_adding_account(self, bank_account, bank_config):
+        csv_data = _make_csv_data(bank_config, bank_account)
+        config = _make_config(days=2, amount_range=0)
+        account_str = bank_account.to_string()
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str="cash",
+            amount_paid="1.0",
+            account_choices=[account_str, "cash"],
+        )
+        session = _MatchingSession(
+            config=config,
+            csv_transactions_per_account=csv_data,
+            index=TransactionIndex(csv_data),
+            labelled_receipts=[],
+        )
+        tui.on_reconfigurer = lambda app: _open_matching_assistant(
+            app, session=session
+        )
+        pinned_matches = tui.pinned_matches
+        for inp in tui.inputs:
+            if (
+                inp.base_widget.question_data.question
+                == "Add another account (y/n)?"
+            ):
+                inp.base_widget.set_answer("y")
+
+        new_tui = get_configuration(
+            tui=tui,
+            account_questions=AccountQuestions(
+                account_infos_str=[account_str],
+                accounts_without_csv={"cash"},
+            ),
+            optional_questions=OptionalQuestions(labelled_receipts=[]),
+            labelled_receipts=[],
+        )
+
+        assert new_tui is not tui
+        assert new_tui.pinned_matches is pinned_matches
+        second_account = {
+            "Belongs to bank/accounts_without_csv:": account_str,
+            "Currency:": "EUR",
+            "Amount paid from account:": 42.17,
+            "Change returned to account:": 0.0,
+            "Add another account (y/n)?": "n",
+        }
+        for inp in new_tui.inputs[len(tui.inputs) :]:  # noqa: E203
+            widget = inp.base_widget
+            widget.set_answer(second_account[widget.question_data.question])
+        _try_non_withdrawal_amount_match(
+            tui=new_tui, config=config, csv_transactions_per_account=csv_data
+        )
+        for inp in new_tui.inputs:
+            if inp.base_widget.question_data.question == MATCH_CHOICE_QUESTION:
+                inp.base_widget.set_answer(MATCH_ASSISTANT_CHOICE)
+        new_tui._handle_input("reconfigurer")
+
+        assistant = new_tui.loop.widget.top_w
+        assistant.keypress((60, 20), "d")
+        assistant.keypress((60, 20), "d")
+        assistant.keypress((60, 20), "enter")
+        assert new_tui.loop.widget is new_tui.columns
+        assert pinned_matches[account_str].tendered_amount_out == -42.17
+
+
+class TestIncrementalSearch:
+    def test_widening_equals_full_search(self, bank_account, bank_config):
+        csv_data = _make_daily_csv_data(bank_config, bank_account)
+        index = TransactionIndex(csv_data)
+        search = IncrementalSearch(
+            index=index,
+            account_config=bank_config,
+            receipt_date=datetime(2025, 1, 15),
+            net_amount=25.0,
+        )
+
+        for day_margin, amount_margin in [
+            (1, 0.0),
+            (3, 0.0),
+            (3, 0.1),
+            (9, 0.2),
+            (2, 0.05),
+        ]:
+            found = search.search(
+                day_margin=day_margin, amount_margin=amount_margin
+            )
+            expected = index.search(
+                account_config=bank_config,
+                receipt_date=datetime(2025, 1, 15),
+                net_amount=25.0,
+                day_margin=day_margin,
+                amount_margin=amount_margin,
+            )
+            assert [t.the_date for t in found.in_window] == [
+                t.the_date for t in expected.in_window
+            ]
+            assert sorted(t.the_date for t in found.matching) == sorted(
+                t.the_date for t in expected.matching
+            )
+
+    def test_widening_scans_only_delta(self, bank_account, bank_config):
+        csv_data = _make_daily_csv_data(bank_config, bank_account)
+        search = IncrementalSearch(
+            index=TransactionIndex(csv_data),
+            account_config=bank_config,
+            receipt_date=datetime(2025, 1, 15),
+            net_amount=25.0,
+        )
+        search.search(day_margin=5, amount_margin=0.0)
+        assert search.scanned == 11
+
+        search.search(day_margin=7, amount_margin=0.0)
+        assert search.scanned == 4
+
+        # 25 +- 10% covers the amounts 23..27, of which 25 matched.
+        result = search.search(day_margin=7, amount_margin=0.1)
+        assert search.scanned == 4
+        assert len(result.matching) == 5
+
+
+def _make_withdrawal(the_date, source_currency, cash_currency, rate):
+    """Labelled withdrawal of *source_currency* into a cash wallet."""
+    source = Account(
+        base_currency=source_currency,
+        account_holder="at",
+        bank="bank",
+        account_type="checking",
+    )
+    wallet = Account(
+        base_currency=cash_currency,
+        account_holder="at",
+        bank="wallet",
+        account_type="cash",
+    )
+    receipt = Receipt()
+    receipt.the_date = the_date
+    receipt.net_bought_items = ExchangedItem(
+        quantity=1.0,
+        description="withdrawal",
+        the_date=the_date,
+        account_transactions=[
+            AccountTransaction(
+                account=wallet,
+                the_date=the_date,
+                tendered_amount_out=100.0,
+                change_returned=0.0,
+            )
+        ],
+    )
+    receipt.withdrawal_metadata = WithdrawalMetadata(
+        source_account_transaction=AccountTransaction(
+            account=source,
+            the_date=the_date,
+            tendered_amount_out=100.0 / rate,
+            change_returned=0.0,
+        ),
+        exchange_rate=rate,
+    )
+    return receipt
+
+
+class TestRepairHypotheses:
+    def test_report_finds_unique_swap(self, bank_account, bank_config):
+        csv_data = _make_csv_data(bank_config, bank_account)
+        query = MatchQuery(
+            account_config=bank_config,
+            receipt_date=datetime(2025, 3, 5, 10, 30),
+            net_amount=9.99,
+            day_margin=1,
+            amount_margin=0.0,
+        )
+
+        results = evaluate_hypotheses(
+            index=TransactionIndex(csv_data),
+            hypotheses=get_hypotheses(query),
+        )
+
+        unique = [r.action for r in results if r.is_unique]
+        assert unique == [MatchAction.SWAP_DAY_AND_MONTH]
+        assert [r.action for r in results] == [
+            MatchAction.WIDEN_DATE,
+            MatchAction.WIDEN_AMOUNT,
+            MatchAction.SWAP_DAY_AND_MONTH,
+        ]
+
+    def test_historical_rate_in_both_directions(self):
+        receipts = [
+            _make_withdrawal(
+                datetime(2024, 6, 1), Currency.EUR, Currency.USD, 1.05
+            ),
+            _make_withdrawal(
+                datetime(2025, 1, 2), Currency.EUR, Currency.USD, 1.1
+            ),
+            _make_withdrawal(
+                datetime(2025, 1, 3), Currency.EUR, Currency.GBP, 0.8
+            ),
+        ]
+
+        index = get_exchange_rate_index(receipts)
+
+        assert index.get_rate(
+            from_currency="EUR", to_currency="USD"
+        ) == pytest.approx(1.1)
+        assert index.get_rate(
+            from_currency="USD", to_currency="EUR"
+        ) == pytest.approx(1 / 1.1)
+        assert index.get_rate(from_currency="USD", to_currency="GBP") is None
+
+    def test_assistant_marks_unique_currency(self, bank_account, bank_config):
+        assistant = MatchingAssistant(
+            index=TransactionIndex(_make_csv_data(bank_config, bank_account)),
+            query=MatchQuery(
+                account_config=bank_config,
+                receipt_date=datetime(2025, 1, 14, 10, 30),
+                net_amount=350.0,
+                day_margin=1,
+                amount_margin=0.0,
+            ),
+            on_accept=lambda q, txn: None,
+            on_cancel=lambda: None,
+            conversion_ratio=0.1,
+        )
+
+        lines = assistant.actions_text.text.splitlines()
+        assert lines[3].endswith("Alternate currency -> unique match")
+        assert lines[0].endswith("-> 0 matching")
+
+
+def _build_withdrawal_tui(*, source_str, currency, amount_paid, receipts):
+    """Withdrawal from *source_str* of *amount_paid* in *currency*."""
+    questions = [
+        DateQuestionData(
+            question="Receipt date and time:\n",
+            date_only=False,
+            ai_suggestions=[],
+            ans_required=True,
+            reconfigurer=False,
+            terminator=False,
+        ),
+        VerticalMultipleChoiceQuestionData(
+            question="Withdrawal source account:",
+            choices=[source_str],
+            nr_of_ans_per_batch=10,
+            ai_suggestions=[],
+            ans_required=True,
+            reconfigurer=True,
+            terminator=False,
+        ),
+        VerticalMultipleChoiceQuestionData(
+            question="Currency:",
+            choices=[c.value for c in Currency],
+            nr_of_ans_per_batch=10,
+            ai_suggestions=[],
+            ans_required=True,
+            reconfigurer=False,
+            terminator=False,
+        ),
+    ] + [
+        InputValidationQuestionData(
+            question=question,
+            input_type=InputType.FLOAT,
+            ai_suggestions=[],
+            history_suggestions=[],
+            ans_required=True,
+            reconfigurer=False,
+            terminator=False,
+            default=default,
+        )
+        for question, default in (
+            ("Amount paid from account:", None),
+            ("Amount debited from source account:", None),
+            ("Exchange rate (1 source = X destination):", "1"),
+        )
+    ]
+    tui = create_questionnaire(
+        header="Test", questions=questions, labelled_receipts=receipts
+    )
+    answers = {
+        "Receipt date and time:\n": datetime(2025, 1, 15, 10, 30),
+        "Withdrawal source account:": source_str,
+        "Currency:": currency,
+        "Amount paid from account:": amount_paid,
+    }
+    for inp in tui.inputs:
+        w = inp.base_widget
+        if w.question_data.question in answers:
+            w.set_answer(answers[w.question_data.question])
+    return tui
+
+
+def _get_edit_text(tui, question):
+    for inp in tui.inputs:
+        if inp.base_widget.question_data.question == question:
+            return inp.base_widget.get_edit_text()
+    raise AssertionError(question)
+
+
+class TestWithdrawalExchangeRates:
+    def test_index_returns_nearest_rate(self):
+        index = ExchangeRateIndex().sync(
+            [
+                _make_withdrawal(
+                    datetime(2024, 6, 1), Currency.EUR, Currency.USD, 1.05
+                ),
+                _make_withdrawal(
+                    datetime(2025, 1, 2), Currency.USD, Currency.EUR, 0.9
+                ),
+            ]
+        )
+
+        assert index.get_rate(
+            from_currency="EUR",
+            to_currency="USD",
+            the_date=datetime(2024, 7, 1),
+        ) == pytest.approx(1.05)
+        assert index.get_rate(
+            from_currency="EUR",
+            to_currency="USD",
+            the_date=datetime(2024, 12, 1),
+        ) == pytest.approx(1 / 0.9)
+
+    def test_foreign_withdrawal_matches_converted_amount(
+        self, bank_account, bank_config
+    ):
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 15), -100.0
+                    ),
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 15), -90.91
+                    ),
+                ]
+            }
+        }
+        tui = _build_withdrawal_tui(
+            source_str=bank_account.to_string(),
+            currency="USD",
+            amount_paid=100.0,
+            receipts=[
+                _make_withdrawal(
+                    datetime(2025, 1, 2), Currency.EUR, Currency.USD, 1.1
+                )
+            ],
+        )
+
+        refresh_csv_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        debited = _get_edit_text(tui, "Amount debited from source account:")
+        assert float(debited) == pytest.approx(90.91)
+        rate = _get_edit_text(tui, "Exchange rate (1 source = X destination):")
+        assert float(rate) == pytest.approx(100 / 90.91, abs=1e-6)
+
+    def test_unknown_rate_keeps_default(self, bank_account, bank_config):
+        csv_data = {
+            bank_config: {
+                2025: [
+                    _make_transaction(
+                        bank_account, datetime(2025, 1, 15), -90.91
+                    )
+                ]
+            }
+        }
+        tui = _build_withdrawal_tui(
+            source_str=bank_account.to_string(),
+            currency="GBP",
+            amount_paid=100.0,
+            receipts=[],
+        )
+
+        refresh_csv_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        rate = _get_edit_text(tui, "Exchange rate (1 source = X destination):")
+        assert rate == "1"
+
+    def test_unique_match_replaces_estimated_rate(
+        self, bank_account, bank_config
+    ):
+        def refresh(tui, amounts):
+            refresh_csv_match(
+                tui=tui,
+                config=_make_config(days=2, amount_range=0),
+                csv_transactions_per_account={
+                    bank_config: {
+                        2025: [
+                            _make_transaction(
+                                bank_account, datetime(2025, 1, 15), -amount
+                            )
+                            for amount in amounts
+                        ]
+                    }
+                },
+            )
+
+        question = "Exchange rate (1 source = X destination):"
+        receipts = [
+            _make_withdrawal(
+                datetime(2025, 1, 2), Currency.EUR, Currency.USD, 1.1
+            )
+        ]
+        tui = _build_withdrawal_tui(
+            source_str=bank_account.to_string(),
+            currency="USD",
+            amount_paid=100.0,
+            receipts=receipts,
+        )
+
+        refresh(tui, [90.0, 92.0])
+        assert float(_get_edit_text(tui, question)) == pytest.approx(1.1)
+
+        refresh(tui, [92.0])
+        assert float(_get_edit_text(tui, question)) == pytest.approx(
+            100 / 92.0, abs=1e-6
+        )
+
+        # A rate typed by the user is kept.
+        for inp in tui.inputs:
+            if inp.base_widget.question_data.question == question:
+                inp.base_widget.set_answer(1.2)
+        refresh(tui, [90.0])
+        assert float(_get_edit_text(tui, question)) == pytest.approx(1.2)
@@ -0,0 +1,104 @@
+"""Tests for pasting text into input questions.
+
+Scenarios:
+  1. Runs of printable keys in one input batch become one pasted key,
+     short runs and named keys are delivered as they are.
+  2. A pasted key inserts its valid characters at the cursor as one edit
+     and updates the suggestions once, like typing them would.
+  3. Pasting a long text is much faster than typing it key by key.
+"""
+
+import time
+
+import urwid
+
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    HistoryStore,
+)
+from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
+    InputValidationQuestion,
+)
+from tui_labeller.tuis.urwid.input_validation.paste_coalescing import (
+    PastedText,
+    coalesce_pasted_keys,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    InputValidationQuestionData,
+)
+
+
+def _make_question(history_store: HistoryStore):
+    question_data = InputValidationQuestionData(
+        question="Shop street:",
+        input_type=InputType.LETTERS_AND_SPACE,
+        ans_required=True,
+        reconfigurer=False,
+        terminator=False,
+        ai_suggestions=[],
+        history_suggestions=[],
+        question_id="shop_street",
+    )
+    history_box = urwid.AttrMap(urwid.Text(""), "normal")
+    question = InputValidationQuestion(
+        question_data=question_data,
+        history_store=history_store,
+        history_suggestion_box=history_box,
+    )
+    question.owner = urwid.AttrMap(question, "normal")
+    return question, history_box
+
+
+class TestPasteCoalescing:
+
+    def test_coalesce_keys(self):
+        keys = ["backspace", "M", "a", "i", "n", " ", "s", "enter", "a", "b"]
+
+        coalesced = coalesce_pasted_keys(keys)
+
+        assert coalesced == ["backspace", "Main s", "enter", "a", "b"]
+        assert isinstance(coalesced[1], PastedText)
+        assert not isinstance(coalesced[3], PastedText)
+        assert coalesce_pasted_keys(["home", "end"]) == ["home", "end"]
+
+    def test_paste_is_one_edit(self):
+        history_store = HistoryStore()
+        for street in ["Main street", "Market square", "Mill lane"]:
+            history_store.touch("shop_street", street)
+        question, history_box = _make_question(history_store)
+        question.keypress((40,), "M")
+        question.keypress((40,), "home")
+
+        question.keypress((40,), PastedText("The 2nd "))
+
+        assert question.get_edit_text() == "The nd M"
+        assert question.edit_pos == len("The nd ")
+        assert history_box.base_widget.text == "-"
+
+        question.set_edit_text("")
+        question.keypress((40,), PastedText("Ma"))
+        assert history_box.base_widget.text == "Main street, Market square"
+
+    def test_long_paste_latency(self):
+        history_store = HistoryStore()
+        for i in range(2_000):
+            history_store.touch("shop_street", f"street {i}")
+        text = "street " + "a" * 400
+
+        typed, _ = _make_question(history_store)
+        start = time.perf_counter()
+        for key in text:
+            typed.keypress((40,), key)
+        typing_time = time.perf_counter() - start
+
+        pasted, _ = _make_question(history_store)
+        start = time.perf_counter()
+        for key in coalesce_pasted_keys(list(text)):
+            pasted.keypress((40,), key)
+        paste_time = time.perf_counter() - start
+
+        print(f"typed: {typing_time * 1000:.1f} ms")
+        print(f"pasted: {paste_time * 1000:.1f} ms")
+        assert pasted.get_edit_text() == typed.get_edit_text() == text
+        assert paste_time < 0.05
+        assert paste_time * 10 < typing_time
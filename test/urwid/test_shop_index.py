@@ -0,0 +1,159 @@
+"""Tests for the shop address index.
+
+Scenarios:
+  1. Shops are counted per category, for receipts with a shop address
+     only; shops loaded in their dict form are counted with the others.
+  2. The address choices list the shops of the category (and its
+     sub-categories) first, then those of its parent category, then the
+     rest, each most used first.
+  3. A finished receipt is added once, also when it is appended to the
+     labelled receipts afterwards, and refreshes the memoized choices.
+  4. Indexing many receipts is a single pass, repeated choices come from
+     the memo.
+"""
+
+import time
+from datetime import datetime
+
+from hledger_core.TransactionObjects.Address import Address
+from hledger_core.TransactionObjects.Receipt import Receipt
+from hledger_core.TransactionObjects.ShopId import ShopId
+
+from tui_labeller.tuis.urwid.question_app.addresses.ShopIndex import (
+    ShopIndex,
+    get_shop_index,
+)
+from tui_labeller.tuis.urwid.question_app.addresses.update_addresses import (
+    get_initial_complete_list,
+    get_relevant_shop_ids,
+)
+
+
+def _make_receipt(category: str, name: str, city: str = "Delft"):
+    return Receipt(
+        the_date=datetime(2024, 1, 1),
+        receipt_category=category,
+        shop_identifier=ShopId(
+            name=name, address=Address(street="Main street", city=city)
+        ),
+    )
+
+
+def _get_receipts():
+    return [
+        _make_receipt("groceries:ah", "ah"),
+        _make_receipt("groceries:ah", "ah"),
+        _make_receipt("groceries:ah", "ah", city="Leiden"),
+        _make_receipt("groceries:jumbo", "jumbo"),
+        _make_receipt("gifts", "hema"),
+        _make_receipt("gifts", "hema"),
+        _make_receipt("gifts", "hema"),
+        _make_receipt("gifts", "hema"),
+        Receipt(
+            receipt_category="gifts",
+            shop_identifier={
+                "name": "blokker",
+                "address": {"street": "Market", "city": "Delft"},
+                "shop_account_nr": None,
+            },
+        ),
+        Receipt(
+            receipt_category="gifts",
+            shop_identifier=ShopId(name="online", address=Address()),
+        ),
+        Receipt(receipt_category="rent", shop_identifier=None),
+    ]
+
+
+class TestShopIndex:
+
+    def test_counts_per_category(self):
+        receipts = _get_receipts()
+
+        shops = get_relevant_shop_ids(labelled_receipts=receipts)
+
+        assert sorted(shops) == ["gifts", "groceries:ah", "groceries:jumbo"]
+        assert [
+            (count, shop_id.name, shop_id.address.city)
+            for count, shop_id in shops["groceries:ah"]
+        ] == [(2, "ah", "Delft"), (1, "ah", "Leiden")]
+        assert [(count, shop_id.name) for count, shop_id in shops["gifts"]] == [
+            (4, "hema"),
+            (1, "blokker"),
+        ]
+        assert get_relevant_shop_ids(
+            labelled_receipts=receipts, category_input="rent"
+        ) == {"rent": []}
+
+    def test_choices_in_tiers(self):
+        receipts = _get_receipts()
+
+        choices, shop_ids = get_initial_complete_list(
+            labelled_receipts=receipts, category_input="groceries:jumbo"
+        )
+
+        assert choices == [
+            "manual address",
+            "jumbo: Main street Delft",
+            "ah: Main street Delft",
+            "ah: Main street Leiden",
+            "hema: Main street Delft",
+            "blokker: Market Delft",
+        ]
+        assert [shop_id.name for shop_id in shop_ids] == [
+            "manual address",
+            "jumbo",
+            "ah",
+            "ah",
+            "hema",
+            "blokker",
+        ]
+        choices, _ = get_initial_complete_list(labelled_receipts=receipts)
+        assert choices[1:3] == [
+            "hema: Main street Delft",
+            "ah: Main street Delft",
+        ]
+
+    def test_finished_receipt_added_once(self):
+        receipts = _get_receipts()
+        shop_index = get_shop_index(receipts)
+        before, _ = shop_index.get_initial_complete_list("gifts")
+
+        for _ in range(4):
+            finished = _make_receipt("gifts", "blokker")
+            shop_index.add_receipt(finished)
+            receipts.append(finished)
+        get_shop_index(receipts)
+
+        after, _ = shop_index.get_initial_complete_list("gifts")
+        assert before[1] == "hema: Main street Delft"
+        assert after[1] == "blokker: Main street Delft"
+        assert shop_index.category_counts["gifts"].total() == 9
+
+    def test_large_corpus_benchmark(self):
+        receipts = [
+            _make_receipt(f"expenses:cat{i % 200}", f"shop{i % 3000}")
+            for i in range(30_000)
+        ]
+
+        start = time.perf_counter()
+        shop_index = ShopIndex().sync(receipts)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        choices, _ = shop_index.get_initial_complete_list("expenses:cat199")
+        first_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(100):
+            shop_index.get_initial_complete_list("expenses:cat199")
+        memo_time = (time.perf_counter() - start) / 100
+
+        print(f"build: {build_time * 1000:.1f} ms")
+        print(f"first: {first_time * 1000:.1f} ms")
+        print(f"memo: {memo_time * 1000:.2f} ms")
+        assert len(choices) == 3001
+        # The 15 shops of the category come first.
+        assert {choice.split(":")[0] for choice in choices[1:16]} == {
+            f"shop{i}" for i in range(199, 3000, 200)
+        }
+        assert build_time < 1.0
+        assert memo_time < first_time
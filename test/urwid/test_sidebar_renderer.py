@@ -0,0 +1,123 @@
+"""Tests for the coalesced rendering of the sidebar suggestion boxes.
+
+Scenarios:
+  1. Suggestions that do not fit in a box are cut off with a "+N more"
+     count.
+  2. Without a main loop, boxes are rendered right away.
+  3. While a main loop is attached, the keys of one input batch render
+     the suggestion boxes once, with the suggestions of the last key.
+  4. Boxes whose text did not change are not rendered again.
+"""
+
+from typing import List
+
+import urwid
+
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    HistoryStore,
+)
+from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
+    InputValidationQuestion,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    InputValidationQuestionData,
+)
+from tui_labeller.tuis.urwid.SidebarRenderer import (
+    SIDEBAR_RENDERER,
+    SidebarRenderer,
+    get_capped_text,
+)
+
+
+class _CountingText(urwid.Text):
+    def __init__(self):
+        self.nr_of_renders: int = -1  # Not counting the initial text.
+        super().__init__("")
+
+    def set_text(self, markup):
+        self.nr_of_renders += 1
+        super().set_text(markup)
+
+
+class _AlarmLoop:
+    """Collects the alarms of the renderer, run with ``run_alarms``."""
+
+    def __init__(self):
+        self.alarms: List = []
+
+    def set_alarm_in(self, sec, callback, user_data=None):
+        self.alarms.append(callback)
+
+    def run_alarms(self):
+        alarms, self.alarms = self.alarms, []
+        for callback in alarms:
+            callback(self, None)
+
+
+def _make_question(history_store: HistoryStore, box: urwid.AttrMap):
+    question_data = InputValidationQuestionData(
+        question="Shop name:",
+        input_type=InputType.LETTERS,
+        ans_required=True,
+        reconfigurer=False,
+        terminator=False,
+        ai_suggestions=[],
+        history_suggestions=[],
+        question_id="shop_name",
+    )
+    question = InputValidationQuestion(
+        question_data=question_data,
+        history_store=history_store,
+        history_suggestion_box=box,
+    )
+    question.owner = urwid.AttrMap(question, "normal")
+    return question
+
+
+class TestSidebarRenderer:
+
+    def test_capped_text(self):
+        suggestions = ["albert", "aldi", "action", "apple"]
+
+        assert (
+            get_capped_text(suggestions, None) == "albert, aldi, action, apple"
+        )
+        assert get_capped_text(suggestions, 27) == "albert, aldi, action, apple"
+        assert get_capped_text(suggestions, 26) == "albert, aldi, +2 more"
+        assert get_capped_text(suggestions, 5) == "+4 more"
+
+    def test_renders_right_away_without_loop(self):
+        renderer = SidebarRenderer()
+        box = urwid.AttrMap(urwid.Text(""), "normal")
+        renderer.set_capacity(box, 15)
+
+        renderer.set_suggestions(box, ["albert", "aldi", "action"])
+
+        assert box.base_widget.text == "albert, +2 more"
+
+    def test_one_render_per_input_batch(self):
+        history_store = HistoryStore()
+        for shop in ["albert", "aldi", "action", "hema"]:
+            history_store.touch("shop_name", shop)
+        box = urwid.AttrMap(_CountingText(), "normal")
+        question = _make_question(history_store, box)
+        loop = _AlarmLoop()
+        SIDEBAR_RENDERER.attach(loop)
+        try:
+            for key in "alb":
+                question.keypress((40,), key)
+
+            assert box.base_widget.nr_of_renders == 0
+            assert len(loop.alarms) == 1
+
+            loop.run_alarms()
+            assert box.base_widget.text == "albert"
+            assert box.base_widget.nr_of_renders == 1
+
+            question.keypress((40,), "backspace")
+            question.keypress((40,), "b")
+            loop.run_alarms()
+            assert box.base_widget.nr_of_renders == 1
+        finally:
+            SIDEBAR_RENDERER.detach()
@@ -0,0 +1,197 @@
+"""Tests for the SQLite backed answer history.
+
+Scenarios:
+  1. Receipts are counted once, also when the database is reopened by the
+     next session, and answers are ranked like the in-memory store. A
+     database of an older version is started over.
+  2. Prefix and wildcard lookups give the in-memory index's results, at
+     most ``limit`` of them.
+  3. The fallback lookup finds answers by any of their words.
+  4. The history suggestion box of a question reads from the database.
+  5. Lookups stay fast on a corpus of 50k answers.
+  6. Opening the session's store with a database path uses the SQLite
+     store, and the receipts are counted into that database.
+"""
+
+import sqlite3
+import time
+from datetime import timedelta
+from test.urwid.test_history_store import _days_ago, _make_receipt
+
+import pytest
+import urwid
+
+from tui_labeller.tuis.urwid.input_validation.HistoryStore import (
+    CATEGORY_QUESTION,
+    HistoryStore,
+    get_history_store,
+    open_history_store,
+)
+from tui_labeller.tuis.urwid.input_validation.InputType import InputType
+from tui_labeller.tuis.urwid.input_validation.InputValidationQuestion import (
+    InputValidationQuestion,
+)
+from tui_labeller.tuis.urwid.input_validation.SqliteHistoryStore import (
+    SqliteHistoryStore,
+)
+from tui_labeller.tuis.urwid.question_data_classes import (
+    InputValidationQuestionData,
+)
+
+CATEGORIES = [
+    "groceries:ekoplaza",
+    "groceries:albert",
+    "gifts",
+    "Garden:tools",
+    "rent",
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "history.db")
+
+
+def _fill(store, categories):
+    for days, category in enumerate(categories, start=1):
+        store.add_receipt(_make_receipt(_days_ago(days), category, "shop"))
+    return store
+
+
+class TestSqliteHistoryStore:
+
+    def test_counted_once_across_sessions(self, db_path):
+        receipts = [
+            _make_receipt(_days_ago(400), "rent", "landlord"),
+            _make_receipt(_days_ago(390), "rent", "landlord"),
+            _make_receipt(_days_ago(2), "gifts", "hema"),
+        ]
+        SqliteHistoryStore(path=db_path).sync(receipts)
+
+        receipts.append(_make_receipt(_days_ago(1), "gifts", "hema"))
+        store = SqliteHistoryStore(path=db_path).sync(receipts)
+        memory_store = HistoryStore().sync(receipts)
+
+        assert store.get_frequencies(CATEGORY_QUESTION) == {
+            "rent": 2.0,
+            "gifts": 2.0,
+        }
+        assert store.get_top(CATEGORY_QUESTION) == memory_store.get_top(
+            CATEGORY_QUESTION
+        )
+        assert store.get_top(CATEGORY_QUESTION, k=1) == ["gifts"]
+
+    def test_older_version_is_counted_again(self, db_path):
+        receipts = [_make_receipt(_days_ago(2), "gifts", "hema")]
+        SqliteHistoryStore(path=db_path).sync(receipts).save()
+        connection = sqlite3.connect(db_path)
+        connection.execute("PRAGMA user_version = 1")
+        connection.execute(
+            "UPDATE counted_receipts SET receipt_key = 'old format'"
+        )
+        connection.commit()
+        connection.close()
+
+        store = SqliteHistoryStore(path=db_path).sync(receipts)
+
+        assert store.get_frequencies(CATEGORY_QUESTION) == {"gifts": 1.0}
+        assert store.get_index("shop_name").fuzzy_filter("hema") == ["hema"]
+
+    def test_opened_as_session_store(self, db_path):
+        receipts = [_make_receipt(_days_ago(2), "gifts", "hema")]
+
+        store = open_history_store(db_path=db_path)
+        assert isinstance(store, SqliteHistoryStore)
+        assert get_history_store(receipts) is store
+        store.save()
+
+        reopened = SqliteHistoryStore(path=db_path)
+        assert reopened.get_frequencies(CATEGORY_QUESTION) == {"gifts": 1.0}
+
+    @pytest.mark.parametrize(
+        "text", ["", "*", "g", "G", "groc", "g*a", "g*o*t", "x", "r*z"]
+    )
+    def test_lookups_match_the_memory_index(self, db_path, text):
+        store = _fill(SqliteHistoryStore(path=db_path), CATEGORIES)
+        memory_store = _fill(HistoryStore(), CATEGORIES)
+
+        expected = memory_store.get_index(CATEGORY_QUESTION).filter(text)
+        assert store.get_index(CATEGORY_QUESTION).filter(text) == expected
+
+    def test_limit(self, db_path):
+        store = _fill(SqliteHistoryStore(path=db_path, limit=2), CATEGORIES)
+
+        assert store.get_index(CATEGORY_QUESTION).filter("g") == [
+            "groceries:ekoplaza",
+            "groceries:albert",
+        ]
+
+    def test_fallback_matches_words(self, db_path):
+        store = _fill(SqliteHistoryStore(path=db_path), CATEGORIES)
+        index = store.get_index(CATEGORY_QUESTION)
+
+        assert index.filter("eko") == ["-"]
+        assert index.fuzzy_filter("eko") == ["groceries:ekoplaza"]
+        assert index.fuzzy_filter("tools") == ["Garden:tools"]
+        assert index.fuzzy_filter("eko*") == []
+
+    def test_question_reads_the_database(self, db_path):
+        store = _fill(SqliteHistoryStore(path=db_path), CATEGORIES)
+        question_data = InputValidationQuestionData(
+            question=CATEGORY_QUESTION,
+            input_type=InputType.LETTERS_SEMICOLON,
+            ans_required=True,
+            reconfigurer=False,
+            terminator=False,
+            ai_suggestions=[],
+            history_suggestions=[],
+            fuzzy_autocomplete=True,
+        )
+        history_box = urwid.AttrMap(urwid.Text(""), "normal")
+        question = InputValidationQuestion(
+            question_data=question_data,
+            history_store=store,
+            history_suggestion_box=history_box,
+        )
+        question.owner = urwid.AttrMap(question, "normal")
+
+        question.keypress((40,), "g")
+        assert (
+            history_box.base_widget.text
+            == "groceries:ekoplaza, groceries:albert, gifts, Garden:tools"
+        )
+        for key in "xalbert":
+            question.keypress((40,), key)
+        assert history_box.base_widget.text == "-"
+
+        question.set_edit_text("")
+        for key in "albert":
+            question.keypress((40,), key)
+        assert history_box.base_widget.text == "groceries:albert"
+
+    def test_large_corpus_benchmark(self, db_path):
+        store = SqliteHistoryStore(path=db_path)
+        now = _days_ago(0)
+        for i in range(50_000):
+            store.touch(
+                CATEGORY_QUESTION,
+                f"expenses:shop{i}:item{i % 97}",
+                when=now - timedelta(minutes=i),
+            )
+        store.save()
+        index = store.get_index(CATEGORY_QUESTION)
+
+        worst = 0.0
+        for text in ["expenses:shop1234", "expenses:shop49*item3", "item42"]:
+            start = time.perf_counter()
+            index.filter(text)
+            index.fuzzy_filter(text)
+            worst = max(worst, time.perf_counter() - start)
+
+        print(f"worst lookup: {worst * 1000:.1f} ms")
+        # Most recently used first.
+        assert index.filter("expenses:shop1234") == [
+            f"expenses:shop{i}:item{i % 97}"
+            for i in [1234] + list(range(12340, 12350))
+        ]
+        assert worst < 0.5
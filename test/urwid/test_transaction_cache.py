@@ -0,0 +1,212 @@
+"""Tests for the persistent CSV transaction cache.
+
+Scenarios:
+  1. The first load parses the CSV and writes the cache; the second load
+     reads the cache without parsing.
+  2. Cached years are decoded lazily and round-trip dates and amounts.
+  3. A touched but unchanged CSV keeps its cache (hash check).
+  4. A changed CSV is reparsed.
+  5. The cached mapping is accepted by the amount matcher.
+  6. A matching window only decodes the years it touches, including the
+     previous year for a window crossing new year.
+  7. Decoded years are capped per account (LRU).
+"""
+
+import os
+from datetime import datetime
+from test.urwid.test_amount_matching import (
+    _build_tui,
+    _make_account,
+    _make_account_config,
+    _make_config,
+    _make_transaction,
+)
+
+import pytest
+
+from tui_labeller.tuis.urwid.matching.transaction_cache import (
+    CACHE_SUFFIX,
+    CachedAccountYears,
+    CachedCsvTransactions,
+)
+from tui_labeller.tuis.urwid.question_app.reconfiguration.reconfiguration import (  # noqa: E501
+    _try_non_withdrawal_amount_match,
+    _validate_account_date_range,
+)
+
+
+@pytest.fixture
+def bank_account():
+    return _make_account()
+
+
+@pytest.fixture
+def bank_config(bank_account):
+    return _make_account_config(bank_account, has_csv=True)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "bank.csv"
+    path.write_text("date,amount\n2024-12-30,-12.50\n2025-01-15,-42.17\n")
+    return str(path)
+
+
+class _CountingParser:
+    """Parse stub returning fixed transactions and counting its calls."""
+
+    def __init__(self, account):
+        self.calls = 0
+        self.account = account
+
+    def __call__(self, account_config):
+        self.calls += 1
+        txn_2024 = _make_transaction(
+            self.account, datetime(2024, 12, 30, 9, 15), -12.5
+        )
+        txn_2024.description = "Bakery Café"
+        return {
+            2024: [txn_2024],
+            2025: [
+                _make_transaction(self.account, datetime(2025, 1, 15), -42.17)
+            ],
+        }
+
+
+def _load(bank_config, csv_path, parser, **kwargs):
+    return CachedCsvTransactions(
+        account_configs=[bank_config],
+        get_csv_path=lambda ac: csv_path,
+        parse_csv=parser,
+        **kwargs,
+    )
+
+
+def _history_parser(account):
+    """Parse stub with one transaction on Dec 30 of 2020 up to 2024."""
+
+    def parse(account_config):
+        return {
+            year: [_make_transaction(account, datetime(year, 12, 30), -9.99)]
+            for year in range(2020, 2025)
+        }
+
+    return parse
+
+
+class TestTransactionCache:
+    def test_second_load_reads_cache(self, bank_account, bank_config, csv_path):
+        parser = _CountingParser(bank_account)
+
+        _load(bank_config, csv_path, parser)
+        cached = _load(bank_config, csv_path, parser)
+
+        assert parser.calls == 1
+        assert os.path.exists(csv_path + CACHE_SUFFIX)
+        assert isinstance(cached[bank_config], CachedAccountYears)
+
+    def test_years_decode_lazily(self, bank_account, bank_config, csv_path):
+        parser = _CountingParser(bank_account)
+        _load(bank_config, csv_path, parser)
+        years = _load(bank_config, csv_path, parser)[bank_config]
+
+        assert sorted(years) == [2024, 2025]
+        assert years.date_bounds() == (
+            datetime(2024, 12, 30, 9, 15),
+            datetime(2025, 1, 15),
+        )
+        assert not years.is_loaded(2024)
+
+        (txn,) = years[2024]
+        assert years.is_loaded(2024)
+        assert not years.is_loaded(2025)
+        assert txn.the_date == datetime(2024, 12, 30, 9, 15)
+        assert txn.tendered_amount_out == -12.5
+        assert txn.change_returned == 0.0
+        assert txn.description == "Bakery Café"
+        assert txn.account is bank_account
+
+    def test_touched_csv_keeps_cache(self, bank_account, bank_config, csv_path):
+        parser = _CountingParser(bank_account)
+        _load(bank_config, csv_path, parser)
+        stat = os.stat(csv_path)
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        _load(bank_config, csv_path, parser)
+        _load(bank_config, csv_path, parser)
+
+        assert parser.calls == 1
+
+    def test_changed_csv_is_reparsed(self, bank_account, bank_config, csv_path):
+        parser = _CountingParser(bank_account)
+        _load(bank_config, csv_path, parser)
+        with open(csv_path, "a") as f:
+            f.write("2025-01-16,-3.00\n")
+
+        _load(bank_config, csv_path, parser)
+
+        assert parser.calls == 2
+
+    def test_cached_data_matches_receipt(
+        self, bank_account, bank_config, csv_path
+    ):
+        parser = _CountingParser(bank_account)
+        _load(bank_config, csv_path, parser)
+        csv_data = _load(bank_config, csv_path, parser)
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 15, 10, 30),
+            account_str=bank_account.to_string(),
+            amount_paid="42.17",
+        )
+
+        date_range = _validate_account_date_range(
+            tui=tui, csv_transactions_per_account=csv_data
+        )
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=2, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        assert date_range.status == "ok"
+        assert result.status == "matched"
+        assert not csv_data[bank_config].is_loaded(2024)
+
+
+class TestYearPartitions:
+    def test_window_decodes_touched_years(
+        self, bank_account, bank_config, csv_path
+    ):
+        """Receipt on Jan 1 2025 matches the CSV row of Dec 30 2024."""
+        csv_data = _load(bank_config, csv_path, _history_parser(bank_account))
+        tui = _build_tui(
+            receipt_date=datetime(2025, 1, 1, 10, 0),
+            account_str=bank_account.to_string(),
+            amount_paid="9.99",
+        )
+
+        result = _try_non_withdrawal_amount_match(
+            tui=tui,
+            config=_make_config(days=3, amount_range=0),
+            csv_transactions_per_account=csv_data,
+        )
+
+        years = csv_data[bank_config]
+        assert result.status == "matched"
+        assert years.is_loaded(2024)
+        assert not any(years.is_loaded(y) for y in range(2020, 2024))
+
+    def test_resident_years_capped(self, bank_account, bank_config, csv_path):
+        csv_data = _load(
+            bank_config,
+            csv_path,
+            _history_parser(bank_account),
+            max_resident_years=2,
+        )
+        years = csv_data[bank_config]
+
+        for year in (2020, 2021, 2022, 2021):
+            assert len(years[year]) == 1
+
+        assert [y for y in years if years.is_loaded(y)] == [2021, 2022]
+        assert years.decode_count == 3